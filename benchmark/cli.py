@@ -0,0 +1,522 @@
+import argparse
+import ast
+import gc
+import os
+import sys
+from functools import partial
+
+from engines_tests_m1 import EtlLinkedin as EtlLinkedinM1
+from engines_tests_m1 import save_environment_metrics as save_environment_metrics_m1
+from engines_tests_m2 import EtlLinkedin as EtlLinkedinM2
+from engines_tests_m2 import clear_directory
+from engines_tests_m2 import save_environment_metrics as save_environment_metrics_m2
+
+from benchmark.isolation import run_harness, run_isolated
+from benchmark.profiling import PROFILE_MODES
+from benchmark.runner import (
+    append_to_csv,
+    benchmark_samples,
+    collect_samples,
+    save_benchmark,
+)
+from benchmark.scaling import default_parallelism_counts, scaling_curves
+from benchmark.store import MetricsStore
+
+METHODS = {"m1": EtlLinkedinM1, "m2": EtlLinkedinM2}
+ENGINES = ["duckdb", "polars", "pandas"]
+# engines que só rodam quando pedidas em --engines
+OPTIONAL_ENGINES = ["polars_lazy"]
+ENVIRONMENTS = ["1y", "2y", "6y"]
+
+
+def parse_options(values):
+    """
+    Converte opções KEY=VALUE da linha de comando em um dicionário de opções das engines.
+
+    Os valores são lidos como literais Python (ex.: 4, True, "zstd"); o que não for um
+    literal válido fica como texto.
+
+    Parâmetros:
+    values (list): Lista de textos KEY=VALUE.
+
+    Retorno:
+    dict: Dicionário {opção: valor}.
+    """
+    options = {}
+    for value in values or []:
+        if "=" not in value:
+            raise argparse.ArgumentTypeError(f"Opção inválida: {value}. Use KEY=VALUE.")
+        key, raw_value = value.split("=", 1)
+        try:
+            options[key] = ast.literal_eval(raw_value)
+        except (ValueError, SyntaxError):
+            options[key] = raw_value
+    return options
+
+
+def build_parser():
+    """
+    Monta o parser da linha de comando do benchmark.
+
+    Retorno:
+    argparse.ArgumentParser: Parser configurado.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmark",
+        description="Executa a matriz engine x ambiente x método do benchmark das engines.",
+    )
+    parser.add_argument("--methods", nargs="+", choices=list(METHODS), default=list(METHODS))
+    parser.add_argument(
+        "--engines",
+        nargs="+",
+        choices=ENGINES + OPTIONAL_ENGINES,
+        default=ENGINES,
+        help="Engines a medir. polars_lazy (Polars com LazyFrames) só existe no método 1.",
+    )
+    parser.add_argument("--environments", nargs="+", default=ENVIRONMENTS)
+    parser.add_argument(
+        "--steps",
+        nargs="+",
+        help="Etapas a medir (ex.: extract_data). O fluxo para depois da última etapa escolhida.",
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Modo benchmark: aquecimento + repetições, gravando samples.csv e summary.csv.",
+    )
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument(
+        "--threads",
+        nargs="+",
+        type=int,
+        help="Quantidades de threads do DuckDB e do Polars; cada valor vira uma célula. Implica --isolate.",
+    )
+    parser.add_argument(
+        "--workers",
+        nargs="+",
+        type=int,
+        help="Quantidades de processos da extração paralela do método 1 (extraction_workers); cada valor vira uma célula.",
+    )
+    parser.add_argument(
+        "--scaling",
+        choices=["threads", "workers"],
+        help="Varredura de escalabilidade: roda o modo benchmark para cada quantidade de threads (ou workers), de 1 até o número de núcleos se a lista não for informada, e grava speedup e eficiência por etapa em scaling.csv.",
+    )
+    parser.add_argument(
+        "--isolate",
+        action="store_true",
+        help="Executa cada célula em um processo novo.",
+    )
+    parser.add_argument("--track-memory", action="store_true")
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Executa o fluxo do método 1 mês a mês, com o pico de memória limitado a um mês de dados mais os acumuladores mensais.",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        help=(
+            "Grava o perfil de cada etapa medida em <output>/<método>/profiles: .pstats "
+            "(cprofile) ou pilhas colapsadas para flamegraph (sampling). Com --streaming, "
+            "o perfil é do total_etl_time."
+        ),
+    )
+    parser.add_argument(
+        "--raw-directory",
+        default="data/linkedin/raw",
+        help="Prefixo dos ambientes de dados brutos (<prefixo>_<ambiente>).",
+    )
+    parser.add_argument(
+        "--unique-extraction-directory",
+        default="data/linkedin/raw_unique_extraction",
+    )
+    parser.add_argument(
+        "--output",
+        default="data/linkedin/clean",
+        help="Diretório base dos dados limpos e das métricas (<output>/m1 e <output>/m2).",
+    )
+    parser.add_argument(
+        "--raw-manifest-directory",
+        help=(
+            "Diretório dos manifestos dos arquivos brutos (<diretório>/<nome do diretório bruto>.json). "
+            "Com ele, a varredura dos dados brutos, com tamanho, mtime e hash de cada arquivo, é gravada "
+            "e reaproveitada entre execuções, e só os diretórios alterados são listados de novo."
+        ),
+    )
+    parser.add_argument(
+        "--m1-option",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Opção das engines do método 1 (ex.: extraction_workers=4).",
+    )
+    parser.add_argument(
+        "--m2-option",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Opção das engines do método 2 (ex.: incremental=True).",
+    )
+    parser.add_argument("--skip-environment-metrics", action="store_true")
+    parser.add_argument(
+        "--store",
+        help="Banco SQLite de métricas (padrão: <output>/metrics.sqlite).",
+    )
+    parser.add_argument(
+        "--no-store",
+        action="store_true",
+        help="Não grava o banco de métricas, só os arquivos CSV.",
+    )
+    parser.add_argument(
+        "--label",
+        help="Nome da execução no banco de métricas (ex.: baseline).",
+    )
+    return parser
+
+
+def select_method_steps(method, steps):
+    """
+    Filtra as etapas pedidas que existem no fluxo de um método.
+
+    Parâmetros:
+    method (str): Método (m1 ou m2).
+    steps (list): Etapas pedidas na linha de comando, ou None.
+
+    Retorno:
+    list: Etapas do método, None se não houver filtro ou lista vazia se nenhuma etapa pedida for do método.
+    """
+    if steps is None:
+        return None
+    method_steps = METHODS[method].STEPS + ["total_etl_time"]
+    return [step for step in steps if step in method_steps]
+
+
+def raw_manifest_path(args, raw_directory):
+    """
+    Caminho do manifesto de um diretório de dados brutos.
+
+    Parâmetros:
+    args (argparse.Namespace): Argumentos da linha de comando.
+    raw_directory (str): Diretório de dados brutos.
+
+    Retorno:
+    str: Caminho do manifesto, ou None se --raw-manifest-directory não foi informado.
+    """
+    if not args.raw_manifest_directory:
+        return None
+    name = os.path.basename(os.path.normpath(raw_directory))
+    return os.path.join(args.raw_manifest_directory, f"{name}.json")
+
+
+def method_engine_options(args, method, environment, workers):
+    """
+    Opções do construtor das engines de um método.
+
+    Parâmetros:
+    args (argparse.Namespace): Argumentos da linha de comando.
+    method (str): Método (m1 ou m2).
+    environment (str): Ambiente (ex.: 6y).
+    workers (int): Quantidade de processos da extração do método 1, ou None.
+
+    Retorno:
+    dict: Opções das engines.
+    """
+    if method == "m2":
+        engine_options = parse_options(args.m2_option)
+        raw_directory = args.unique_extraction_directory
+    else:
+        engine_options = parse_options(args.m1_option)
+        raw_directory = f"{args.raw_directory}_{environment}"
+        if workers:
+            engine_options["extraction_workers"] = workers
+
+    raw_manifest = raw_manifest_path(args, raw_directory)
+    if raw_manifest:
+        engine_options.setdefault("raw_manifest", raw_manifest)
+    return engine_options
+
+
+def create_harness_factory(args, method, environment, engine, threads, workers, steps):
+    """
+    Cria a função que monta o harness de uma célula.
+
+    Parâmetros:
+    args (argparse.Namespace): Argumentos da linha de comando.
+    method (str): Método (m1 ou m2).
+    environment (str): Ambiente (ex.: 6y).
+    engine (str): Engine (duckdb, polars, pandas).
+    threads (int): Quantidade de threads, ou None.
+    workers (int): Quantidade de processos da extração do método 1, ou None.
+    steps (list): Etapas a medir, ou None.
+
+    Retorno:
+    functools.partial: Função sem parâmetros que cria o harness, serializável para o processo isolado.
+    """
+    m1_directory = os.path.join(args.output, "m1")
+    profile_directory = os.path.join(args.output, method, "profiles")
+
+    engine_options = method_engine_options(args, method, environment, workers)
+
+    if method == "m1":
+        return partial(
+            EtlLinkedinM1,
+            f"{args.raw_directory}_{environment}",
+            os.path.join(m1_directory, engine, environment),
+            engine,
+            environment,
+            engine_options,
+            args.track_memory,
+            steps=steps,
+            threads=threads,
+            profile=args.profile,
+            profile_directory=profile_directory,
+            streaming=args.streaming,
+        )
+
+    return partial(
+        EtlLinkedinM2,
+        engine,
+        environment,
+        m1_directory=m1_directory,
+        unique_extraction_directory=args.unique_extraction_directory,
+        engine_options=engine_options,
+        track_memory=args.track_memory,
+        steps=steps,
+        threads=threads,
+        export_directory=os.path.join(args.output, "m2", engine),
+        profile=args.profile,
+        profile_directory=profile_directory,
+    )
+
+
+def save_environment(args, method, environment, isolate, store=None, run_id=None):
+    """
+    Grava as métricas de um ambiente no environments.csv do método e no banco de métricas.
+
+    Parâmetros:
+    args (argparse.Namespace): Argumentos da linha de comando.
+    method (str): Método (m1 ou m2).
+    environment (str): Ambiente (ex.: 6y).
+    isolate (bool): Se True, a coleta roda em um processo novo.
+    store (MetricsStore): Banco de métricas, ou None.
+    run_id (str): Execução no banco de métricas.
+    """
+    environment_data = os.path.join(args.output, method, "environments.csv")
+
+    if method == "m1":
+        function = save_environment_metrics_m1
+        function_args = (
+            environment,
+            f"{args.raw_directory}_{environment}",
+            environment_data,
+            raw_manifest_path(args, f"{args.raw_directory}_{environment}"),
+        )
+    else:
+        # o método 2 mede o histórico concatenado pelo método 1 da primeira engine
+        function = save_environment_metrics_m2
+        function_args = (
+            environment,
+            os.path.join(
+                args.output,
+                "m1",
+                args.engines[0],
+                environment,
+                "concatenated_dataframes",
+            ),
+            environment_data,
+        )
+
+    if isolate:
+        environment_metrics = run_isolated(function, *function_args)
+    else:
+        environment_metrics = function(*function_args)
+
+    if store is not None:
+        store.add_environment(run_id, method, environment, environment_metrics)
+
+
+def run_cell(
+    args, method, environment, engine, threads, workers, steps, isolate, store=None, run_id=None
+):
+    """
+    Executa uma célula (método, ambiente, engine, threads, workers) da matriz.
+
+    Parâmetros:
+    args (argparse.Namespace): Argumentos da linha de comando.
+    method (str): Método (m1 ou m2).
+    environment (str): Ambiente (ex.: 6y).
+    engine (str): Engine (duckdb, polars, pandas).
+    threads (int): Quantidade de threads, ou None.
+    workers (int): Quantidade de processos da extração do método 1, ou None.
+    steps (list): Etapas a medir, ou None.
+    isolate (bool): Se True, a célula roda em um processo novo.
+    store (MetricsStore): Banco de métricas, ou None.
+    run_id (str): Execução no banco de métricas.
+
+    Retorno:
+    list: Resumo por etapa no modo benchmark; lista vazia nos demais casos.
+    """
+    create_harness = create_harness_factory(
+        args, method, environment, engine, threads, workers, steps
+    )
+    method_directory = os.path.join(args.output, method)
+    env_vars = {"POLARS_MAX_THREADS": threads} if threads else None
+
+    context = {"method": method, "environment": environment, "engine": engine}
+    if threads:
+        context["threads"] = threads
+    if workers:
+        context["workers"] = workers
+
+    configuration = {
+        "engine_options": method_engine_options(args, method, environment, workers),
+        "steps": steps,
+        "track_memory": args.track_memory,
+        "profile": args.profile,
+        "streaming": args.streaming and method == "m1",
+        "isolate": isolate,
+    }
+
+    # no modo incremental o harness não limpa os segmentos, então a célula começa do zero aqui
+    if method == "m2" and configuration["engine_options"].get("incremental"):
+        clear_directory(os.path.join(args.output, "m2", engine))
+
+    if args.benchmark:
+        samples = benchmark_samples(
+            create_harness,
+            context,
+            warmup=args.warmup,
+            repetitions=args.repetitions,
+            isolate=isolate,
+            env_vars=env_vars,
+        )
+        if store is not None:
+            store.add_cell(
+                run_id, context, configuration, samples, "benchmark", args.warmup
+            )
+        return save_benchmark(samples, context, method_directory)
+
+    if isolate:
+        result = run_isolated(run_harness, create_harness, env_vars=env_vars)
+    else:
+        harness = create_harness()
+        harness.run_etl()
+        result = {
+            "engine_metrics": harness.engine_metrics,
+            "step_samples": harness.step_samples,
+        }
+        del harness
+        gc.collect()
+
+    engine_metrics = result["engine_metrics"]
+    if workers:
+        engine_metrics["workers"] = workers
+    append_to_csv([engine_metrics], os.path.join(method_directory, "engines.csv"))
+
+    if store is not None:
+        samples = collect_samples(result["step_samples"], context, 0)
+        store.add_cell(run_id, context, configuration, samples, "single")
+    return []
+
+
+def print_scaling_curves(curves, parallelism_key):
+    """
+    Mostra as curvas de escalabilidade em uma tabela de texto.
+
+    Parâmetros:
+    curves (list): Linhas geradas por scaling_curves.
+    parallelism_key (str): Coluna varrida (threads ou workers).
+    """
+    print(
+        f"{'method':<6} {'env':<6} {'engine':<8} {'step':<36} {parallelism_key:>7} "
+        f"{'median_s':>10} {'speedup':>8} {'eff.':>6}"
+    )
+    for row in curves:
+        print(
+            f"{row['method']:<6} {row['environment']:<6} {row['engine']:<8} {row['step']:<36} "
+            f"{row[parallelism_key]:>7} {row['median_s']:>10.4f} "
+            f"{row['speedup'] or float('nan'):>8.2f} {row['efficiency'] or float('nan'):>6.2f}"
+        )
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.steps:
+        valid_steps = {
+            step for harness in METHODS.values() for step in harness.STEPS
+        } | {"total_etl_time"}
+        invalid_steps = [step for step in args.steps if step not in valid_steps]
+        if invalid_steps:
+            parser.error(f"etapas inválidas: {invalid_steps}")
+
+    if args.scaling:
+        # a varredura precisa de repetições para comparar medianas
+        args.benchmark = True
+        if args.scaling == "threads" and not args.threads:
+            args.threads = default_parallelism_counts()
+        if args.scaling == "workers" and not args.workers:
+            args.workers = default_parallelism_counts()
+
+    # o pool do Polars só é dimensionado no import, por isso as threads exigem um processo novo
+    isolate = args.isolate or bool(args.threads)
+    thread_counts = args.threads or [None]
+    worker_counts = args.workers or [None]
+
+    store = None
+    run_id = None
+    if not args.no_store:
+        store = MetricsStore(args.store or os.path.join(args.output, "metrics.sqlite"))
+        run_id = store.start_run(
+            label=args.label, command=" ".join(["python -m benchmark"] + (argv or sys.argv[1:]))
+        )
+        print(f"Run {run_id} stored in {store.path}")
+
+    for method in args.methods:
+        steps = select_method_steps(method, args.steps)
+        if steps == []:
+            print(f"Skipping {method}: none of the selected steps belong to it")
+            continue
+        if method == "m2" and args.scaling == "workers":
+            print("Skipping m2: extraction workers only exist in method 1")
+            continue
+
+        summary = []
+        for environment in args.environments:
+            if not args.skip_environment_metrics:
+                save_environment(args, method, environment, isolate, store, run_id)
+
+            for engine in args.engines:
+                if engine not in METHODS[method].ENGINES:
+                    print(f"Skipping {engine} in {method}: engine not available in this method")
+                    continue
+                for threads in thread_counts:
+                    # a extração paralela só existe no método 1
+                    for workers in worker_counts if method == "m1" else [None]:
+                        summary += run_cell(
+                            args,
+                            method,
+                            environment,
+                            engine,
+                            threads,
+                            workers,
+                            steps,
+                            isolate,
+                            store,
+                            run_id,
+                        )
+
+        if args.scaling:
+            curves = scaling_curves(summary, args.scaling)
+            append_to_csv(curves, os.path.join(args.output, method, "scaling.csv"))
+            print_scaling_curves(curves, args.scaling)
+
+    if store is not None:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import re
+import zipfile
+from xml.etree import ElementTree
+
+from engines.sheet_layout import SHEET_LAYOUT
+
+SPREADSHEET_NAMESPACE = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+RELATIONSHIPS_NAMESPACE = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+DOCUMENT_RELATIONSHIPS_NAMESPACE = (
+    "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+)
+
+CELL_REFERENCE = re.compile(r"([A-Z]+)(\d+)")
+
+
+def column_number(letters):
+    """
+    Converte as letras de uma coluna do Excel no seu número.
+
+    Parâmetros:
+    letters (str): Letras da coluna (ex.: AB).
+
+    Retorno:
+    int: Número da coluna, começando em 1 (ex.: 28).
+    """
+    number = 0
+    for letter in letters:
+        number = number * 26 + ord(letter) - ord("A") + 1
+    return number
+
+
+def ooxml_sheet_paths(archive):
+    """
+    Caminhos, dentro do zip, das planilhas de um arquivo OOXML, na ordem das abas.
+
+    Parâmetros:
+    archive (zipfile.ZipFile): Arquivo Excel aberto.
+
+    Retorno:
+    list: Caminhos das planilhas (ex.: xl/worksheets/sheet1.xml).
+    """
+    workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+    relationships = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    targets = {
+        relationship.get("Id"): relationship.get("Target")
+        for relationship in relationships.iter(f"{RELATIONSHIPS_NAMESPACE}Relationship")
+    }
+
+    paths = []
+    for sheet in workbook.iter(f"{SPREADSHEET_NAMESPACE}sheet"):
+        target = targets[sheet.get(f"{DOCUMENT_RELATIONSHIPS_NAMESPACE}id")]
+        # o alvo pode ser absoluto (/xl/...) ou relativo a xl/
+        paths.append(target.lstrip("/") if target.startswith("/") else f"xl/{target}")
+    return paths
+
+
+def ooxml_sheet_extent(stream):
+    """
+    Última linha e última coluna com valor de uma planilha OOXML.
+
+    O XML é percorrido em streaming, sem converter os valores e sem carregar as strings
+    compartilhadas; células sem valor ou com texto vazio não contam.
+
+    Parâmetros:
+    stream (file): XML da planilha, aberto do zip.
+
+    Retorno:
+    tuple: (última linha com valor, maior coluna com valor), ambas começando em 1, ou (0, 0) se a planilha estiver vazia.
+    """
+    last_row = 0
+    last_column = 0
+    row_number = 0
+
+    for _, element in ElementTree.iterparse(stream):
+        if element.tag != f"{SPREADSHEET_NAMESPACE}row":
+            continue
+
+        row_number = int(element.get("r", row_number + 1))
+        row_last_column = 0
+        column = 0
+        for cell in element.iter(f"{SPREADSHEET_NAMESPACE}c"):
+            reference = cell.get("r")
+            if reference:
+                column = column_number(CELL_REFERENCE.match(reference).group(1))
+            else:
+                column += 1
+
+            # o valor fica em <v> ou, nas strings inline, em <is>; fórmulas (<f>) não contam
+            value = "".join(
+                text
+                for child in cell
+                if child.tag in (f"{SPREADSHEET_NAMESPACE}v", f"{SPREADSHEET_NAMESPACE}is")
+                for text in child.itertext()
+            )
+            if value:
+                row_last_column = column
+
+        if row_last_column:
+            last_row = row_number
+            last_column = max(last_column, row_last_column)
+        element.clear()
+
+    return last_row, last_column
+
+
+def excel_sheet_dimensions(file_path, skiprows):
+    """
+    Quantidade de linhas e colunas dos DataFrames que o pandas leria de um arquivo Excel,
+    sem montar os DataFrames.
+
+    Segue a leitura do pandas: para arquivos OOXML (xlsx, e também os .xls do LinkedIn, que
+    são OOXML) as linhas e colunas vazias no fim da planilha são descartadas; para arquivos
+    .xls binários (BIFF) vale o tamanho informado pelo xlrd. Das linhas restantes saem as
+    linhas ignoradas (skiprows) e o cabeçalho.
+
+    Parâmetros:
+    file_path (str): Caminho do arquivo Excel.
+    skiprows (list): Linhas ignoradas de cada planilha lida, na ordem das abas.
+
+    Retorno:
+    list: Lista de tuplas (linhas, colunas), uma por planilha lida.
+    """
+    if zipfile.is_zipfile(file_path):
+        with zipfile.ZipFile(file_path) as archive:
+            sheet_paths = ooxml_sheet_paths(archive)
+            dimensions = []
+            for sheet_pos, sheet_skiprows in enumerate(skiprows):
+                with archive.open(sheet_paths[sheet_pos]) as stream:
+                    last_row, last_column = ooxml_sheet_extent(stream)
+                dimensions.append((max(0, last_row - sheet_skiprows - 1), last_column))
+            return dimensions
+
+    import xlrd
+
+    workbook = xlrd.open_workbook(file_path, on_demand=True)
+    try:
+        dimensions = []
+        for sheet_pos, sheet_skiprows in enumerate(skiprows):
+            sheet = workbook.sheet_by_index(sheet_pos)
+            dimensions.append((max(0, sheet.nrows - sheet_skiprows - 1), sheet.ncols))
+            workbook.unload_sheet(sheet_pos)
+        return dimensions
+    finally:
+        workbook.release_resources()
+
+
+def raw_environment_stats(files):
+    """
+    Totais de um ambiente de dados brutos lidos dos metadados das planilhas.
+
+    Parâmetros:
+    files (list): Arquivos brutos, no formato de get_raw_files (category e file_path).
+
+    Retorno:
+    dict: num_files, num_tables, total_columns e total_rows, iguais aos obtidos extraindo os dados com o pandas.
+    """
+    num_tables = 0
+    total_columns = 0
+    total_rows = 0
+    for file in files:
+        for rows, columns in excel_sheet_dimensions(
+            file["file_path"],
+            [sheet["skiprows"] for sheet in SHEET_LAYOUT[file["category"]]],
+        ):
+            num_tables += 1
+            total_columns += columns
+            total_rows += rows
+
+    return {
+        "num_files": len(files),
+        "num_tables": num_tables,
+        "total_columns": total_columns,
+        "total_rows": total_rows,
+    }
+
+
+def count_lines(file_path, chunk_size=1024 * 1024):
+    """
+    Conta as linhas de um arquivo de texto contando as quebras de linha em blocos de bytes,
+    sem decodificar o conteúdo.
+
+    Parâmetros:
+    file_path (str): Caminho do arquivo.
+    chunk_size (int): Tamanho dos blocos lidos do disco.
+
+    Retorno:
+    int: Quantidade de linhas, incluindo uma última linha sem quebra no final.
+    """
+    num_lines = 0
+    last_chunk = b""
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            num_lines += chunk.count(b"\n")
+            last_chunk = chunk
+
+    if last_chunk and not last_chunk.endswith(b"\n"):
+        num_lines += 1
+    return num_lines
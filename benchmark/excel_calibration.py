@@ -0,0 +1,289 @@
+import argparse
+import json
+import os
+import statistics
+import time
+from datetime import datetime
+
+from engines.excel_readers import (
+    DEFAULT_BACKENDS,
+    EXCEL_BACKENDS,
+    ExcelReader,
+    available_backends,
+    excel_format,
+)
+from engines.method_1.etl_linkedin_pandas import EtlLinkedinPandas
+from engines.method_1.etl_linkedin_polars import EtlLinkedinPolars
+
+# Engine usada para ler os arquivos de cada biblioteca, com as mesmas planilhas e skiprows do fluxo
+CALIBRATION_ENGINES = {"pandas": EtlLinkedinPandas, "polars": EtlLinkedinPolars}
+
+
+def sample_files(files, max_files):
+    """
+    Escolhe até max_files arquivos espalhados pela lista, para cobrir todo o período do ambiente.
+
+    Parâmetros:
+    files (list): Arquivos brutos, na ordem de get_raw_files.
+    max_files (int): Quantidade máxima de arquivos. Com 0, todos são usados.
+
+    Retorno:
+    list: Arquivos escolhidos.
+    """
+    if not max_files or len(files) <= max_files:
+        return files
+    step = len(files) / max_files
+    return [files[int(i * step)] for i in range(max_files)]
+
+
+def frames_match(library, dataframes, reference):
+    """
+    Verifica se os DataFrames lidos por um backend são iguais aos do backend padrão, inclusive nos tipos.
+
+    Parâmetros:
+    library (str): Biblioteca dos DataFrames (pandas ou polars).
+    dataframes (list): DataFrames lidos pelo backend avaliado.
+    reference (list): DataFrames lidos pelo backend padrão, na mesma ordem.
+
+    Retorno:
+    bool: True se todos forem iguais.
+    """
+    if len(dataframes) != len(reference):
+        return False
+    if library == "polars":
+        return all(
+            df.schema == expected.schema and df.equals(expected)
+            for df, expected in zip(dataframes, reference)
+        )
+    return all(df.equals(expected) for df, expected in zip(dataframes, reference))
+
+
+def time_backend(engine, files, repetitions):
+    """
+    Mede a leitura dos arquivos com o leitor atual da engine.
+
+    A primeira leitura fica fora das medições, para não contar o import do backend.
+
+    Parâmetros:
+    engine (EtlLinkedinPandas ou EtlLinkedinPolars): Engine com o excel_reader avaliado.
+    files (list): Arquivos lidos.
+    repetitions (int): Quantidade de leituras medidas de todos os arquivos.
+
+    Retorno:
+    tuple: (tempos de cada repetição em nanossegundos, DataFrames da última leitura).
+    """
+    engine.read_excel_file(files[0])
+
+    samples_ns = []
+    for _ in range(repetitions):
+        start_time = time.perf_counter_ns()
+        data = [obj for file in files for obj in engine.read_excel_file(file)]
+        samples_ns.append(time.perf_counter_ns() - start_time)
+
+    return samples_ns, [obj["df"] for obj in data]
+
+
+def calibrate_library(library, raw_directory, max_files, repetitions):
+    """
+    Mede cada backend disponível de uma biblioteca, por formato de arquivo.
+
+    O backend padrão de cada formato é medido primeiro e serve de referência: os demais só
+    são considerados corretos se lerem DataFrames iguais aos dele. Se o próprio padrão
+    falhar (ex.: .xls em BIFF no Polars), os backends que leem sem erro ficam como não
+    verificados e ainda podem ser escolhidos.
+
+    Parâmetros:
+    library (str): Biblioteca de DataFrames (pandas ou polars).
+    raw_directory (str): Diretório dos dados brutos.
+    max_files (int): Quantidade máxima de arquivos por formato.
+    repetitions (int): Quantidade de leituras medidas.
+
+    Retorno:
+    list: Uma linha por backend e formato, com tempos e status (ok, unverified, mismatch, error, unavailable).
+    """
+    engine = CALIBRATION_ENGINES[library](raw_directory, None)
+    files_by_format = {}
+    for file in engine.get_raw_files(raw_directory):
+        files_by_format.setdefault(excel_format(file["file_path"]), []).append(file)
+
+    installed = available_backends(library)
+    rows = []
+    for file_format, files in sorted(files_by_format.items()):
+        files = sample_files(files, max_files)
+        default_backend = DEFAULT_BACKENDS[library][file_format]
+        backends = [default_backend] + [
+            backend
+            for backend, attributes in EXCEL_BACKENDS[library].items()
+            if backend != default_backend and file_format in attributes["formats"]
+        ]
+
+        reference = None
+        for backend in backends:
+            row = {
+                "library": library,
+                "format": file_format,
+                "backend": backend,
+                "files": len(files),
+                "median_s": None,
+            }
+            rows.append(row)
+            if backend not in installed:
+                row["status"] = "unavailable"
+                continue
+
+            engine.excel_reader = ExcelReader(library, {file_format: backend})
+            try:
+                samples_ns, dataframes = time_backend(engine, files, repetitions)
+            except Exception as error:
+                row["status"] = f"error: {type(error).__name__}"
+                continue
+
+            row["median_s"] = round(statistics.median(samples_ns) / 1e9, 6)
+            if backend == default_backend:
+                reference = dataframes
+                row["status"] = "ok"
+            elif reference is None:
+                row["status"] = "unverified"
+            else:
+                row["status"] = (
+                    "ok" if frames_match(library, dataframes, reference) else "mismatch"
+                )
+
+    return rows
+
+
+def select_backends(rows):
+    """
+    Escolhe o backend mais rápido entre os corretos de cada biblioteca e formato.
+
+    Parâmetros:
+    rows (list): Linhas geradas por calibrate_library.
+
+    Retorno:
+    dict: Dicionário {biblioteca: {formato: backend}}, no formato lido por ExcelReader.
+    """
+    selected = {}
+    for row in rows:
+        if row["status"] not in ("ok", "unverified"):
+            continue
+        current = selected.setdefault(row["library"], {}).get(row["format"])
+        if current is None or row["median_s"] < current["median_s"]:
+            selected[row["library"]][row["format"]] = row
+
+    return {
+        library: {file_format: row["backend"] for file_format, row in formats.items()}
+        for library, formats in selected.items()
+    }
+
+
+def print_calibration(rows, selected):
+    """
+    Mostra a calibração em uma tabela de texto, marcando com * o backend escolhido.
+
+    Parâmetros:
+    rows (list): Linhas geradas por calibrate_library.
+    selected (dict): Backends escolhidos por select_backends.
+    """
+    print(
+        f"{'library':<8} {'format':<6} {'backend':<10} {'files':>5} "
+        f"{'median_s':>9} {'ms/file':>8}  status"
+    )
+    for row in rows:
+        if row["median_s"] is None:
+            timings = f"{'-':>9} {'-':>8}"
+        else:
+            timings = f"{row['median_s']:>9.4f} {row['median_s'] * 1000 / row['files']:>8.2f}"
+        chosen = selected.get(row["library"], {}).get(row["format"]) == row["backend"]
+        print(
+            f"{row['library']:<8} {row['format']:<6} {row['backend']:<10} {row['files']:>5} "
+            f"{timings}  {row['status']}{' *' if chosen else ''}"
+        )
+
+
+def build_parser():
+    """
+    Cria o parser de argumentos da calibração.
+
+    Retorno:
+    argparse.ArgumentParser: Parser configurado.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmark.excel_calibration",
+        description=(
+            "Mede os backends de leitura do Excel instalados nos arquivos brutos e grava, "
+            "por biblioteca e formato, o mais rápido entre os que leem os mesmos dados do "
+            "backend padrão."
+        ),
+    )
+    parser.add_argument(
+        "--raw-directory",
+        default="data/linkedin/raw_1y",
+        help="Diretório dos dados brutos usados na calibração.",
+    )
+    parser.add_argument(
+        "--libraries",
+        nargs="+",
+        choices=list(EXCEL_BACKENDS),
+        default=list(EXCEL_BACKENDS),
+    )
+    parser.add_argument(
+        "--max-files",
+        type=int,
+        default=20,
+        help="Quantidade máxima de arquivos lidos por formato (padrão: 20; 0 usa todos).",
+    )
+    parser.add_argument(
+        "--repetitions",
+        type=int,
+        default=3,
+        help="Quantidade de leituras medidas de cada backend (padrão: 3).",
+    )
+    parser.add_argument(
+        "--output",
+        default=os.path.join("data", "linkedin", "clean", "excel_backends.json"),
+        help="JSON com os backends escolhidos, lido pela opção excel_backends das engines.",
+    )
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.raw_directory):
+        parser.error(f"diretório de dados brutos não encontrado: {args.raw_directory}")
+    if args.repetitions < 1:
+        parser.error("--repetitions deve ser pelo menos 1")
+
+    rows = []
+    for library in args.libraries:
+        rows.extend(
+            calibrate_library(
+                library, args.raw_directory, args.max_files, args.repetitions
+            )
+        )
+
+    selected = select_backends(rows)
+    print_calibration(rows, selected)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(
+            {
+                **selected,
+                "calibration": {
+                    "raw_directory": args.raw_directory,
+                    "created_at": datetime.now().isoformat(timespec="seconds"),
+                    "repetitions": args.repetitions,
+                    "results": rows,
+                },
+            },
+            file,
+            indent=2,
+        )
+    print()
+    print(f"Excel backends saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
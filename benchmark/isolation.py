@@ -0,0 +1,89 @@
+import multiprocessing
+import os
+import traceback
+
+
+def run_isolated(function, *args, env_vars=None):
+    """
+    Executa uma função em um processo novo (spawn) e recebe o retorno por um pipe.
+
+    O processo filho começa com um interpretador limpo: sem imports aquecidos, sem o heap
+    fragmentado e sem o estado do alocador deixados por engines executadas antes. O
+    cache de páginas do sistema operacional continua compartilhado.
+
+    Parâmetros:
+    function (function): Função definida no nível de um módulo, para poder ser enviada ao processo filho.
+    *args: Parâmetros da função, que também precisam poder ser serializados (pickle).
+    env_vars (dict): Variáveis de ambiente do processo filho (ex.: POLARS_MAX_THREADS), definidas antes de qualquer import.
+
+    Retorno:
+    object: O retorno da função no processo filho.
+    """
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=isolated_worker, args=(sender, function, args))
+
+    # o processo filho herda o os.environ do momento do start
+    previous_env_vars = {name: os.environ.get(name) for name in env_vars or {}}
+    os.environ.update({name: str(value) for name, value in (env_vars or {}).items()})
+    try:
+        process.start()
+    finally:
+        for name, value in previous_env_vars.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    sender.close()
+
+    # o retorno é lido antes do join, para o filho não travar com um pipe cheio
+    try:
+        status, payload = receiver.recv()
+    except EOFError:
+        process.join()
+        raise RuntimeError(
+            f"O processo isolado terminou sem enviar o resultado (exit code {process.exitcode})."
+        )
+    finally:
+        receiver.close()
+
+    process.join()
+    if status == "error":
+        raise RuntimeError(f"Falha no processo isolado:\n{payload}")
+    return payload
+
+
+def isolated_worker(connection, function, args):
+    """
+    Ponto de entrada do processo filho: executa a função e envia o resultado pelo pipe.
+
+    Parâmetros:
+    connection (Connection): Ponta de escrita do pipe.
+    function (function): Função a ser executada.
+    args (tuple): Parâmetros da função.
+    """
+    try:
+        result = ("ok", function(*args))
+    except BaseException:
+        result = ("error", traceback.format_exc())
+
+    connection.send(result)
+    connection.close()
+
+
+def run_harness(create_harness):
+    """
+    Cria um harness, executa o ETL uma vez e devolve as métricas.
+
+    Parâmetros:
+    create_harness (function): Função sem parâmetros que cria um harness (ex.: functools.partial de EtlLinkedin).
+
+    Retorno:
+    dict: engine_metrics (linha do engines.csv) e step_samples (amostras por etapa) do harness.
+    """
+    harness = create_harness()
+    harness.run_etl()
+    return {
+        "engine_metrics": harness.engine_metrics,
+        "step_samples": harness.step_samples,
+    }
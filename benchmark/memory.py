@@ -0,0 +1,214 @@
+import gc
+import sys
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROC_STATUS = "/proc/self/status"
+PROC_CLEAR_REFS = "/proc/self/clear_refs"
+
+
+def read_proc_status_bytes(field):
+    """
+    Lê um campo de memória (ex.: VmRSS, VmHWM) de /proc/self/status.
+
+    Parâmetros:
+    field (str): Nome do campo.
+
+    Retorno:
+    int: Valor em bytes, ou None se o arquivo ou o campo não existirem.
+    """
+    try:
+        with open(PROC_STATUS, "r", encoding="utf-8") as file:
+            for line in file:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def reset_peak_rss():
+    """
+    Zera o pico de RSS do processo (VmHWM), escrevendo 5 em /proc/self/clear_refs.
+
+    Retorno:
+    bool: True se o pico foi zerado (Linux), False caso contrário.
+    """
+    try:
+        with open(PROC_CLEAR_REFS, "w", encoding="utf-8") as file:
+            file.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def max_rss_bytes():
+    """
+    Pico de RSS do processo desde o início, via getrusage (sem zerar).
+
+    Retorno:
+    int: Pico em bytes, ou None se resource não estiver disponível.
+    """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def gc_collections():
+    """
+    Total de coletas do garbage collector, somando as três gerações.
+
+    Retorno:
+    int: Quantidade de coletas desde o início do processo.
+    """
+    return sum(generation["collections"] for generation in gc.get_stats())
+
+
+class MemoryProbe:
+    """
+    Sonda de memória das etapas do ETL, usada pelo decorator timer.
+
+    Para cada etapa registra:
+    - peak_rss_delta_bytes: pico de RSS durante a etapa menos o RSS no início. No Linux o
+      pico (VmHWM) é zerado no início da etapa; nos demais sistemas usa-se o ru_maxrss,
+      que só acusa a etapa quando ela supera o maior pico anterior do processo.
+    - tracemalloc_peak_bytes: pico de memória alocada pelo Python durante a etapa, acima
+      do que já estava alocado no início.
+    - allocated_blocks_delta: variação de blocos alocados pelo Python (sys.getallocatedblocks).
+    - gc_collections: coletas do garbage collector durante a etapa.
+
+    A memória de processos filhos (ex.: extraction_workers > 1) não entra na conta, e o
+    tracemalloc deixa as etapas mais lentas, por isso os tempos medidos com a sonda não
+    devem ser comparados com os tempos medidos sem ela.
+
+    As medições podem ser aninhadas (ex.: total_etl_time envolve as etapas): como zerar
+    os picos apagaria os picos da medição externa, os picos vistos pelas medições internas
+    são repassados às externas.
+    """
+
+    def __init__(self, trace_python_allocations=True):
+        """
+        Inicializa a sonda.
+
+        Parâmetros:
+        trace_python_allocations (bool): Se True, liga o tracemalloc durante as etapas para medir o pico de alocações do Python.
+        """
+        self.trace_python_allocations = trace_python_allocations
+        self.active = []
+        self.started_tracing = False
+
+    def read_peaks(self):
+        """
+        Lê os picos atuais de RSS e do tracemalloc.
+
+        Retorno:
+        tuple: (pico de RSS em bytes, pico do tracemalloc em bytes), com None no que não estiver disponível.
+        """
+        peak_rss = read_proc_status_bytes("VmHWM")
+        if peak_rss is None:
+            peak_rss = max_rss_bytes()
+
+        peak_traced = None
+        if tracemalloc.is_tracing():
+            peak_traced = tracemalloc.get_traced_memory()[1]
+
+        return peak_rss, peak_traced
+
+    def fold_peaks_into_active(self):
+        """
+        Repassa os picos atuais às medições abertas, antes que sejam zerados.
+        """
+        peak_rss, peak_traced = self.read_peaks()
+        for state in self.active:
+            state["peak_rss"] = max_or_none(state["peak_rss"], peak_rss)
+            state["peak_traced"] = max_or_none(state["peak_traced"], peak_traced)
+
+    def start(self):
+        """
+        Abre a medição de uma etapa.
+
+        Retorno:
+        dict: Estado da medição, a ser passado para stop.
+        """
+        self.fold_peaks_into_active()
+
+        if self.trace_python_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+
+        state = {
+            "rss_start": read_proc_status_bytes("VmRSS"),
+            "peak_rss_reset": reset_peak_rss(),
+            "peak_rss": None,
+            "traced_start": None,
+            "peak_traced": None,
+            "blocks_start": sys.getallocatedblocks(),
+            "gc_start": gc_collections(),
+        }
+        if state["rss_start"] is None:
+            state["rss_start"] = max_rss_bytes()
+
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            state["traced_start"] = tracemalloc.get_traced_memory()[0]
+
+        self.active.append(state)
+        return state
+
+    def stop(self, state):
+        """
+        Fecha a medição de uma etapa.
+
+        Parâmetros:
+        state (dict): Estado retornado por start.
+
+        Retorno:
+        dict: Métricas de memória da etapa.
+        """
+        self.fold_peaks_into_active()
+        self.active.remove(state)
+
+        if self.started_tracing and not self.active:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+        measurements = {
+            "peak_rss_delta_bytes": None,
+            "tracemalloc_peak_bytes": None,
+            "allocated_blocks_delta": sys.getallocatedblocks() - state["blocks_start"],
+            "gc_collections": gc_collections() - state["gc_start"],
+        }
+        if state["peak_rss"] is not None and state["rss_start"] is not None:
+            measurements["peak_rss_delta_bytes"] = max(
+                state["peak_rss"] - state["rss_start"], 0
+            )
+        if state["peak_traced"] is not None:
+            measurements["tracemalloc_peak_bytes"] = (
+                state["peak_traced"] - state["traced_start"]
+            )
+
+        return measurements
+
+
+def max_or_none(current, value):
+    """
+    Maior entre dois valores, ignorando None.
+
+    Parâmetros:
+    current (int): Valor atual, ou None.
+    value (int): Novo valor, ou None.
+
+    Retorno:
+    int: O maior valor, ou None se ambos forem None.
+    """
+    if current is None:
+        return value
+    if value is None:
+        return current
+    return max(current, value)
@@ -0,0 +1,111 @@
+import os
+import platform
+import subprocess
+import sys
+from importlib import metadata
+
+# Bibliotecas cujas versões mudam os resultados do benchmark
+TRACKED_LIBRARIES = [
+    "pandas",
+    "polars",
+    "duckdb",
+    "numpy",
+    "pyarrow",
+    "openpyxl",
+    "xlrd",
+    "xlsx2csv",
+]
+
+
+def cpu_model():
+    """
+    Nome do processador, lido de /proc/cpuinfo quando disponível.
+
+    Retorno:
+    str: Modelo do processador, ou o que o módulo platform informar.
+    """
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as file:
+            for line in file:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or None
+
+
+def total_memory_bytes():
+    """
+    Memória física total da máquina.
+
+    Retorno:
+    int: Memória em bytes, ou None se o sistema não informar (ex.: Windows).
+    """
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def host_info():
+    """
+    Dados da máquina que executa o benchmark.
+
+    Retorno:
+    dict: Nome da máquina, sistema, modelo e quantidade de núcleos do processador, memória total e versão do Python.
+    """
+    return {
+        "hostname": platform.node(),
+        "platform": platform.platform(),
+        "cpu_model": cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "memory_bytes": total_memory_bytes(),
+        "python_version": sys.version.split()[0],
+    }
+
+
+def library_versions():
+    """
+    Versões instaladas das bibliotecas usadas pelas engines.
+
+    Retorno:
+    dict: Dicionário {biblioteca: versão}, com None para as que não estiverem instaladas.
+    """
+    versions = {}
+    for library in TRACKED_LIBRARIES:
+        try:
+            versions[library] = metadata.version(library)
+        except metadata.PackageNotFoundError:
+            versions[library] = None
+    return versions
+
+
+def git_commit(directory="."):
+    """
+    Commit atual do repositório, marcado com -dirty se houver alterações não commitadas.
+
+    Parâmetros:
+    directory (str): Diretório dentro do repositório.
+
+    Retorno:
+    str: Hash do commit, ou None se o git não estiver disponível.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=directory,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=directory,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return f"{commit}-dirty" if status else commit
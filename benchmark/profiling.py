@@ -0,0 +1,186 @@
+import cProfile
+import os
+import sys
+import threading
+from collections import Counter
+
+# Modos de perfil: cprofile (determinístico, grava .pstats) ou sampling (amostragem da
+# pilha, grava pilhas colapsadas prontas para flamegraph)
+PROFILE_MODES = ("cprofile", "sampling")
+
+
+def frame_label(frame):
+    """
+    Nome de um frame no formato das pilhas colapsadas.
+
+    A linha é a que está em execução no frame, e não a da definição da função, para que
+    chamadas a código nativo (ex.: con.execute de cada consulta SQL) apareçam separadas.
+
+    Parâmetros:
+    frame (frame): Frame da pilha de chamadas.
+
+    Retorno:
+    str: Função, arquivo e linha em execução (ex.: register_dataframe_in_duckdb (etl_linkedin_duckdb.py:439)).
+    """
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def stack_depth(frame):
+    """
+    Quantidade de frames de uma pilha, do frame informado até a raiz.
+
+    Parâmetros:
+    frame (frame): Frame mais interno.
+
+    Retorno:
+    int: Profundidade da pilha.
+    """
+    depth = 0
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+
+class StackSampler(threading.Thread):
+    """
+    Thread que amostra, em intervalos fixos, a pilha de chamadas de outra thread.
+
+    As pilhas são contadas já colapsadas (frames separados por ';', da raiz para a folha),
+    sem os frames externos que estavam na pilha quando a amostragem começou.
+    """
+
+    def __init__(self, thread_id, skipped_frames, interval):
+        """
+        Inicializa o amostrador.
+
+        Parâmetros:
+        thread_id (int): Identificador da thread amostrada.
+        skipped_frames (int): Quantidade de frames externos descartados de cada pilha.
+        interval (float): Intervalo entre amostras, em segundos.
+        """
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.skipped_frames = skipped_frames
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame))
+                frame = frame.f_back
+            stack = stack[: len(stack) - self.skipped_frames]
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        """
+        Para a amostragem e espera a thread terminar.
+
+        Retorno:
+        Counter: Quantidade de amostras por pilha colapsada.
+        """
+        self.stopped.set()
+        self.join()
+        return self.stacks
+
+
+class StepProfiler:
+    """
+    Perfil das etapas do ETL, gravado em um arquivo por execução de etapa.
+
+    No modo cprofile o perfil é determinístico (cProfile) e vai para um arquivo .pstats,
+    que pode ser lido com pstats ou snakeviz. No modo sampling a pilha da thread que executa
+    a etapa é amostrada por uma thread auxiliar e vai para um arquivo .collapsed (uma pilha
+    por linha, seguida da quantidade de amostras), aceito por flamegraph.pl e speedscope.
+    Os dois modos deixam as etapas mais lentas; os tempos medidos com perfil não devem ser
+    comparados com os medidos sem.
+    """
+
+    def __init__(self, mode="sampling", directory="profiles", prefix="", interval=0.005):
+        """
+        Inicializa o perfilador.
+
+        Parâmetros:
+        mode (str): cprofile ou sampling.
+        directory (str): Diretório onde os perfis são gravados.
+        prefix (str): Prefixo dos arquivos (ex.: duckdb_6y), seguido do nome da etapa.
+        interval (float): Intervalo entre amostras do modo sampling, em segundos.
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(
+                f"Modo de perfil inválido: {mode}. Use um de {list(PROFILE_MODES)}."
+            )
+        self.mode = mode
+        self.directory = directory
+        self.prefix = prefix
+        self.interval = interval
+
+    def start(self):
+        """
+        Começa o perfil da etapa que vai ser executada pela thread atual.
+
+        Retorno:
+        object: Estado repassado a stop.
+        """
+        if self.mode == "cprofile":
+            profile = cProfile.Profile()
+            profile.enable()
+            return profile
+
+        # os frames de quem chamou start ficam de fora, a pilha começa na etapa
+        sampler = StackSampler(
+            threading.get_ident(), stack_depth(sys._getframe(1)), self.interval
+        )
+        sampler.start()
+        return sampler
+
+    def stop(self, state):
+        """
+        Encerra o perfil.
+
+        Parâmetros:
+        state (object): Estado gerado por start.
+
+        Retorno:
+        object: O perfil coletado (cProfile.Profile ou Counter de pilhas colapsadas).
+        """
+        if self.mode == "cprofile":
+            state.disable()
+            return state
+        return state.stop()
+
+    def save(self, profile, step):
+        """
+        Grava o perfil de uma etapa em um arquivo novo, sem sobrescrever os das execuções anteriores.
+
+        Parâmetros:
+        profile (object): Perfil retornado por stop.
+        step (str): Nome da etapa.
+
+        Retorno:
+        str: Caminho do arquivo gravado.
+        """
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+
+        extension = "pstats" if self.mode == "cprofile" else "collapsed"
+        name = f"{self.prefix}_{step}" if self.prefix else step
+        index = 1
+        path = os.path.join(self.directory, f"{name}_{index}.{extension}")
+        while os.path.exists(path):
+            index += 1
+            path = os.path.join(self.directory, f"{name}_{index}.{extension}")
+
+        if self.mode == "cprofile":
+            profile.dump_stats(path)
+        else:
+            with open(path, "w", encoding="utf-8") as file:
+                for stack, count in sorted(profile.items()):
+                    file.write(f"{stack} {count}\n")
+        return path
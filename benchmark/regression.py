@@ -0,0 +1,234 @@
+import argparse
+import math
+import os
+import statistics
+import sys
+
+from benchmark.stats import t_critical_95, welch_t_test
+from benchmark.store import MetricsStore
+
+
+def compare_step(baseline_ns, current_ns, threshold, min_delta_s):
+    """
+    Compara as amostras de uma etapa entre a referência e a execução atual.
+
+    A etapa regride quando a mediana piora mais que threshold (relativo) e mais que
+    min_delta_s (absoluto) e o teste t de Welch confirma que a média atual é maior com 95%
+    de confiança. Sem repetições suficientes para o teste (menos de 2 amostras de um dos
+    lados), a decisão usa apenas os limites, e a linha é marcada como não testada.
+
+    Parâmetros:
+    baseline_ns (list): Tempos da referência, em nanossegundos.
+    current_ns (list): Tempos da execução atual, em nanossegundos.
+    threshold (float): Piora relativa tolerada da mediana (ex.: 0.1 para 10%).
+    min_delta_s (float): Piora absoluta mínima da mediana, em segundos, para ser considerada.
+
+    Retorno:
+    dict: Medianas, variação relativa, estatística t e status (ok, regressed, improved).
+    """
+    baseline_median = statistics.median(baseline_ns) / 1e9
+    current_median = statistics.median(current_ns) / 1e9
+    delta = current_median - baseline_median
+    change = delta / baseline_median if baseline_median else math.inf
+
+    test = welch_t_test(baseline_ns, current_ns)
+    if test is None:
+        t = None
+        significant = True
+    else:
+        t, degrees_of_freedom = test
+        critical = t_critical_95(max(1, math.floor(degrees_of_freedom)))
+        significant = abs(t) > critical
+
+    exceeds = abs(change) > threshold and abs(delta) > min_delta_s
+    if exceeds and significant and delta > 0:
+        status = "regressed"
+    elif exceeds and significant and delta < 0:
+        status = "improved"
+    else:
+        status = "ok"
+
+    return {
+        "baseline_n": len(baseline_ns),
+        "current_n": len(current_ns),
+        "baseline_median_s": baseline_median,
+        "current_median_s": current_median,
+        "change": change,
+        "t": t,
+        "tested": test is not None,
+        "status": status,
+    }
+
+
+def compare_runs(baseline_samples, current_samples, threshold=0.1, min_delta_s=0.005):
+    """
+    Compara duas execuções etapa a etapa, por método, ambiente, engine, threads e workers.
+
+    Parâmetros:
+    baseline_samples (dict): Amostras da referência, no formato de MetricsStore.run_samples.
+    current_samples (dict): Amostras da execução atual, no mesmo formato.
+    threshold (float): Piora relativa tolerada da mediana.
+    min_delta_s (float): Piora absoluta mínima da mediana, em segundos.
+
+    Retorno:
+    list: Uma linha por etapa presente em alguma das execuções. Etapas que só existem de um lado têm status missing ou new.
+    """
+    rows = []
+    keys = sorted(
+        set(baseline_samples) | set(current_samples),
+        key=lambda key: tuple("" if value is None else str(value) for value in key),
+    )
+    for key in keys:
+        method, environment, engine, threads, workers, step = key
+        row = {
+            "method": method,
+            "environment": environment,
+            "engine": engine,
+            "threads": threads,
+            "workers": workers,
+            "step": step,
+        }
+        if key not in current_samples:
+            row["status"] = "missing"
+        elif key not in baseline_samples:
+            row["status"] = "new"
+        else:
+            row.update(
+                compare_step(
+                    baseline_samples[key], current_samples[key], threshold, min_delta_s
+                )
+            )
+        rows.append(row)
+
+    return rows
+
+
+def print_comparison(rows):
+    """
+    Mostra a comparação em uma tabela de texto.
+
+    Parâmetros:
+    rows (list): Linhas geradas por compare_runs.
+    """
+    print(
+        f"{'method':<6} {'env':<6} {'engine':<8} {'thr':>3} {'wrk':>3} {'step':<36} "
+        f"{'base_s':>9} {'curr_s':>9} {'change':>8} {'t':>7}  status"
+    )
+    for row in rows:
+        if "change" in row:
+            medians = f"{row['baseline_median_s']:>9.4f} {row['current_median_s']:>9.4f}"
+            change = f"{row['change']:>+8.1%}"
+            t = f"{row['t']:>7.2f}" if row["tested"] else f"{'n<2':>7}"
+        else:
+            medians = f"{'-':>9} {'-':>9}"
+            change = f"{'-':>8}"
+            t = f"{'-':>7}"
+        print(
+            f"{row['method']:<6} {row['environment']:<6} {row['engine']:<8} "
+            f"{row['threads'] or '-':>3} {row['workers'] or '-':>3} {row['step']:<36} "
+            f"{medians} {change} {t}  {row['status']}"
+        )
+
+
+def build_parser():
+    """
+    Cria o parser de argumentos da comparação.
+
+    Retorno:
+    argparse.ArgumentParser: Parser configurado.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmark.regression",
+        description=(
+            "Compara uma execução do benchmark com uma execução de referência e termina com "
+            "código 1 se alguma etapa regredir."
+        ),
+    )
+    parser.add_argument(
+        "--baseline",
+        required=True,
+        help="Nome (--label) ou run_id da execução de referência.",
+    )
+    parser.add_argument(
+        "--run",
+        help="Nome ou run_id da execução comparada (padrão: a execução benchmark mais recente).",
+    )
+    parser.add_argument(
+        "--store",
+        default=os.path.join("data", "linkedin", "clean", "metrics.sqlite"),
+        help="Banco SQLite de métricas.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Piora relativa tolerada da mediana (padrão: 0.1, ou seja, 10%%).",
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=0.005,
+        help="Piora absoluta mínima da mediana, em segundos (padrão: 0.005).",
+    )
+    parser.add_argument(
+        "--fail-on-missing",
+        action="store_true",
+        help="Também falha se uma etapa da referência não existir na execução comparada.",
+    )
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.store):
+        parser.error(f"banco de métricas não encontrado: {args.store}")
+
+    store = MetricsStore(args.store)
+    try:
+        baseline = store.find_run(args.baseline)
+        if baseline is None:
+            parser.error(f"execução de referência não encontrada: {args.baseline}")
+
+        if args.run:
+            current = store.find_run(args.run)
+        else:
+            current = store.latest_run(exclude_run_id=baseline["run_id"])
+        if current is None:
+            parser.error("nenhuma execução para comparar com a referência")
+
+        rows = compare_runs(
+            store.run_samples(baseline["run_id"]),
+            store.run_samples(current["run_id"]),
+            args.threshold,
+            args.min_delta,
+        )
+    finally:
+        store.close()
+
+    print(
+        f"Baseline {baseline['run_id']} ({baseline['label'] or '-'}, {baseline['created_at']}, "
+        f"commit {baseline['git_commit'] or '-'})"
+    )
+    print(
+        f"Current  {current['run_id']} ({current['label'] or '-'}, {current['created_at']}, "
+        f"commit {current['git_commit'] or '-'})"
+    )
+    print()
+    print_comparison(rows)
+
+    failing = {"regressed", "missing"} if args.fail_on_missing else {"regressed"}
+    failures = [row for row in rows if row["status"] in failing]
+    print()
+    if failures:
+        print(
+            f"{len(failures)} step(s) failed the gate: regressed beyond {args.threshold:.0%} "
+            f"(and {args.min_delta}s)"
+        )
+        sys.exit(1)
+    print(f"No step regressed beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROC_IO = "/proc/self/io"
+
+# Campos de /proc/self/io e os nomes das métricas correspondentes
+PROC_IO_METRICS = {
+    "rchar": "io_read_bytes",
+    "wchar": "io_write_bytes",
+    "syscr": "read_syscalls",
+    "syscw": "write_syscalls",
+    "read_bytes": "disk_read_bytes",
+    "write_bytes": "disk_write_bytes",
+}
+
+
+def read_proc_io():
+    """
+    Lê os contadores de I/O do processo em /proc/self/io.
+
+    Retorno:
+    dict: Dicionário {campo: valor} (ex.: rchar, write_bytes), ou None se o arquivo não existir (fora do Linux).
+    """
+    try:
+        with open(PROC_IO, "r", encoding="utf-8") as file:
+            return {
+                field: int(value)
+                for field, value in (line.split(":") for line in file if ":" in line)
+            }
+    except OSError:
+        return None
+
+
+def read_rusage():
+    """
+    Soma o uso de recursos do processo e dos processos filhos já encerrados.
+
+    Os filhos entram na conta para que as etapas com pool de processos (ex.:
+    extraction_workers > 1) não pareçam ociosas: o pool é encerrado dentro da etapa.
+
+    Retorno:
+    dict: Tempo de CPU de usuário e de sistema (s) e trocas de contexto voluntárias e involuntárias, ou None sem o módulo resource.
+    """
+    if resource is None:
+        return None
+
+    usages = [
+        resource.getrusage(resource.RUSAGE_SELF),
+        resource.getrusage(resource.RUSAGE_CHILDREN),
+    ]
+    return {
+        "user_cpu_s": sum(usage.ru_utime for usage in usages),
+        "system_cpu_s": sum(usage.ru_stime for usage in usages),
+        "voluntary_context_switches": sum(usage.ru_nvcsw for usage in usages),
+        "involuntary_context_switches": sum(usage.ru_nivcsw for usage in usages),
+    }
+
+
+class ResourceProbe:
+    """
+    Sonda de CPU e I/O das etapas do ETL, usada pelo decorator timer.
+
+    Para cada etapa registra, a partir de resource.getrusage (processo e filhos encerrados):
+    - user_cpu_s e system_cpu_s: tempo de CPU de usuário e de sistema, somando todas as
+      threads (DuckDB e Polars usam várias);
+    - cpu_utilization: (user_cpu_s + system_cpu_s) / tempo decorrido. Perto de 1 indica uma
+      etapa limitada por CPU em uma thread, bem abaixo de 1 uma etapa que espera I/O e
+      acima de 1 uma etapa paralela;
+    - voluntary_context_switches e involuntary_context_switches: as voluntárias crescem
+      quando a etapa bloqueia esperando I/O, as involuntárias quando disputa CPU.
+
+    E, a partir de /proc/self/io (só no Linux):
+    - io_read_bytes e io_write_bytes: bytes lidos e gravados por chamadas de sistema,
+      incluindo o que veio do cache de páginas;
+    - read_syscalls e write_syscalls: quantidade dessas chamadas (muitos arquivos pequenos
+      aparecem aqui);
+    - disk_read_bytes e disk_write_bytes: bytes que de fato foram ou irão para o disco.
+
+    As métricas indisponíveis no sistema ficam como None. A sonda é barata (uma chamada de
+    getrusage e a leitura de um arquivo pequeno) e pode ficar sempre ligada.
+    """
+
+    def start(self):
+        """
+        Abre a medição de uma etapa.
+
+        Retorno:
+        dict: Estado da medição, a ser passado para stop.
+        """
+        return {
+            "rusage": read_rusage(),
+            "io": read_proc_io(),
+            "start_time": time.perf_counter(),
+        }
+
+    def stop(self, state):
+        """
+        Fecha a medição de uma etapa.
+
+        Parâmetros:
+        state (dict): Estado retornado por start.
+
+        Retorno:
+        dict: Métricas de CPU e I/O da etapa.
+        """
+        elapsed_s = time.perf_counter() - state["start_time"]
+        rusage = read_rusage()
+        io = read_proc_io()
+
+        measurements = {}
+        for metric in (
+            "user_cpu_s",
+            "system_cpu_s",
+            "voluntary_context_switches",
+            "involuntary_context_switches",
+        ):
+            measurements[metric] = (
+                rusage[metric] - state["rusage"][metric] if rusage is not None else None
+            )
+        for metric in ("user_cpu_s", "system_cpu_s"):
+            if measurements[metric] is not None:
+                measurements[metric] = round(measurements[metric], 6)
+
+        measurements["cpu_utilization"] = None
+        if rusage is not None and elapsed_s:
+            measurements["cpu_utilization"] = round(
+                (measurements["user_cpu_s"] + measurements["system_cpu_s"]) / elapsed_s,
+                3,
+            )
+
+        for field, metric in PROC_IO_METRICS.items():
+            measurements[metric] = None
+            if io is not None and field in io and field in state["io"]:
+                measurements[metric] = io[field] - state["io"][field]
+
+        return measurements
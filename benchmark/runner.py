@@ -0,0 +1,232 @@
+import gc
+import os
+
+import pandas as pd
+
+from benchmark.isolation import run_isolated
+from benchmark.stats import percentile, summarize_samples
+
+
+def append_to_csv(rows, csv_file):
+    """
+    Acrescenta linhas a um arquivo CSV, escrevendo o cabeçalho só na criação do arquivo.
+
+    Se as linhas trouxerem colunas que o arquivo ainda não tem (ex.: métricas de memória
+    ligadas depois), o arquivo é reescrito com as colunas novas no fim, para que as
+    linhas antigas e novas continuem alinhadas ao cabeçalho.
+
+    Parâmetros:
+    rows (list): Lista de dicionários a serem gravados.
+    csv_file (str): Caminho do arquivo CSV.
+    """
+    if not rows:
+        return
+
+    directory = os.path.dirname(csv_file)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    new_rows = pd.DataFrame(rows)
+    if not os.path.isfile(csv_file):
+        new_rows.to_csv(csv_file, index=False)
+        return
+
+    columns = list(pd.read_csv(csv_file, nrows=0).columns)
+    missing_columns = [column for column in new_rows.columns if column not in columns]
+    if missing_columns:
+        existing_rows = pd.read_csv(csv_file)
+        pd.concat([existing_rows, new_rows], ignore_index=True).to_csv(
+            csv_file, index=False
+        )
+    else:
+        new_rows.reindex(columns=columns).to_csv(
+            csv_file, mode="a", index=False, header=False
+        )
+
+
+def collect_samples(step_samples, context, repetition):
+    """
+    Converte as amostras de um harness em linhas de amostras brutas.
+
+    Parâmetros:
+    step_samples (dict): Amostras por etapa de um harness já executado (harness.step_samples).
+    context (dict): Identificação da célula (ex.: método, ambiente e engine).
+    repetition (int): Número da repetição medida.
+
+    Retorno:
+    list: Uma linha por amostra, com o contexto, a repetição, a etapa, o tempo em nanossegundos e as medições das sondas.
+    """
+    return [
+        {**context, "repetition": repetition, "step": step, **sample}
+        for step, samples in step_samples.items()
+        for sample in samples
+    ]
+
+
+def summarize_benchmark(samples, context):
+    """
+    Resume as amostras brutas por etapa.
+
+    Parâmetros:
+    samples (list): Linhas de amostras, geradas por collect_samples.
+    context (dict): Identificação da célula.
+
+    Retorno:
+    list: Uma linha por etapa, com o contexto, as estatísticas de summarize_samples e a mediana e o máximo de cada medição das sondas.
+    """
+    samples_by_step = {}
+    for sample in samples:
+        samples_by_step.setdefault(sample["step"], []).append(sample)
+
+    summary = []
+    for step, step_samples in samples_by_step.items():
+        row = {
+            **context,
+            "step": step,
+            **summarize_samples([sample["elapsed_ns"] for sample in step_samples]),
+        }
+        row.update(summarize_measurements(step_samples, context))
+        summary.append(row)
+
+    return summary
+
+
+def summarize_measurements(step_samples, context):
+    """
+    Resume as medições das sondas (tudo o que não é tempo nem contexto) das amostras de uma etapa.
+
+    Parâmetros:
+    step_samples (list): Amostras de uma etapa, geradas por collect_samples.
+    context (dict): Identificação da célula, cujas chaves não são medições.
+
+    Retorno:
+    dict: Mediana e máximo de cada medição (ex.: peak_rss_delta_bytes_median).
+    """
+    ignored = {*context, "repetition", "step", "elapsed_ns"}
+    values_by_metric = {}
+    for sample in step_samples:
+        for metric, value in sample.items():
+            if metric in ignored or value is None:
+                continue
+            values_by_metric.setdefault(metric, []).append(value)
+
+    summary = {}
+    for metric, values in values_by_metric.items():
+        summary[f"{metric}_median"] = percentile(values, 50)
+        summary[f"{metric}_max"] = max(values)
+    return summary
+
+
+def measure_benchmark(create_harness, context, warmup=1, repetitions=5):
+    """
+    Executa as execuções de aquecimento e as repetições medidas de uma célula.
+
+    Parâmetros:
+    create_harness (function): Função sem parâmetros que cria um harness (EtlLinkedin) novo.
+    context (dict): Identificação da célula (ex.: método, ambiente e engine).
+    warmup (int): Quantidade de execuções de aquecimento.
+    repetitions (int): Quantidade de execuções medidas.
+
+    Retorno:
+    list: Amostras brutas das repetições medidas, geradas por collect_samples.
+    """
+    for i in range(warmup):
+        print(f"Warmup {i + 1}/{warmup}: {context}")
+        harness = create_harness()
+        harness.run_etl()
+        del harness
+        gc.collect()
+
+    samples = []
+    for repetition in range(repetitions):
+        print(f"Repetition {repetition + 1}/{repetitions}: {context}")
+        harness = create_harness()
+        harness.run_etl()
+        samples += collect_samples(harness.step_samples, context, repetition)
+        del harness
+        gc.collect()
+
+    return samples
+
+
+def benchmark_samples(
+    create_harness, context, warmup=1, repetitions=5, isolate=False, env_vars=None
+):
+    """
+    Mede uma célula do benchmark, no próprio processo ou em um processo isolado.
+
+    Parâmetros:
+    create_harness (function): Função sem parâmetros que cria um harness (EtlLinkedin) novo. Com isolate=True, precisa poder ser serializada (ex.: functools.partial).
+    context (dict): Identificação da célula (ex.: método, ambiente e engine).
+    warmup (int): Quantidade de execuções de aquecimento.
+    repetitions (int): Quantidade de execuções medidas.
+    isolate (bool): Se True, a célula inteira (aquecimento e repetições) roda em um processo novo e as amostras voltam por um pipe.
+    env_vars (dict): Variáveis de ambiente do processo isolado (ex.: POLARS_MAX_THREADS). Só valem com isolate=True.
+
+    Retorno:
+    list: Amostras brutas das repetições medidas, geradas por collect_samples.
+    """
+    if isolate:
+        return run_isolated(
+            measure_benchmark,
+            create_harness,
+            context,
+            warmup,
+            repetitions,
+            env_vars=env_vars,
+        )
+    return measure_benchmark(create_harness, context, warmup, repetitions)
+
+
+def save_benchmark(samples, context, output_directory="."):
+    """
+    Resume as amostras de uma célula e grava samples.csv e summary.csv.
+
+    Parâmetros:
+    samples (list): Amostras brutas, geradas por collect_samples.
+    context (dict): Identificação da célula.
+    output_directory (str): Diretório onde samples.csv e summary.csv são gravados.
+
+    Retorno:
+    list: Resumo por etapa, gerado por summarize_benchmark.
+    """
+    summary = summarize_benchmark(samples, context)
+
+    append_to_csv(samples, os.path.join(output_directory, "samples.csv"))
+    append_to_csv(summary, os.path.join(output_directory, "summary.csv"))
+
+    return summary
+
+
+def run_benchmark(
+    create_harness,
+    context,
+    warmup=1,
+    repetitions=5,
+    output_directory=".",
+    isolate=False,
+    env_vars=None,
+):
+    """
+    Executa uma célula do benchmark com aquecimento e repetições medidas.
+
+    Cada execução usa um harness novo. As execuções de aquecimento são descartadas e as
+    medidas são gravadas como amostras brutas em samples.csv e resumidas por etapa
+    (mediana, p95, desvio padrão e intervalo de confiança) em summary.csv.
+
+    Parâmetros:
+    create_harness (function): Função sem parâmetros que cria um harness (EtlLinkedin) novo. Com isolate=True, precisa poder ser serializada (ex.: functools.partial).
+    context (dict): Identificação da célula (ex.: método, ambiente e engine).
+    warmup (int): Quantidade de execuções de aquecimento.
+    repetitions (int): Quantidade de execuções medidas.
+    output_directory (str): Diretório onde samples.csv e summary.csv são gravados.
+    isolate (bool): Se True, a célula inteira (aquecimento e repetições) roda em um processo novo e as amostras voltam por um pipe.
+    env_vars (dict): Variáveis de ambiente do processo isolado (ex.: POLARS_MAX_THREADS). Só valem com isolate=True.
+
+    Retorno:
+    list: Resumo por etapa, gerado por summarize_benchmark.
+    """
+    samples = benchmark_samples(
+        create_harness, context, warmup, repetitions, isolate, env_vars
+    )
+    return save_benchmark(samples, context, output_directory)
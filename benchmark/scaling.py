@@ -0,0 +1,84 @@
+import os
+
+# Colunas do resumo que não identificam a célula
+SUMMARY_STATISTICS = {
+    "n",
+    "mean_s",
+    "median_s",
+    "p95_s",
+    "stddev_s",
+    "min_s",
+    "max_s",
+    "ci95_low_s",
+    "ci95_high_s",
+}
+
+
+def default_parallelism_counts(max_count=None):
+    """
+    Quantidades de threads (ou processos) de uma varredura: potências de 2 até o número de
+    núcleos, sempre incluindo o próprio número de núcleos.
+
+    Parâmetros:
+    max_count (int): Maior quantidade. Se None, usa os.cpu_count().
+
+    Retorno:
+    list: Quantidades em ordem crescente (ex.: [1, 2, 4, 6] para 6 núcleos).
+    """
+    max_count = max_count or os.cpu_count() or 1
+    counts = []
+    count = 1
+    while count < max_count:
+        counts.append(count)
+        count *= 2
+    counts.append(max_count)
+    return counts
+
+
+def scaling_curves(summary, parallelism_key):
+    """
+    Calcula speedup e eficiência por etapa a partir dos resumos de uma varredura.
+
+    As linhas são agrupadas por tudo o que identifica a célula (método, ambiente, engine,
+    etapa...) exceto a quantidade varrida. A referência de cada grupo é a menor quantidade
+    medida (normalmente 1): speedup = mediana da referência / mediana e eficiência =
+    speedup / (quantidade / quantidade da referência).
+
+    Parâmetros:
+    summary (list): Linhas de resumo geradas por summarize_benchmark, com a quantidade em parallelism_key.
+    parallelism_key (str): Coluna varrida (threads ou workers).
+
+    Retorno:
+    list: Uma linha por etapa e quantidade, com a mediana, o speedup e a eficiência.
+    """
+    groups = {}
+    for row in summary:
+        identity = tuple(
+            (key, value)
+            for key, value in row.items()
+            if key != parallelism_key
+            and key not in SUMMARY_STATISTICS
+            and not key.endswith(("_median", "_max"))
+        )
+        groups.setdefault(identity, []).append(row)
+
+    curves = []
+    for identity, rows in groups.items():
+        rows = sorted(rows, key=lambda row: row[parallelism_key])
+        reference = rows[0]
+        for row in rows:
+            speedup = reference["median_s"] / row["median_s"] if row["median_s"] else None
+            relative_count = row[parallelism_key] / reference[parallelism_key]
+            curves.append(
+                {
+                    **dict(identity),
+                    parallelism_key: row[parallelism_key],
+                    "median_s": row["median_s"],
+                    "speedup": None if speedup is None else round(speedup, 4),
+                    "efficiency": (
+                        None if speedup is None else round(speedup / relative_count, 4)
+                    ),
+                }
+            )
+
+    return curves
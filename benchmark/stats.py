@@ -0,0 +1,129 @@
+import math
+import statistics
+
+# Valores críticos bicaudais da t de Student para 95% de confiança, por graus de liberdade
+T_CRITICAL_95 = {
+    1: 12.706,
+    2: 4.303,
+    3: 3.182,
+    4: 2.776,
+    5: 2.571,
+    6: 2.447,
+    7: 2.365,
+    8: 2.306,
+    9: 2.262,
+    10: 2.228,
+    11: 2.201,
+    12: 2.179,
+    13: 2.160,
+    14: 2.145,
+    15: 2.131,
+    16: 2.120,
+    17: 2.110,
+    18: 2.101,
+    19: 2.093,
+    20: 2.086,
+    21: 2.080,
+    22: 2.074,
+    23: 2.069,
+    24: 2.064,
+    25: 2.060,
+    26: 2.056,
+    27: 2.052,
+    28: 2.048,
+    29: 2.045,
+    30: 2.042,
+}
+
+
+def percentile(values, percent):
+    """
+    Calcula um percentil com interpolação linear entre as amostras ordenadas.
+
+    Parâmetros:
+    values (list): Amostras.
+    percent (float): Percentil desejado, entre 0 e 100.
+
+    Retorno:
+    float: Valor do percentil.
+    """
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * percent / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return float(ordered[lower])
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def t_critical_95(degrees_of_freedom):
+    """
+    Retorna o valor crítico da t de Student para um intervalo de 95%.
+
+    Parâmetros:
+    degrees_of_freedom (int): Graus de liberdade (n - 1).
+
+    Retorno:
+    float: Valor crítico. Acima de 30 graus de liberdade, usa a aproximação normal.
+    """
+    return T_CRITICAL_95.get(degrees_of_freedom, 1.96)
+
+
+def summarize_samples(samples_ns):
+    """
+    Resume as amostras de tempo de uma etapa.
+
+    Parâmetros:
+    samples_ns (list): Tempos medidos, em nanossegundos.
+
+    Retorno:
+    dict: Quantidade de amostras e, em segundos, média, mediana, p95, desvio padrão, mínimo, máximo e intervalo de 95% de confiança da média.
+    """
+    samples = [sample / 1e9 for sample in samples_ns]
+    n = len(samples)
+    mean = statistics.fmean(samples)
+    stddev = statistics.stdev(samples) if n > 1 else 0.0
+    margin = t_critical_95(n - 1) * stddev / math.sqrt(n) if n > 1 else 0.0
+
+    return {
+        "n": n,
+        "mean_s": mean,
+        "median_s": statistics.median(samples),
+        "p95_s": percentile(samples, 95),
+        "stddev_s": stddev,
+        "min_s": min(samples),
+        "max_s": max(samples),
+        "ci95_low_s": mean - margin,
+        "ci95_high_s": mean + margin,
+    }
+
+
+def welch_t_test(baseline, candidate):
+    """
+    Teste t de Welch entre duas séries de amostras (variâncias possivelmente diferentes).
+
+    Parâmetros:
+    baseline (list): Amostras da referência.
+    candidate (list): Amostras comparadas.
+
+    Retorno:
+    tuple: (estatística t, graus de liberdade), com t positivo quando a média de candidate é maior. None se alguma série tiver menos de 2 amostras.
+    """
+    if len(baseline) < 2 or len(candidate) < 2:
+        return None
+
+    baseline_variance = statistics.variance(baseline) / len(baseline)
+    candidate_variance = statistics.variance(candidate) / len(candidate)
+    difference = statistics.fmean(candidate) - statistics.fmean(baseline)
+    standard_error = math.sqrt(baseline_variance + candidate_variance)
+
+    if standard_error == 0:
+        # séries sem variação: qualquer diferença é significativa
+        t = math.copysign(math.inf, difference) if difference else 0.0
+        return t, len(baseline) + len(candidate) - 2
+
+    degrees_of_freedom = (baseline_variance + candidate_variance) ** 2 / (
+        baseline_variance**2 / (len(baseline) - 1)
+        + candidate_variance**2 / (len(candidate) - 1)
+    )
+    return difference / standard_error, degrees_of_freedom
@@ -0,0 +1,262 @@
+import datetime
+import json
+import os
+import sqlite3
+import uuid
+
+from benchmark.metadata import git_commit, host_info, library_versions
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    label TEXT,
+    command TEXT,
+    git_commit TEXT,
+    host TEXT NOT NULL,
+    library_versions TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS environments (
+    run_id TEXT NOT NULL REFERENCES runs (run_id),
+    method TEXT NOT NULL,
+    environment TEXT NOT NULL,
+    metrics TEXT NOT NULL,
+    PRIMARY KEY (run_id, method, environment)
+);
+
+CREATE TABLE IF NOT EXISTS cells (
+    cell_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL REFERENCES runs (run_id),
+    method TEXT NOT NULL,
+    environment TEXT NOT NULL,
+    engine TEXT NOT NULL,
+    threads INTEGER,
+    workers INTEGER,
+    mode TEXT NOT NULL,
+    warmup INTEGER NOT NULL,
+    repetitions INTEGER NOT NULL,
+    configuration TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS samples (
+    cell_id INTEGER NOT NULL REFERENCES cells (cell_id),
+    repetition INTEGER NOT NULL,
+    step TEXT NOT NULL,
+    elapsed_ns INTEGER NOT NULL,
+    measurements TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS samples_cell ON samples (cell_id, step);
+"""
+
+# Colunas de contexto das amostras, gravadas na tabela cells e não em measurements
+CONTEXT_COLUMNS = ("method", "environment", "engine", "threads", "workers")
+
+
+class MetricsStore:
+    """
+    Armazena as métricas do benchmark em um banco SQLite.
+
+    Cada execução do benchmark (run) guarda a máquina, as versões das bibliotecas e o
+    commit do código. Dentro dela, cada célula (método, ambiente, engine, threads, workers)
+    guarda a configuração das engines e as amostras brutas de cada etapa, em formato longo,
+    de modo que mudar o conjunto de etapas ou de métricas não desalinha nada.
+    """
+
+    def __init__(self, path):
+        """
+        Abre (ou cria) o banco de métricas.
+
+        Parâmetros:
+        path (str): Caminho do arquivo SQLite.
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.path = path
+        self.con = sqlite3.connect(path)
+        self.con.row_factory = sqlite3.Row
+        self.con.executescript(SCHEMA)
+
+    def start_run(self, label=None, command=None):
+        """
+        Registra uma nova execução com os metadados da máquina e do código.
+
+        Parâmetros:
+        label (str): Nome da execução (ex.: baseline-v2), usado para encontrá-la depois.
+        command (str): Linha de comando que iniciou a execução.
+
+        Retorno:
+        str: Identificador da execução (run_id).
+        """
+        run_id = uuid.uuid4().hex
+        with self.con:
+            self.con.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                    label,
+                    command,
+                    git_commit(),
+                    json.dumps(host_info()),
+                    json.dumps(library_versions()),
+                ),
+            )
+        return run_id
+
+    def add_environment(self, run_id, method, environment, metrics):
+        """
+        Registra as métricas de um ambiente. Repetir o ambiente na mesma execução substitui o registro.
+
+        Parâmetros:
+        run_id (str): Identificador da execução.
+        method (str): Método (m1 ou m2).
+        environment (str): Ambiente (ex.: 6y).
+        metrics (dict): Métricas do ambiente.
+        """
+        with self.con:
+            self.con.execute(
+                "INSERT OR REPLACE INTO environments VALUES (?, ?, ?, ?)",
+                (run_id, method, environment, json.dumps(metrics)),
+            )
+
+    def add_cell(self, run_id, context, configuration, samples, mode, warmup=0):
+        """
+        Registra uma célula e as suas amostras.
+
+        Parâmetros:
+        run_id (str): Identificador da execução.
+        context (dict): Identificação da célula (method, environment, engine e, se houver, threads e workers).
+        configuration (dict): Configuração das engines da célula (ex.: opções do construtor).
+        samples (list): Amostras geradas por collect_samples.
+        mode (str): single (uma execução) ou benchmark (aquecimento + repetições).
+        warmup (int): Quantidade de execuções de aquecimento.
+
+        Retorno:
+        int: Identificador da célula (cell_id).
+        """
+        repetitions = len({sample["repetition"] for sample in samples})
+        ignored = set(CONTEXT_COLUMNS) | {"repetition", "step", "elapsed_ns"}
+
+        with self.con:
+            cursor = self.con.execute(
+                """
+                INSERT INTO cells (
+                    run_id, method, environment, engine, threads, workers,
+                    mode, warmup, repetitions, configuration
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    run_id,
+                    context["method"],
+                    context["environment"],
+                    context["engine"],
+                    context.get("threads"),
+                    context.get("workers"),
+                    mode,
+                    warmup,
+                    repetitions,
+                    json.dumps(configuration, default=str),
+                ),
+            )
+            cell_id = cursor.lastrowid
+            self.con.executemany(
+                "INSERT INTO samples VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        cell_id,
+                        sample["repetition"],
+                        sample["step"],
+                        sample["elapsed_ns"],
+                        json.dumps(
+                            {
+                                key: value
+                                for key, value in sample.items()
+                                if key not in ignored
+                            }
+                        ),
+                    )
+                    for sample in samples
+                ],
+            )
+        return cell_id
+
+    def find_run(self, run):
+        """
+        Encontra uma execução pelo run_id ou, se não houver, pela execução mais recente com esse nome.
+
+        Parâmetros:
+        run (str): run_id ou nome (label) da execução.
+
+        Retorno:
+        sqlite3.Row: A execução, ou None se não for encontrada.
+        """
+        return self.con.execute(
+            """
+            SELECT * FROM runs
+            WHERE run_id = ? OR label = ?
+            ORDER BY run_id = ? DESC, created_at DESC
+            LIMIT 1
+            """,
+            (run, run, run),
+        ).fetchone()
+
+    def latest_run(self, mode="benchmark", exclude_run_id=None):
+        """
+        Encontra a execução mais recente com células de um modo.
+
+        Parâmetros:
+        mode (str): Modo das células (benchmark ou single).
+        exclude_run_id (str): Execução a ignorar (ex.: a própria referência).
+
+        Retorno:
+        sqlite3.Row: A execução, ou None se não houver.
+        """
+        return self.con.execute(
+            """
+            SELECT runs.* FROM runs
+            WHERE run_id != ?
+              AND EXISTS (
+                SELECT 1 FROM cells WHERE cells.run_id = runs.run_id AND cells.mode = ?
+              )
+            ORDER BY created_at DESC
+            LIMIT 1
+            """,
+            (exclude_run_id or "", mode),
+        ).fetchone()
+
+    def run_samples(self, run_id):
+        """
+        Tempos das amostras de uma execução, agrupados por célula e etapa.
+
+        Parâmetros:
+        run_id (str): Identificador da execução.
+
+        Retorno:
+        dict: Dicionário {(method, environment, engine, threads, workers, step): [elapsed_ns, ...]}.
+        """
+        rows = self.con.execute(
+            """
+            SELECT cells.method, cells.environment, cells.engine, cells.threads,
+                   cells.workers, samples.step, samples.elapsed_ns
+            FROM samples JOIN cells USING (cell_id)
+            WHERE cells.run_id = ?
+            ORDER BY cells.cell_id, samples.repetition
+            """,
+            (run_id,),
+        ).fetchall()
+
+        samples = {}
+        for row in rows:
+            key = tuple(row)[:6]
+            samples.setdefault(key, []).append(row["elapsed_ns"])
+        return samples
+
+    def close(self):
+        """
+        Fecha a conexão com o banco.
+        """
+        self.con.close()
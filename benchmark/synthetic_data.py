@@ -0,0 +1,587 @@
+import argparse
+import calendar
+import datetime
+import io
+import os
+import random
+import re
+import zipfile
+
+from openpyxl import Workbook
+
+from engines.sheet_layout import SHEET_LAYOUT
+
+# Meses como aparecem nos diretórios das extrações (get_final_date usa os mesmos nomes)
+MONTHS_PT = [
+    "Jan",
+    "Fev",
+    "Mar",
+    "Abr",
+    "Maio",
+    "Jun",
+    "Jul",
+    "Ago",
+    "Set",
+    "Out",
+    "Nov",
+    "Dez",
+]
+
+# Diretório e extensão de cada categoria, como na exportação do LinkedIn
+CATEGORIES = {
+    "competitor": {"directory": "Concorrentes", "extension": "xlsx"},
+    "content": {"directory": "Conteúdo", "extension": "xls"},
+    "followers": {"directory": "Seguidores", "extension": "xls"},
+    "visitors": {"directory": "Visitantes", "extension": "xls"},
+}
+
+CONTENT_METRICS_HEADER = [
+    "Data",
+    "Impressões (orgânicas)",
+    "Impressões (patrocinadas)",
+    "Impressões (total)",
+    "Impressões únicas (orgânicas)",
+    "Cliques (orgânicos)",
+    "Cliques (patrocinados)",
+    "Cliques (total)",
+    "Reações (orgânicas)",
+    "Reações (patrocinadas)",
+    "Reações (total)",
+    "Comentários (orgânicos)",
+    "Comentários (patrocinados)",
+    "Comentários (total)",
+    "Compartilhamentos (orgânicos)",
+    "Compartilhamentos (patrocinados)",
+    "Compartilhamentos (total)",
+    "Taxa de engajamento (orgânica)",
+    "Taxa de engajamento (patrocinada)",
+    "Taxa de engajamento (total)",
+]
+
+CONTENT_POSTS_HEADER = [
+    "Título da publicação",
+    "Link da publicação",
+    "Tipo de publicação",
+    "Nome da campanha",
+    "Publicado por",
+    "Data",
+    "Data de início da campanha",
+    "Data de término da campanha",
+    "Público",
+    "Impressões",
+    "Visualizações (excluindo visualizações de vídeo fora do site)",
+    "Visualizações fora do site",
+    "Cliques",
+    "Taxa de cliques (CTR)",
+    "Gostei",
+    "Comentários",
+    "Compartilhamentos",
+    "Seguidores",
+    "Taxa de engajamento",
+    "Tipo de conteúdo",
+]
+
+FOLLOWERS_NEW_HEADER = [
+    "Data",
+    "Seguidores patrocinados",
+    "Seguidores orgânicos",
+    "Total de seguidores",
+]
+
+VISITORS_METRICS_HEADER = ["Data"] + [
+    f"{metric} ({device})"
+    for metric in [
+        "Visualizações de página da visão geral",
+        "Visitantes únicos da visão geral",
+        "Visualizações de página dia a dia",
+        "Visitantes únicos dia a dia",
+        "Visualizações de página de vagas",
+        "Visitantes únicos de vagas",
+        "Total de visualizações de página",
+        "Total de visitantes únicos",
+    ]
+    for device in ["computador", "dispositivos móveis", "total"]
+]
+
+# Planilhas demográficas de seguidores e visitantes: (nome da planilha, coluna do rótulo)
+DEMOGRAPHIC_SHEETS = [
+    ("Localização", "Localização"),
+    ("Função", "Função"),
+    ("Nível de experiência", "Nível de experiência"),
+    ("Setor", "Setor"),
+    ("Tamanho da empresa", "Tamanho da empresa"),
+]
+
+# Texto da linha de título das planilhas que têm título antes do cabeçalho (skiprows em
+# SHEET_LAYOUT); as demais usam o nome da planilha
+SHEET_TITLES = {"Indicadores": "Métricas agregadas"}
+
+COMPETITOR_HEADER = [
+    "Página",
+    "Total de seguidores",
+    "Novos seguidores",
+    "Total de engajamentos da publicação",
+    "Total de publicações",
+]
+
+# Carimbo fixo das entradas do zip e do docProps/core.xml, para arquivos idênticos byte a byte
+FIXED_ZIP_DATE_TIME = (2020, 1, 1, 0, 0, 0)
+FIXED_DOCUMENT_DATE = "2020-01-01T00:00:00Z"
+
+
+def format_date(date):
+    """
+    Formata uma data como na exportação do LinkedIn (mês/dia/ano).
+
+    Parâmetros:
+    date (datetime.date): Data.
+
+    Retorno:
+    str: Data no formato %m/%d/%Y.
+    """
+    return date.strftime("%m/%d/%Y")
+
+
+def extraction_final_date(year, month, extraction):
+    """
+    Data final de uma extração, seguindo a regra de get_final_date das engines:
+    a segunda extração do mês termina no último dia do mês e as demais no dia 15.
+
+    Parâmetros:
+    year (int): Ano.
+    month (int): Mês (1 a 12).
+    extraction (int): Número da extração no mês, começando em 1.
+
+    Retorno:
+    datetime.date: Data final da extração.
+    """
+    if extraction == 2:
+        return datetime.date(year, month, calendar.monthrange(year, month)[1])
+    return datetime.date(year, month, 15)
+
+
+def daily_dates(final_date, rows):
+    """
+    Datas diárias terminando na data final da extração.
+
+    Parâmetros:
+    final_date (datetime.date): Última data.
+    rows (int): Quantidade de datas.
+
+    Retorno:
+    list: Datas em ordem crescente.
+    """
+    return [final_date - datetime.timedelta(days=day) for day in range(rows)][::-1]
+
+
+def content_sheets(rng, final_date, rows, negative_rate):
+    """
+    Planilhas do arquivo de conteúdo: métricas diárias e publicações.
+
+    Parâmetros:
+    rng (random.Random): Gerador de números aleatórios do arquivo.
+    final_date (datetime.date): Data final da extração.
+    rows (int): Linhas por planilha.
+    negative_rate (float): Proporção de valores negativos em cliques, reações, comentários e compartilhamentos, que a limpeza de content_metrics substitui pela média móvel.
+
+    Retorno:
+    list: Lista de tuplas (nome da planilha, linhas).
+    """
+    dates = daily_dates(final_date, rows)
+
+    metrics = []
+    for date in dates:
+        organic_impressions = rng.randint(50, 2000)
+        sponsored_impressions = rng.randint(0, 200)
+        row = [
+            format_date(date),
+            organic_impressions,
+            sponsored_impressions,
+            organic_impressions + sponsored_impressions,
+            rng.randint(30, organic_impressions),
+        ]
+        for _ in ["clicks", "reactions", "comments", "shares"]:
+            organic = rng.randint(0, 120)
+            sponsored = rng.randint(0, 10)
+            total = organic + sponsored
+            if rng.random() < negative_rate:
+                total = -rng.randint(1, 3)
+            row += [organic, sponsored, total]
+
+        engagement = [round(rng.uniform(0, 0.2), 6) for _ in range(3)]
+        metrics.append(row + engagement)
+
+    posts = []
+    for number in range(rows):
+        impressions = rng.randint(100, 5000)
+        clicks = rng.randint(0, impressions // 10)
+        posts.append(
+            [
+                f"Publicação {number + 1}",
+                f"https://www.linkedin.com/feed/update/urn:li:activity:{rng.randint(10**18, 10**19 - 1)}",
+                "Orgânica",
+                "",
+                "SouJunior",
+                format_date(rng.choice(dates)),
+                "",
+                "",
+                "Todos os seguidores",
+                impressions,
+                rng.randint(0, impressions),
+                0,
+                clicks,
+                round(clicks / impressions, 6),
+                rng.randint(0, 300),
+                rng.randint(0, 40),
+                rng.randint(0, 30),
+                rng.randint(0, 20),
+                round(rng.uniform(0, 0.2), 6),
+                "Orgânico",
+            ]
+        )
+
+    return [
+        ("Indicadores", [CONTENT_METRICS_HEADER] + metrics),
+        ("Todas as publicações", [CONTENT_POSTS_HEADER] + posts),
+    ]
+
+
+def demographic_sheets(rng, rows, value_column):
+    """
+    Planilhas demográficas (localização, função, experiência, setor e porte da empresa).
+
+    Parâmetros:
+    rng (random.Random): Gerador de números aleatórios do arquivo.
+    rows (int): Linhas por planilha.
+    value_column (str): Nome da coluna de valores.
+
+    Retorno:
+    list: Lista de tuplas (nome da planilha, linhas).
+    """
+    return [
+        (
+            sheet_name,
+            [[label_column, value_column]]
+            + [[f"{label_column} {number + 1}", rng.randint(0, 5000)] for number in range(rows)],
+        )
+        for sheet_name, label_column in DEMOGRAPHIC_SHEETS
+    ]
+
+
+def followers_sheets(rng, final_date, rows):
+    """
+    Planilhas do arquivo de seguidores, todas com o cabeçalho na primeira linha.
+
+    Parâmetros:
+    rng (random.Random): Gerador de números aleatórios do arquivo.
+    final_date (datetime.date): Data final da extração.
+    rows (int): Linhas por planilha.
+
+    Retorno:
+    list: Lista de tuplas (nome da planilha, linhas).
+    """
+    new_followers = []
+    for date in daily_dates(final_date, rows):
+        sponsored = rng.randint(0, 5)
+        organic = rng.randint(0, 60)
+        new_followers.append([format_date(date), sponsored, organic, sponsored + organic])
+
+    return [("Novos seguidores", [FOLLOWERS_NEW_HEADER] + new_followers)] + (
+        demographic_sheets(rng, rows, "Total de seguidores")
+    )
+
+
+def visitors_sheets(rng, final_date, rows):
+    """
+    Planilhas do arquivo de visitantes, todas com o cabeçalho na primeira linha.
+
+    Parâmetros:
+    rng (random.Random): Gerador de números aleatórios do arquivo.
+    final_date (datetime.date): Data final da extração.
+    rows (int): Linhas por planilha.
+
+    Retorno:
+    list: Lista de tuplas (nome da planilha, linhas).
+    """
+    metrics = []
+    for date in daily_dates(final_date, rows):
+        row = [format_date(date)]
+        for _ in range(8):
+            desktop = rng.randint(0, 300)
+            mobile = rng.randint(0, 300)
+            row += [desktop, mobile, desktop + mobile]
+        metrics.append(row)
+
+    return [("Métricas de visitantes", [VISITORS_METRICS_HEADER] + metrics)] + (
+        demographic_sheets(rng, rows, "Total de visualizações")
+    )
+
+
+def competitor_sheets(rng, rows):
+    """
+    Planilha do arquivo de concorrentes.
+
+    Parâmetros:
+    rng (random.Random): Gerador de números aleatórios do arquivo.
+    rows (int): Linhas da planilha.
+
+    Retorno:
+    list: Lista de tuplas (nome da planilha, linhas).
+    """
+    pages = [
+        [
+            f"Página {number + 1}",
+            rng.randint(100, 100000),
+            rng.randint(0, 500),
+            rng.randint(0, 5000),
+            rng.randint(0, 60),
+        ]
+        for number in range(rows)
+    ]
+    return [("Concorrentes", [COMPETITOR_HEADER] + pages)]
+
+
+def category_sheets(category, rng, final_date, rows, negative_rate):
+    """
+    Planilhas de um arquivo, na ordem das abas, com as linhas de título antes do cabeçalho
+    definidas em SHEET_LAYOUT (as mesmas que as engines ignoram).
+
+    Parâmetros:
+    category (str): Categoria do arquivo (competitor, content, followers, visitors).
+    rng (random.Random): Gerador de números aleatórios do arquivo.
+    final_date (datetime.date): Data final da extração.
+    rows (int): Linhas por planilha.
+    negative_rate (float): Proporção de valores negativos nas métricas de conteúdo.
+
+    Retorno:
+    list: Lista de tuplas (nome da planilha, linhas).
+    """
+    if category == "content":
+        sheets = content_sheets(rng, final_date, rows, negative_rate)
+    elif category == "followers":
+        sheets = followers_sheets(rng, final_date, rows)
+    elif category == "visitors":
+        sheets = visitors_sheets(rng, final_date, rows)
+    elif category == "competitor":
+        sheets = competitor_sheets(rng, rows)
+    else:
+        raise ValueError(f"Categoria inválida: {category}")
+
+    return [
+        (
+            sheet_name,
+            [[SHEET_TITLES.get(sheet_name, sheet_name)]] * layout["skiprows"] + sheet_rows,
+        )
+        for (sheet_name, sheet_rows), layout in zip(sheets, SHEET_LAYOUT[category])
+    ]
+
+
+def write_workbook(file_path, sheets):
+    """
+    Grava as planilhas em um arquivo Excel (OOXML).
+
+    Assim como na exportação do LinkedIn, os arquivos .xls também são OOXML. Os carimbos de
+    data que o openpyxl grava (entradas do zip e data de modificação do documento) são
+    trocados por valores fixos, para que a mesma semente gere os mesmos bytes.
+
+    Parâmetros:
+    file_path (str): Caminho do arquivo.
+    sheets (list): Lista de tuplas (nome da planilha, linhas).
+    """
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for sheet_name, rows in sheets:
+        worksheet = workbook.create_sheet(sheet_name)
+        for row in rows:
+            worksheet.append(row)
+
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+
+    with zipfile.ZipFile(buffer) as source, zipfile.ZipFile(
+        file_path, "w", zipfile.ZIP_DEFLATED
+    ) as target:
+        for entry in source.infolist():
+            content = source.read(entry.filename)
+            if entry.filename == "docProps/core.xml":
+                content = re.sub(
+                    rb"(<dcterms:(?:created|modified)[^>]*>)[^<]*(</dcterms:)",
+                    rb"\g<1>" + FIXED_DOCUMENT_DATE.encode() + rb"\g<2>",
+                    content,
+                )
+            fixed_entry = zipfile.ZipInfo(entry.filename, FIXED_ZIP_DATE_TIME)
+            fixed_entry.compress_type = zipfile.ZIP_DEFLATED
+            target.writestr(fixed_entry, content)
+
+
+def write_extraction(
+    directory, category, year, month, extraction, final_date, seed, rows, negative_rate
+):
+    """
+    Gera o arquivo de uma categoria para uma extração.
+
+    O gerador de números aleatórios é semeado pela semente e pela identificação do
+    arquivo, de modo que cada arquivo não depende dos demais: o primeiro ano de um
+    ambiente de 10 anos é idêntico a um ambiente de 1 ano com a mesma semente.
+
+    Parâmetros:
+    directory (str): Diretório onde o arquivo é gravado.
+    category (str): Categoria do arquivo.
+    year (int): Ano da extração.
+    month (int): Mês da extração.
+    extraction (int): Número da extração no mês, começando em 1.
+    final_date (datetime.date): Data final da extração.
+    seed (int): Semente.
+    rows (int): Linhas por planilha.
+    negative_rate (float): Proporção de valores negativos nas métricas de conteúdo.
+
+    Retorno:
+    str: Caminho do arquivo gerado.
+    """
+    rng = random.Random(f"{seed}-{category}-{year}-{month}-{extraction}")
+    extension = CATEGORIES[category]["extension"]
+    file_path = os.path.join(
+        directory, f"soujunior_{category}_{year}{month:02d}_{extraction}.{extension}"
+    )
+
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    write_workbook(
+        file_path, category_sheets(category, rng, final_date, rows, negative_rate)
+    )
+    return file_path
+
+
+def generate_environment(
+    raw_directory,
+    years=1,
+    start_year=2020,
+    extractions_per_month=2,
+    rows_per_sheet=30,
+    seed=42,
+    negative_rate=0.05,
+):
+    """
+    Gera um ambiente sintético de dados brutos, com a árvore Categoria/Ano/Mês das extrações.
+
+    Cada extração gera quatro arquivos (concorrentes, conteúdo, seguidores e visitantes),
+    portanto o ambiente tem 4 * 12 * years * extractions_per_month arquivos. Como na rotina
+    real, a segunda extração do mês termina no último dia do mês e as demais no dia 15.
+
+    Parâmetros:
+    raw_directory (str): Diretório do ambiente (ex.: data/linkedin/raw_10y).
+    years (int): Quantidade de anos.
+    start_year (int): Primeiro ano.
+    extractions_per_month (int): Extrações por mês.
+    rows_per_sheet (int): Linhas por planilha.
+    seed (int): Semente.
+    negative_rate (float): Proporção de valores negativos nas métricas de conteúdo.
+
+    Retorno:
+    list: Caminhos dos arquivos gerados.
+    """
+    files = []
+    for category, category_info in CATEGORIES.items():
+        for year in range(start_year, start_year + years):
+            for month in range(1, 13):
+                directory = os.path.join(
+                    raw_directory,
+                    category_info["directory"],
+                    str(year),
+                    MONTHS_PT[month - 1],
+                )
+                for extraction in range(1, extractions_per_month + 1):
+                    files.append(
+                        write_extraction(
+                            directory,
+                            category,
+                            year,
+                            month,
+                            extraction,
+                            extraction_final_date(year, month, extraction),
+                            seed,
+                            rows_per_sheet,
+                            negative_rate,
+                        )
+                    )
+    return files
+
+
+def generate_unique_extraction(
+    directory,
+    final_date=datetime.date(2035, 1, 15),
+    rows_per_sheet=30,
+    seed=42,
+    negative_rate=0.05,
+):
+    """
+    Gera os quatro arquivos de uma extração única, usados pelo método 2.
+
+    Parâmetros:
+    directory (str): Diretório da extração única (ex.: data/linkedin/raw_unique_extraction).
+    final_date (datetime.date): Data final da extração. O padrão coincide com o período padrão de get_raw_unique_extraction_data (2035-Jan-1).
+    rows_per_sheet (int): Linhas por planilha.
+    seed (int): Semente.
+    negative_rate (float): Proporção de valores negativos nas métricas de conteúdo.
+
+    Retorno:
+    list: Caminhos dos arquivos gerados.
+    """
+    return [
+        write_extraction(
+            directory,
+            category,
+            final_date.year,
+            final_date.month,
+            1,
+            final_date,
+            seed,
+            rows_per_sheet,
+            negative_rate,
+        )
+        for category in CATEGORIES
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Gera um ambiente sintético de extrações do LinkedIn."
+    )
+    parser.add_argument("raw_directory", help="Diretório do ambiente (ex.: data/linkedin/raw_10y).")
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--start-year", type=int, default=2020)
+    parser.add_argument("--extractions-per-month", type=int, default=2)
+    parser.add_argument("--rows-per-sheet", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--negative-rate", type=float, default=0.05)
+    parser.add_argument(
+        "--unique-extraction-directory",
+        help="Se informado, também gera a extração única do método 2 neste diretório.",
+    )
+    args = parser.parse_args()
+
+    files = generate_environment(
+        args.raw_directory,
+        years=args.years,
+        start_year=args.start_year,
+        extractions_per_month=args.extractions_per_month,
+        rows_per_sheet=args.rows_per_sheet,
+        seed=args.seed,
+        negative_rate=args.negative_rate,
+    )
+    print(f"{len(files)} files written to {args.raw_directory}")
+
+    if args.unique_extraction_directory:
+        files = generate_unique_extraction(
+            args.unique_extraction_directory,
+            rows_per_sheet=args.rows_per_sheet,
+            seed=args.seed,
+            negative_rate=args.negative_rate,
+        )
+        print(f"{len(files)} files written to {args.unique_extraction_directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import os
+
+# Chaves que guardam o DataFrame de um registro, na ordem de preferência (o concatenado
+# vem antes das partes)
+FRAME_KEYS = ("concatenated_df", "df")
+
+
+def directory_bytes(directory):
+    """
+    Soma o tamanho dos arquivos de um diretório e dos seus subdiretórios.
+
+    Parâmetros:
+    directory (str): Caminho do diretório.
+
+    Retorno:
+    int: Tamanho total em bytes, ou 0 se o diretório não existir.
+    """
+    total = 0
+    for root, _, files in os.walk(directory):
+        for file in files:
+            try:
+                total += os.path.getsize(os.path.join(root, file))
+            except OSError:
+                # arquivo removido durante a varredura
+                pass
+    return total
+
+
+def sum_counts(counts):
+    """
+    Soma as contagens conhecidas.
+
+    Parâmetros:
+    counts (iterable): Contagens, com None para as desconhecidas.
+
+    Retorno:
+    int: A soma, ou None se nenhuma contagem for conhecida.
+    """
+    counts = [count for count in counts if count is not None]
+    return sum(counts) if counts else None
+
+
+def referenced_tables(data):
+    """
+    Nomes que podem ser tabelas do DuckDB nos dados passados entre as etapas.
+
+    No DuckDB as etapas trocam nomes de tabelas em vez de DataFrames: listas de nomes,
+    registros com db_table_name ou dicionários indexados pelo nome da tabela.
+
+    Parâmetros:
+    data (object): Entrada ou retorno de uma etapa.
+
+    Retorno:
+    set: Nomes candidatos.
+    """
+    if isinstance(data, str):
+        return {data}
+    if isinstance(data, dict):
+        if "db_table_name" in data:
+            return {data["db_table_name"]}
+        names = {key for key in data if isinstance(key, str)}
+        for value in data.values():
+            if not isinstance(value, str):
+                names |= referenced_tables(value)
+        return names
+    if isinstance(data, (list, tuple)):
+        names = set()
+        for item in data:
+            names |= referenced_tables(item)
+        return names
+    return set()
+
+
+def duckdb_table_rows(con, data):
+    """
+    Linhas das tabelas do DuckDB referenciadas pelos dados, lidas do catálogo.
+
+    O estimated_size de duckdb_tables() é a cardinalidade da tabela, exata enquanto não há
+    DELETE (as engines só criam e inserem), e evita varrer cada tabela com count(*).
+
+    Parâmetros:
+    con (duckdb.DuckDBPyConnection): Conexão da engine.
+    data (object): Entrada ou retorno de uma etapa.
+
+    Retorno:
+    dict: Dicionário {tabela: linhas}, só com os nomes que existem no catálogo.
+    """
+    names = referenced_tables(data)
+    return {
+        table_name: rows
+        for table_name, rows in con.execute(
+            "SELECT table_name, estimated_size FROM duckdb_tables()"
+        ).fetchall()
+        if table_name in names
+    }
+
+
+def count_rows(data, table_rows=None):
+    """
+    Conta as linhas dos dados passados entre as etapas, qualquer que seja a engine.
+
+    Entende DataFrames do pandas e do Polars, os registros das engines (df ou
+    concatenated_df), listas e dicionários desses registros e, com table_rows, os nomes
+    de tabelas do DuckDB. Dados sem linhas conhecidas (ex.: LazyFrames, caminhos de
+    arquivos) não são contados.
+
+    Parâmetros:
+    data (object): Entrada ou retorno de uma etapa.
+    table_rows (dict): Linhas das tabelas do DuckDB, geradas por duckdb_table_rows.
+
+    Retorno:
+    int: Quantidade de linhas, ou None se não for possível contar.
+    """
+    table_rows = table_rows or {}
+
+    # DataFrame do pandas ou do Polars
+    if hasattr(data, "shape"):
+        return data.shape[0]
+    if isinstance(data, str):
+        return table_rows.get(data)
+    if isinstance(data, dict):
+        for key in FRAME_KEYS:
+            if key in data:
+                return count_rows(data[key], table_rows)
+        if "db_table_name" in data:
+            return table_rows.get(data["db_table_name"])
+        if any(key in table_rows for key in data):
+            return sum_counts(table_rows.get(key) for key in data)
+        return sum_counts(
+            count_rows(value, table_rows)
+            for value in data.values()
+            if not isinstance(value, str)
+        )
+    if isinstance(data, (list, tuple)):
+        return sum_counts(count_rows(item, table_rows) for item in data)
+    return None
+
+
+def harness_rows(harness, data):
+    """
+    Conta as linhas dos dados de uma etapa usando a engine do harness.
+
+    Parâmetros:
+    harness (EtlLinkedin): Instância do harness que executa a etapa.
+    data (object): Entrada ou retorno da etapa.
+
+    Retorno:
+    int: Quantidade de linhas, ou None se não for possível contar.
+    """
+    con = getattr(getattr(harness, "etl", None), "con", None)
+    table_rows = duckdb_table_rows(con, data) if con is not None else None
+    return count_rows(data, table_rows)
+
+
+def start_throughput(harness, step, args):
+    """
+    Levanta o volume de entrada de uma etapa antes de ela ser executada.
+
+    As linhas de entrada são contadas antes da etapa porque algumas engines (ex.: DuckDB)
+    transformam as tabelas no lugar. Os diretórios lidos e gravados por cada etapa vêm de
+    STEP_DIRECTORIES do harness.
+
+    Parâmetros:
+    harness (EtlLinkedin): Instância do harness que executa a etapa.
+    step (str): Nome da etapa.
+    args (tuple): Parâmetros posicionais da etapa, incluindo a instância.
+
+    Retorno:
+    dict: Estado repassado a stop_throughput, ou None se a etapa não fizer parte do fluxo do harness.
+    """
+    if step not in getattr(harness, "STEPS", ()):
+        return None
+
+    input_directory, output_directory = getattr(harness, "STEP_DIRECTORIES", {}).get(
+        step, (None, None)
+    )
+    output_directory = output_directory and getattr(harness, output_directory)
+    return {
+        "rows_in": harness_rows(harness, args[1:]) if len(args) > 1 else None,
+        "input_bytes": (
+            directory_bytes(getattr(harness, input_directory)) if input_directory else None
+        ),
+        "output_directory": output_directory,
+        "output_bytes_before": (
+            directory_bytes(output_directory) if output_directory else None
+        ),
+    }
+
+
+def stop_throughput(harness, state, result, elapsed_ns):
+    """
+    Levanta o volume de saída de uma etapa e calcula as vazões.
+
+    Nas etapas que gravam arquivos, as linhas de saída são as linhas gravadas, iguais às de
+    entrada. A vazão em linhas usa as linhas de entrada (ou as de saída, na extração) e a
+    vazão em MB usa os bytes lidos e gravados em disco.
+
+    Parâmetros:
+    harness (EtlLinkedin): Instância do harness que executou a etapa.
+    state (dict): Estado gerado por start_throughput.
+    result (object): Retorno da etapa.
+    elapsed_ns (int): Tempo da etapa, em nanossegundos.
+
+    Retorno:
+    dict: rows_in, rows_out, input_bytes, output_bytes, rows_per_s e mb_per_s.
+    """
+    rows_in = state["rows_in"]
+    input_bytes = state["input_bytes"]
+    output_bytes = None
+    if state["output_directory"]:
+        output_bytes = (
+            directory_bytes(state["output_directory"]) - state["output_bytes_before"]
+        )
+        rows_out = rows_in
+    else:
+        rows_out = harness_rows(harness, result)
+
+    elapsed_s = elapsed_ns / 1e9
+    rows = rows_in if rows_in is not None else rows_out
+    disk_bytes = sum_counts([input_bytes, output_bytes])
+    return {
+        "rows_in": rows_in,
+        "rows_out": rows_out,
+        "input_bytes": input_bytes,
+        "output_bytes": output_bytes,
+        "rows_per_s": (
+            round(rows / elapsed_s, 1) if rows is not None and elapsed_s else None
+        ),
+        "mb_per_s": (
+            round(disk_bytes / 1e6 / elapsed_s, 3)
+            if disk_bytes is not None and elapsed_s
+            else None
+        ),
+    }
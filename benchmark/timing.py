@@ -0,0 +1,209 @@
+import time
+
+from benchmark.throughput import start_throughput, stop_throughput
+
+# Métricas das sondas que também vão para o engines.csv, convertidas para MB
+MEGABYTE_METRICS = (
+    "peak_rss_delta_bytes",
+    "tracemalloc_peak_bytes",
+    "input_bytes",
+    "output_bytes",
+    "io_read_bytes",
+    "io_write_bytes",
+    "disk_read_bytes",
+    "disk_write_bytes",
+)
+
+
+def timer(func):
+    """
+    Função para medir o tempo de execução de uma etapa do ETL.
+
+    O tempo é medido com time.perf_counter_ns. A amostra bruta, em nanossegundos, é
+    acumulada em step_samples da instância (uma lista por etapa, para permitir várias
+    repetições) e o valor em segundos continua indo para engine_metrics, que alimenta
+    o engines.csv. Se a instância tiver sondas em step_probes (ex.: MemoryProbe, ResourceProbe), as
+    medições delas são guardadas junto com o tempo.
+
+    Parâmetros:
+    func (function): Função a ser medida.
+
+    Retorno:
+    function: Função com o tempo de execução medido.
+    """
+
+    def wrapper(*args, **kwargs):
+        """
+        Função que mede o tempo de execução de uma função.
+
+        Parâmetros:
+        *args: Lista de parâmetros passados para a função.
+        **kwargs: Dicionário de parâmetros passados para a função.
+
+        Retorno:
+        function: Função com o tempo de execução medido.
+        """
+        result, elapsed_ns = measure_step(args[0], func.__name__, func, *args, **kwargs)
+        if elapsed_ns is not None:
+            print(f"[{args[0].engine}] {func.__name__}: {elapsed_ns / 1e9:.4f} seconds")
+        return result
+
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    return wrapper
+
+
+def measure_step(harness, step, func, *args, **kwargs):
+    """
+    Executa uma função medindo o tempo e as sondas do harness, e registra a amostra.
+
+    As sondas são abertas antes e fechadas depois do cronômetro, para que o custo delas
+    não entre no tempo da etapa. Se o harness tiver um perfilador em step_profiler, as
+    etapas do fluxo são executadas sob perfil (e ficam mais lentas); no modo streaming,
+    em que as etapas rodam uma vez por mês, o perfil cobre o total_etl_time. O volume da
+    etapa (linhas e bytes de entrada e saída, e as vazões) é levantado por fora das
+    sondas, para não entrar nas medições de memória.
+
+    Parâmetros:
+    harness (EtlLinkedin): Instância do harness que executa a etapa.
+    step (str): Nome da etapa.
+    func (function): Função a ser executada.
+    *args: Parâmetros posicionais repassados para a função.
+    **kwargs: Parâmetros nomeados repassados para a função.
+
+    Retorno:
+    tuple: (retorno da função, tempo decorrido em nanossegundos), com tempo None se a etapa ficou fora do filtro de etapas do harness.
+    """
+    selected_steps = getattr(harness, "selected_steps", None)
+    if selected_steps is not None and step not in selected_steps:
+        return func(*args, **kwargs), None
+
+    # no modo streaming cada etapa roda uma vez por mês: o tempo é somado e registrado no fim
+    streaming_elapsed_ns = getattr(harness, "streaming_elapsed_ns", None)
+    if streaming_elapsed_ns is not None and step in getattr(harness, "STEPS", ()):
+        start_time = time.perf_counter_ns()
+        result = func(*args, **kwargs)
+        streaming_elapsed_ns[step] = (
+            streaming_elapsed_ns.get(step, 0) + time.perf_counter_ns() - start_time
+        )
+        return result, None
+
+    throughput_state = start_throughput(harness, step, args)
+    probes = getattr(harness, "step_probes", [])
+    states = [probe.start() for probe in probes]
+
+    # o perfil cobre só as etapas do fluxo, não o total_etl_time que as contém; no modo
+    # streaming as etapas não abrem o perfil a cada mês, então ele cobre o total_etl_time
+    profiler = getattr(harness, "step_profiler", None)
+    profiled_steps = (
+        ("total_etl_time",)
+        if getattr(harness, "streaming", False)
+        else getattr(harness, "STEPS", ())
+    )
+    if step not in profiled_steps:
+        profiler = None
+    profile_state = profiler.start() if profiler else None
+
+    start_time = time.perf_counter_ns()
+    result = func(*args, **kwargs)
+    elapsed_ns = time.perf_counter_ns() - start_time
+
+    profile = profiler.stop(profile_state) if profiler else None
+
+    measurements = {}
+    for probe, state in reversed(list(zip(probes, states))):
+        measurements.update(probe.stop(state))
+    if profiler:
+        print(f"[{step}] profile saved to {profiler.save(profile, step)}")
+    if throughput_state is not None:
+        measurements.update(
+            stop_throughput(harness, throughput_state, result, elapsed_ns)
+        )
+
+    record_sample(harness, step, elapsed_ns, measurements)
+    return result, elapsed_ns
+
+
+def record_streaming_samples(harness):
+    """
+    Registra as etapas do modo streaming, com o tempo somado de todos os meses.
+
+    Sondas, vazões e perfil não são abertos a cada mês; no modo streaming eles valem só para o
+    total_etl_time, que cobre o fluxo inteiro.
+
+    Parâmetros:
+    harness (EtlLinkedin): Instância do harness que executou o fluxo, com streaming_elapsed_ns.
+    """
+    for step, elapsed_ns in harness.streaming_elapsed_ns.items():
+        record_sample(harness, step, elapsed_ns)
+        print(f"[{harness.engine}] {step}: {elapsed_ns / 1e9:.4f} seconds")
+
+
+def record_sample(harness, step, elapsed_ns, measurements=None):
+    """
+    Registra a amostra de uma etapa na instância do harness.
+
+    Parâmetros:
+    harness (EtlLinkedin): Instância do harness que executou a etapa.
+    step (str): Nome da etapa.
+    elapsed_ns (int): Tempo decorrido, em nanossegundos.
+    measurements (dict): Medições das sondas na etapa (ex.: peak_rss_delta_bytes).
+    """
+    measurements = measurements or {}
+    harness.step_samples.setdefault(step, []).append(
+        {"elapsed_ns": elapsed_ns, **measurements}
+    )
+    harness.engine_metrics[step] = round(elapsed_ns / 1e9, 6)
+
+    for metric, value in measurements.items():
+        if metric in MEGABYTE_METRICS:
+            metric = metric.replace("_bytes", "_mb")
+            value = None if value is None else round(value / 1e6, 3)
+        harness.engine_metrics[f"{step}_{metric}"] = value
+
+
+def select_steps(pipeline_steps, steps):
+    """
+    Valida o filtro de etapas de um harness.
+
+    Parâmetros:
+    pipeline_steps (list): Etapas do fluxo do harness, na ordem de execução.
+    steps (list): Etapas escolhidas. Além das etapas do fluxo, aceita total_etl_time.
+
+    Retorno:
+    list: As etapas escolhidas, ou None se não houver filtro.
+    """
+    if steps is None:
+        return None
+
+    valid_steps = list(pipeline_steps) + ["total_etl_time"]
+    invalid_steps = [step for step in steps if step not in valid_steps]
+    if invalid_steps:
+        raise ValueError(
+            f"Etapas inválidas: {invalid_steps}. Use uma ou mais de {valid_steps}."
+        )
+    return list(steps)
+
+
+def is_last_selected_step(pipeline_steps, selected_steps, step):
+    """
+    Indica se a etapa é a última do fluxo que precisa ser executada para medir as etapas escolhidas.
+
+    Parâmetros:
+    pipeline_steps (list): Etapas do fluxo, na ordem de execução.
+    selected_steps (list): Etapas escolhidas, ou None se não houver filtro.
+    step (str): Etapa recém-executada.
+
+    Retorno:
+    bool: True se o fluxo pode parar depois desta etapa.
+    """
+    if selected_steps is None:
+        return False
+
+    # total_etl_time sozinho não corta o fluxo
+    selected_pipeline_steps = [
+        pipeline_step for pipeline_step in pipeline_steps if pipeline_step in selected_steps
+    ]
+    if not selected_pipeline_steps or "total_etl_time" in selected_steps:
+        return False
+    return step == selected_pipeline_steps[-1]
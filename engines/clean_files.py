@@ -0,0 +1,50 @@
+import os
+
+# Formatos aceitos na camada de dados limpos
+OUTPUT_FORMATS = ("csv", "parquet")
+
+
+def validate_output_format(output_format):
+    """
+    Valida o formato de saída dos dados limpos.
+
+    Parâmetros:
+    output_format (str): Formato de saída (csv ou parquet).
+
+    Retorno:
+    str: O próprio formato, se for válido.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"Formato de saída inválido: {output_format}. Use um de {OUTPUT_FORMATS}."
+        )
+    return output_format
+
+
+def list_clean_files(directory, file_prefix="all_extractions_"):
+    """
+    Lista os arquivos limpos de um diretório, um por categoria.
+
+    Quando a mesma categoria existe em CSV e em Parquet, o Parquet é escolhido, pois já
+    traz os tipos das colunas e dispensa a releitura e conversão do CSV.
+
+    Parâmetros:
+    directory (str): Diretório com os arquivos limpos.
+    file_prefix (str): Prefixo removido do nome do arquivo para obter a categoria.
+
+    Retorno:
+    dict: Dicionário {categoria: caminho do arquivo}.
+    """
+    clean_files = {}
+    for filename in sorted(os.listdir(directory)):
+        name, extension = os.path.splitext(filename)
+        extension = extension.lstrip(".")
+        if extension not in OUTPUT_FORMATS:
+            continue
+
+        dataframe_name = name.replace(file_prefix, "")
+        current = clean_files.get(dataframe_name)
+        if current is None or extension == "parquet":
+            clean_files[dataframe_name] = os.path.join(directory, filename)
+
+    return clean_files
@@ -0,0 +1,253 @@
+import json
+from importlib.util import find_spec
+
+import pandas as pd
+import polars as pl
+
+# Assinaturas dos formatos de planilha: o OOXML (.xlsx) é um zip e o Excel 97-2003 (BIFF) é
+# um arquivo OLE2. Os arquivos do LinkedIn com extensão .xls costumam ser OOXML.
+OOXML_SIGNATURE = b"PK\x03\x04"
+OLE2_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+# Backends de leitura de cada biblioteca de DataFrames, com o módulo que precisa estar
+# instalado e os formatos que cada um lê. O calamine é escrito em Rust.
+EXCEL_BACKENDS = {
+    "pandas": {
+        "openpyxl": {"module": "openpyxl", "formats": ["xlsx"]},
+        "xlrd": {"module": "xlrd", "formats": ["xls"]},
+        "calamine": {"module": "python_calamine", "formats": ["xlsx", "xls"]},
+    },
+    "polars": {
+        "xlsx2csv": {"module": "xlsx2csv", "formats": ["xlsx"]},
+        "calamine": {"module": "fastexcel", "formats": ["xlsx", "xls"]},
+    },
+}
+
+# Backends usados quando nenhum é escolhido: os mesmos que cada biblioteca usa sozinha
+DEFAULT_BACKENDS = {
+    "pandas": {"xlsx": "openpyxl", "xls": "xlrd"},
+    "polars": {"xlsx": "xlsx2csv", "xls": "xlsx2csv"},
+}
+
+
+def excel_format(file_path):
+    """
+    Detecta o formato de um arquivo Excel pelo conteúdo, e não pela extensão.
+
+    Parâmetros:
+    file_path (str): Caminho do arquivo.
+
+    Retorno:
+    str: xlsx (OOXML) ou xls (BIFF). Sem assinatura conhecida, vale a extensão.
+    """
+    with open(file_path, "rb") as file:
+        signature = file.read(len(OLE2_SIGNATURE))
+    if signature.startswith(OOXML_SIGNATURE):
+        return "xlsx"
+    if signature == OLE2_SIGNATURE:
+        return "xls"
+    return "xls" if file_path.lower().endswith(".xls") else "xlsx"
+
+
+def available_backends(library):
+    """
+    Lista os backends de uma biblioteca cujos módulos estão instalados.
+
+    Parâmetros:
+    library (str): Biblioteca de DataFrames (pandas ou polars).
+
+    Retorno:
+    list: Nomes dos backends disponíveis.
+    """
+    return [
+        backend
+        for backend, attributes in EXCEL_BACKENDS[library].items()
+        if find_spec(attributes["module"]) is not None
+    ]
+
+
+def resolve_backends(library, backends=None):
+    """
+    Monta o backend de cada formato para uma biblioteca.
+
+    Parâmetros:
+    library (str): Biblioteca de DataFrames (pandas ou polars).
+    backends (dict ou str): Dicionário {formato: backend} (ex.: {"xlsx": "calamine"}) ou caminho do JSON gravado pela calibração, com uma seção por biblioteca. Os formatos ausentes usam o backend padrão.
+
+    Retorno:
+    dict: Dicionário {formato: backend}.
+    """
+    if isinstance(backends, str):
+        with open(backends, "r", encoding="utf-8") as file:
+            backends = json.load(file).get(library, {})
+
+    resolved = {**DEFAULT_BACKENDS[library], **(backends or {})}
+    for excel_format_name, backend in resolved.items():
+        if backend not in EXCEL_BACKENDS[library]:
+            raise ValueError(
+                f"Backend de leitura inválido para o {library}: {backend}. "
+                f"Use um de {list(EXCEL_BACKENDS[library])}."
+            )
+        # o padrão do polars para .xls é o mesmo de .xlsx, que só lê os .xls em OOXML
+        if (
+            excel_format_name not in EXCEL_BACKENDS[library][backend]["formats"]
+            and backend != DEFAULT_BACKENDS[library][excel_format_name]
+        ):
+            raise ValueError(
+                f"O backend {backend} não lê arquivos {excel_format_name}."
+            )
+    return resolved
+
+
+def read_pandas_sheets(file_path, sheets, backend, single_pass=True):
+    """
+    Lê as planilhas indicadas de um arquivo Excel para DataFrames do pandas.
+
+    No modo de leitura única, o arquivo é aberto e descompactado uma só vez e cada planilha
+    é separada em seu próprio DataFrame, respeitando o seu skiprows. Caso contrário, o
+    arquivo é reaberto a cada planilha lida.
+
+    Parâmetros:
+    file_path (str): Caminho do arquivo Excel.
+    sheets (list): Lista de dicionários com a posição (sheet_pos, a partir de 0) e as linhas a ignorar (skiprows) de cada planilha.
+    backend (str): Backend do pandas (engine do read_excel).
+    single_pass (bool): Se True, o arquivo é aberto uma única vez.
+
+    Retorno:
+    list: Lista de DataFrames, na mesma ordem de sheets.
+    """
+    if not single_pass:
+        return [
+            pd.read_excel(
+                file_path,
+                sheet_name=sheet["sheet_pos"],
+                skiprows=sheet["skiprows"],
+                engine=backend,
+            )
+            for sheet in sheets
+        ]
+
+    with pd.ExcelFile(file_path, engine=backend) as excel_file:
+        return [
+            excel_file.parse(
+                sheet_name=sheet["sheet_pos"],
+                skiprows=sheet["skiprows"],
+            )
+            for sheet in sheets
+        ]
+
+
+def polars_read_options(backend, skiprows):
+    """
+    Opções de leitura do polars que ignoram as primeiras linhas da planilha em cada backend.
+
+    Parâmetros:
+    backend (str): Backend do polars (engine do read_excel).
+    skiprows (int): Linhas ignoradas antes do cabeçalho.
+
+    Retorno:
+    dict: Opções repassadas em read_options.
+    """
+    if backend == "calamine":
+        return {"header_row": skiprows}
+    return {"skip_rows": skiprows}
+
+
+def read_polars_sheets(file_path, sheets, backend, single_pass=True):
+    """
+    Lê as planilhas indicadas de um arquivo Excel para DataFrames do Polars.
+
+    No modo de leitura única, as planilhas com o mesmo skiprows são lidas em uma única
+    chamada, de modo que o arquivo é aberto e descompactado uma só vez. Caso contrário, o
+    arquivo é reaberto a cada planilha lida.
+
+    Parâmetros:
+    file_path (str): Caminho do arquivo Excel.
+    sheets (list): Lista de dicionários com a posição (sheet_pos, a partir de 1) e as linhas a ignorar (skiprows) de cada planilha.
+    backend (str): Backend do polars (engine do read_excel).
+    single_pass (bool): Se True, o arquivo é aberto uma única vez por skiprows.
+
+    Retorno:
+    list: Lista de DataFrames, na mesma ordem de sheets.
+    """
+    if not single_pass:
+        return [
+            pl.read_excel(
+                source=file_path,
+                sheet_id=sheet["sheet_pos"],
+                engine=backend,
+                read_options=polars_read_options(backend, sheet["skiprows"]),
+            )
+            for sheet in sheets
+        ]
+
+    sheets_by_skiprows = {}
+    for sheet in sheets:
+        sheets_by_skiprows.setdefault(sheet["skiprows"], []).append(sheet["sheet_pos"])
+
+    # o polars devolve um dicionário {nome da planilha: DataFrame} na ordem dos ids pedidos
+    dataframes_by_pos = {}
+    for skiprows, sheet_ids in sheets_by_skiprows.items():
+        sheets_dataframes = pl.read_excel(
+            source=file_path,
+            sheet_id=sheet_ids,
+            engine=backend,
+            read_options=polars_read_options(backend, skiprows),
+        )
+        dataframes_by_pos.update(zip(sheet_ids, sheets_dataframes.values()))
+
+    return [dataframes_by_pos[sheet["sheet_pos"]] for sheet in sheets]
+
+
+class ExcelReader:
+    """
+    Leitor das planilhas dos arquivos brutos, com um backend por formato de arquivo.
+
+    O formato de cada arquivo é detectado pelo conteúdo (excel_format) e o backend vem de
+    resolve_backends: o padrão da biblioteca, um dicionário {formato: backend} ou o JSON
+    gravado pela calibração (python -m benchmark.excel_calibration).
+    """
+
+    def __init__(self, library, backends=None):
+        """
+        Inicializa o leitor.
+
+        Parâmetros:
+        library (str): Biblioteca dos DataFrames lidos (pandas ou polars).
+        backends (dict ou str): Backends por formato ou caminho do JSON da calibração. Se None, usa os padrões da biblioteca.
+        """
+        if library not in EXCEL_BACKENDS:
+            raise ValueError(
+                f"Biblioteca inválida: {library}. Use uma de {list(EXCEL_BACKENDS)}."
+            )
+        self.library = library
+        self.backends = resolve_backends(library, backends)
+
+    def backend_for(self, file_path):
+        """
+        Backend usado para um arquivo.
+
+        Parâmetros:
+        file_path (str): Caminho do arquivo Excel.
+
+        Retorno:
+        str: Nome do backend.
+        """
+        return self.backends[excel_format(file_path)]
+
+    def read_sheets(self, file_path, sheets, single_pass=True):
+        """
+        Lê as planilhas indicadas de um arquivo Excel com o backend do formato dele.
+
+        Parâmetros:
+        file_path (str): Caminho do arquivo Excel.
+        sheets (list): Lista de dicionários com a posição (sheet_pos) e as linhas a ignorar (skiprows) de cada planilha.
+        single_pass (bool): Se True, o arquivo é aberto uma única vez (ou uma vez por skiprows, no polars).
+
+        Retorno:
+        list: Lista de DataFrames, na mesma ordem de sheets.
+        """
+        read_sheets = (
+            read_pandas_sheets if self.library == "pandas" else read_polars_sheets
+        )
+        return read_sheets(file_path, sheets, self.backend_for(file_path), single_pass)
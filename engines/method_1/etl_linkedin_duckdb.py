@@ -1,7 +1,17 @@
 import pandas as pd
 import os
 import duckdb
+import pyarrow as pa
 import calendar
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+
+from engines.clean_files import validate_output_format
+from engines.excel_readers import ExcelReader
+from engines.raw_cache import RawFileCache
+from engines.raw_manifest import scan_raw_files
+from engines.sheet_layout import category_sheet_keys
 
 import warnings
 import logging
@@ -12,23 +22,179 @@ warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
 # Configurar logging
 logging.basicConfig(level=logging.ERROR)
 
+# Colunas de cada tipo de planilha, na ordem das planilhas, e os tipos delas no DuckDB
+TABLE_ATTRIBUTES = {
+    "content_metrics": {
+        "Date": "DATE",  # inferir data diretamente
+        "Impressions (organic)": "INT",
+        "Impressions (sponsored)": "INT",
+        "Impressions (total)": "INT",
+        "Unique impressions (organic)": "INT",
+        "Clicks (organic)": "INT",
+        "Clicks (sponsored)": "INT",
+        "Clicks (total)": "INT",
+        "Reactions (organic)": "INT",
+        "Reactions (sponsored)": "INT",
+        "Reactions (total)": "INT",
+        "Comments (organic)": "INT",
+        "Comments (sponsored)": "INT",
+        "Comments (total)": "INT",
+        "Shares (organic)": "INT",
+        "Shares (sponsored)": "INT",
+        "Shares (total)": "INT",
+        "Engagement rate (organic)": "DOUBLE",
+        "Engagement rate (sponsored)": "DOUBLE",
+        "Engagement rate (total)": "DOUBLE",
+    },
+    "content_posts": {
+        "Post Title": "VARCHAR",
+        "Post Link": "VARCHAR",
+        "Post Type": "VARCHAR",
+        "Campaign Name": "VARCHAR",
+        "Published by": "VARCHAR",
+        "Date": "DATE",  # inferir data diretamente
+        "Campaign Start Date": "DATE",  # inferir data diretamente
+        "Campaign End Date": "DATE",  # inferir data diretamente
+        "Audience": "VARCHAR",
+        "Impressions": "INT",
+        "Views (excluding off-site video views)": "INT",
+        "Off-site Views": "INT",
+        "Clicks": "INT",
+        "Click-Through Rate (CTR)": "FLOAT",
+        "Likes": "INT",
+        "Comments": "INT",
+        "Shares": "INT",
+        "Followers": "INT",
+        "Engagement Rate": "FLOAT",
+        "Content Type": "VARCHAR",
+    },
+    "followers_new": {
+        "Date": "DATE",  # inferir data diretamente
+        "Followers Sponsored": "INT",
+        "Followers Organic": "INT",
+        "Total Followers": "INT",
+    },
+    "followers_location": {"Location": "VARCHAR", "Total Followers": "INT"},
+    "followers_function": {"Function": "VARCHAR", "Total Followers": "INT"},
+    "followers_experience": {
+        "Experience Level": "VARCHAR",
+        "Total Followers": "INT",
+    },
+    "followers_industry": {"Industry": "VARCHAR", "Total Followers": "INT"},
+    "followers_company_size": {
+        "Company Size": "VARCHAR",
+        "Total Followers": "INT",
+    },
+    "visitors_metrics": {
+        "Date": "DATE",  # inferir data diretamente
+        "Page Views Overview (Desktop)": "INT",
+        "Page Views Overview (Mobile Devices)": "INT",
+        "Page Views Overview (Total)": "INT",
+        "Unique Visitors Overview (Desktop)": "INT",
+        "Unique Visitors Overview (Mobile Devices)": "INT",
+        "Unique Visitors Overview (Total)": "INT",
+        "Page Views Day by Day (Desktop)": "INT",
+        "Page Views Day by Day (Mobile Devices)": "INT",
+        "Page Views Day by Day (Total)": "INT",
+        "Unique Visitors Day by Day (Desktop)": "INT",
+        "Unique Visitors Day by Day (Mobile Devices)": "INT",
+        "Unique Visitors Day by Day (Total)": "INT",
+        "Page Views Jobs (Desktop)": "INT",
+        "Page Views Jobs (Mobile Devices)": "INT",
+        "Page Views Jobs (Total)": "INT",
+        "Unique Visitors Jobs (Desktop)": "INT",
+        "Unique Visitors Jobs (Mobile Devices)": "INT",
+        "Unique Visitors Jobs (Total)": "INT",
+        "Total Page Views (Desktop)": "INT",
+        "Total Page Views (Mobile Devices)": "INT",
+        "Total Page Views (Total)": "INT",
+        "Total Unique Visitors (Desktop)": "INT",
+        "Total Unique Visitors (Mobile Devices)": "INT",
+        "Total Unique Visitors (Total)": "INT",
+    },
+    "visitors_location": {"Location": "VARCHAR", "Total Views": "INT"},
+    "visitors_function": {"Function": "VARCHAR", "Total Views": "INT"},
+    "visitors_experience": {
+        "Experience Level": "VARCHAR",
+        "Total Views": "INT",
+    },
+    "visitors_industry": {"Industry": "VARCHAR", "Total Views": "INT"},
+    "visitors_company_size": {"Company Size": "VARCHAR", "Total Views": "INT"},
+    "competitor": {
+        "Page": "VARCHAR",
+        "Total Followers": "INT",
+        "New Followers": "INT",
+        "Total Post Engagements": "FLOAT",
+        "Total Posts": "INT",
+    },
+}
+
 
 class EtlLinkedinDuckDb:
     """
     Classe responsável pelo processamento ETL (Extração, Transformação e Carga) de dados do LinkedIn.
     """
 
-    def __init__(self, raw_directory, clean_directory):
+    def __init__(
+        self,
+        raw_directory,
+        clean_directory,
+        single_pass_read=True,
+        extraction_workers=1,
+        cache_directory=None,
+        stacked_transform=False,
+        output_format="csv",
+        parquet_compression="snappy",
+        threads=None,
+        bulk_ingestion=False,
+        excel_backends=None,
+        raw_manifest=None,
+    ):
         """
         Inicializa a classe LinkedInETLProcessor com os diretórios de dados brutos e limpos.
 
         Parâmetros:
         raw_directory (str): Diretório contendo os dados brutos.
         clean_directory (str): Diretório onde os dados limpos serão armazenados.
+        single_pass_read (bool): Se True, cada arquivo Excel é aberto uma única vez para ler todas as suas planilhas.
+        extraction_workers (int): Quantidade de processos usados na extração. Com 1, a extração é sequencial.
+        cache_directory (str): Diretório do cache persistente das planilhas lidas. Se None, o cache fica desativado.
+        stacked_transform (bool): Se True, as tabelas de um mesmo tipo de planilha são empilhadas e transformadas de uma só vez.
+        output_format (str): Formato dos arquivos da camada limpa: csv ou parquet.
+        parquet_compression (str): Compressão dos arquivos Parquet (ex.: snappy, zstd, gzip).
+        threads (int): Quantidade de threads do DuckDB (SET threads). Se None, o DuckDB usa o padrão dele (todos os núcleos).
+        bulk_ingestion (bool): Se True, os DataFrames de um mesmo tipo de planilha entram no DuckDB em um único lote Arrow, e a transformação passa a ser empilhada.
+        excel_backends (dict ou str): Backend de leitura do Excel por formato (ex.: {"xlsx": "calamine"}) ou caminho do JSON gravado pela calibração (python -m benchmark.excel_calibration). Se None, usa os backends padrão da biblioteca.
+        raw_manifest (str): Arquivo JSON do manifesto dos arquivos brutos (ver RawFileManifest). Se informado, o manifesto é gravado e reaproveitado entre execuções e os hashes dele alimentam o cache. Se None, a varredura fica só em memória.
         """
         self.raw_directory = raw_directory
         self.clean_directory = clean_directory
+        self.single_pass_read = single_pass_read
+        self.extraction_workers = extraction_workers
+        self.raw_cache = (
+            RawFileCache(cache_directory, "pandas") if cache_directory else None
+        )
+        self.stacked_transform = stacked_transform
+        self.output_format = validate_output_format(output_format)
+        self.parquet_compression = parquet_compression
+        self.threads = threads
+        self.bulk_ingestion = bulk_ingestion
+        self.excel_reader = ExcelReader("pandas", excel_backends)
+        self.raw_manifest = raw_manifest
         self.con = duckdb.connect(database=":memory:")
+        if threads:
+            self.con.execute(f"SET threads = {int(threads)}")
+
+    def __getstate__(self):
+        """
+        Remove a conexão DuckDB ao serializar a instância, já que os processos de extração paralela só leem arquivos Excel.
+
+        Retorno:
+        dict: Atributos da instância, sem a conexão.
+        """
+        state = self.__dict__.copy()
+        state.pop("con", None)
+        return state
 
     def detect_file_category(self, file):
         """
@@ -60,32 +226,68 @@ class EtlLinkedinDuckDb:
         Retorno:
         list: Lista de dicionários com informações sobre os arquivos brutos.
         """
-        extraction_files = []
-        for category in os.listdir(raw_directory):
-            category_path = os.path.join(raw_directory, category)
-
-            for year in os.listdir(category_path):
-                year_path = os.path.join(category_path, year)
-
-                for month in os.listdir(year_path):
-                    month_path = os.path.join(year_path, month)
-
-                    monthly_files = os.listdir(month_path)
-                    if not monthly_files:
-                        continue
-
-                    for i, file in enumerate(monthly_files):
-                        file_path = os.path.join(month_path, file)
-                        df_category = self.detect_file_category(file)
-                        extraction_files.append(
-                            {
-                                "category": df_category,
-                                "file_path": file_path,
-                                "dir": [category, year, month],
-                                "extraction_period": f"{year}_{month}_{i+1}",
-                            }
-                        )
-        return extraction_files
+        # categoria/ano/mês, em ordem estável: a numeração das extrações de cada mês segue o nome dos arquivos
+        return [
+            {
+                "category": self.detect_file_category(file["filename"]),
+                "file_path": file["file_path"],
+                "dir": file["dir"],
+                "extraction_period": f"{file['dir'][1]}_{file['dir'][2]}_{file['position']}",
+                "content_hash": file["content_hash"],
+            }
+            for file in scan_raw_files(raw_directory, self.raw_manifest)
+            if len(file["dir"]) == 3
+        ]
+
+    def read_excel_sheets(self, file_path, sheets, content_hash=None):
+        """
+        Lê as planilhas indicadas de um arquivo Excel, passando pelo cache persistente quando ativo.
+
+        Parâmetros:
+        file_path (str): Caminho do arquivo Excel.
+        sheets (list): Lista de dicionários com a posição (sheet_pos) e as linhas a ignorar (skiprows) de cada planilha.
+        content_hash (str): Hash do conteúdo do arquivo, se já conhecido.
+
+        Retorno:
+        list: Lista de DataFrames, na mesma ordem de sheets.
+        """
+        if self.raw_cache is None:
+            return self.parse_excel_sheets(file_path, sheets)
+
+        identity = self.raw_cache.file_identity(file_path, content_hash)
+        backend = self.excel_reader.backend_for(file_path)
+        dataframes = self.raw_cache.load(identity, sheets, backend, pd.read_parquet)
+        if dataframes is None:
+            dataframes = self.parse_excel_sheets(file_path, sheets)
+            self.raw_cache.store(
+                identity,
+                sheets,
+                backend,
+                dataframes,
+                lambda df, path: df.to_parquet(path, index=False),
+            )
+
+        return dataframes
+
+    def parse_excel_sheets(self, file_path, sheets):
+        """
+        Lê as planilhas indicadas de um arquivo Excel.
+
+        No modo de leitura única (padrão), o arquivo é aberto e descompactado uma só vez
+        e cada planilha é separada em seu próprio DataFrame, respeitando o seu skiprows.
+        Caso contrário, o arquivo é reaberto a cada planilha lida.
+        O backend de leitura é escolhido pelo formato do arquivo (ver ExcelReader).
+
+        Parâmetros:
+        file_path (str): Caminho do arquivo Excel.
+        sheets (list): Lista de dicionários com a posição (sheet_pos) e as linhas a ignorar (skiprows) de cada planilha.
+
+        Retorno:
+        list: Lista de DataFrames, na mesma ordem de sheets.
+        """
+        return self.excel_reader.read_sheets(
+            file_path, sheets, self.single_pass_read
+        )
 
     def read_excel_file(self, file):
         """
@@ -97,41 +299,13 @@ class EtlLinkedinDuckDb:
         Retorno:
         list: Lista de dicionários contendo o nome do DataFrame, diretório, período de extração e o DataFrame.
         """
-        category_keys = {
-            "competitor": [{"sheet_name": "competitor", "sheet_pos": 0, "skiprows": 1}],
-            "content": [
-                {"sheet_name": "content_metrics", "sheet_pos": 0, "skiprows": 1},
-                {"sheet_name": "content_posts", "sheet_pos": 1, "skiprows": 1},
-            ],
-            "followers": [
-                {"sheet_name": "followers_new", "sheet_pos": 0, "skiprows": 0},
-                {"sheet_name": "followers_location", "sheet_pos": 1, "skiprows": 0},
-                {"sheet_name": "followers_function", "sheet_pos": 2, "skiprows": 0},
-                {"sheet_name": "followers_experience", "sheet_pos": 3, "skiprows": 0},
-                {"sheet_name": "followers_industry", "sheet_pos": 4, "skiprows": 0},
-                {"sheet_name": "followers_company_size", "sheet_pos": 5, "skiprows": 0},
-            ],
-            "visitors": [
-                {"sheet_name": "visitors_metrics", "sheet_pos": 0, "skiprows": 0},
-                {"sheet_name": "visitors_location", "sheet_pos": 1, "skiprows": 0},
-                {"sheet_name": "visitors_function", "sheet_pos": 2, "skiprows": 0},
-                {"sheet_name": "visitors_experience", "sheet_pos": 3, "skiprows": 0},
-                {"sheet_name": "visitors_industry", "sheet_pos": 4, "skiprows": 0},
-                {"sheet_name": "visitors_company_size", "sheet_pos": 5, "skiprows": 0},
-            ],
-        }
-
-        sheets_to_read = category_keys[file["category"]]
+        sheets_to_read = category_sheet_keys(file["category"], "pandas")
+        sheets_dataframes = self.read_excel_sheets(
+            file["file_path"], sheets_to_read, file.get("content_hash")
+        )
 
         dataframes = []
-        for sheet in sheets_to_read:
-
-            df = pd.read_excel(
-                file["file_path"],
-                sheet_name=sheet["sheet_pos"],
-                skiprows=sheet["skiprows"],
-            )
-
+        for sheet, df in zip(sheets_to_read, sheets_dataframes):
             dataframes.append(
                 {
                     "dataframe_name": sheet["sheet_name"],
@@ -153,9 +327,72 @@ class EtlLinkedinDuckDb:
 
         files = self.get_raw_files(self.raw_directory)
 
+        if self.extraction_workers > 1:
+            return self.extract_data_parallel(files)
+
         data = [obj for file in files for obj in self.read_excel_file(file)]
         return data
 
+    def extract_data_parallel(self, files):
+        """
+        Extrai os arquivos brutos em um pool de processos.
+
+        A leitura do Excel é CPU-bound e feita em Python, por isso os arquivos são distribuídos
+        entre processos. O resultado segue a mesma ordem de get_raw_files, mantendo determinísticas
+        as concatenações e os nomes das tabelas.
+
+        Parâmetros:
+        files (list): Lista de dicionários com informações sobre os arquivos brutos.
+
+        Retorno:
+        list: Lista de dicionários contendo os dados extraídos.
+        """
+        chunksize = max(1, len(files) // (self.extraction_workers * 4))
+
+        # spawn evita herdar via fork os pools de threads já iniciados pelas bibliotecas
+        with ProcessPoolExecutor(
+            max_workers=self.extraction_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            extracted_files = executor.map(
+                self.read_excel_file, files, chunksize=chunksize
+            )
+            data = [obj for dataframes in extracted_files for obj in dataframes]
+
+        return data
+
+    def extract_data_by_month(self):
+        """
+        Extrai os dados brutos mês a mês, como um gerador, para o modo streaming.
+
+        Os arquivos de get_raw_files são agrupados pelo diretório (categoria, ano e mês), na
+        mesma ordem da extração completa, e cada mês só é lido quando o anterior já foi
+        consumido. Com extraction_workers > 1, os arquivos de cada mês são lidos em paralelo
+        por um pool de processos que dura toda a extração.
+
+        Retorno:
+        generator: Para cada mês, uma lista de dicionários contendo os dados extraídos.
+        """
+        files = self.get_raw_files(self.raw_directory)
+        monthly_files = [
+            list(month_files)
+            for _, month_files in groupby(files, key=lambda file: file["dir"])
+        ]
+
+        if self.extraction_workers <= 1:
+            for month_files in monthly_files:
+                yield [obj for file in month_files for obj in self.read_excel_file(file)]
+            return
+
+        # spawn evita herdar via fork os pools de threads já iniciados pelas bibliotecas
+        with ProcessPoolExecutor(
+            max_workers=self.extraction_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            for month_files in monthly_files:
+                extracted_files = executor.map(self.read_excel_file, month_files)
+                yield [obj for dataframes in extracted_files for obj in dataframes]
+
     def convert_dataframes_to_duckdb(self, data):
         """
         Converte dataframes pandas para tabelas em DuckDB.
@@ -166,6 +403,9 @@ class EtlLinkedinDuckDb:
         Retorno:
         tables: lista de dicionários contendo dados das tabelas.
         """
+        if self.bulk_ingestion:
+            return self.register_dataframes_in_bulk(data)
+
         tables = []
         for dataframe in data:
             table_dict = self.register_dataframe_in_duckdb(dataframe)
@@ -173,116 +413,10 @@ class EtlLinkedinDuckDb:
         return tables
 
     def register_dataframe_in_duckdb(self, dataframe):
-        table_attributes = {
-            "content_metrics": {
-                "Date": "DATE",  # inferir data diretamente
-                "Impressions (organic)": "INT",
-                "Impressions (sponsored)": "INT",
-                "Impressions (total)": "INT",
-                "Unique impressions (organic)": "INT",
-                "Clicks (organic)": "INT",
-                "Clicks (sponsored)": "INT",
-                "Clicks (total)": "INT",
-                "Reactions (organic)": "INT",
-                "Reactions (sponsored)": "INT",
-                "Reactions (total)": "INT",
-                "Comments (organic)": "INT",
-                "Comments (sponsored)": "INT",
-                "Comments (total)": "INT",
-                "Shares (organic)": "INT",
-                "Shares (sponsored)": "INT",
-                "Shares (total)": "INT",
-                "Engagement rate (organic)": "DOUBLE",
-                "Engagement rate (sponsored)": "DOUBLE",
-                "Engagement rate (total)": "DOUBLE",
-            },
-            "content_posts": {
-                "Post Title": "VARCHAR",
-                "Post Link": "VARCHAR",
-                "Post Type": "VARCHAR",
-                "Campaign Name": "VARCHAR",
-                "Published by": "VARCHAR",
-                "Date": "DATE",  # inferir data diretamente
-                "Campaign Start Date": "DATE",  # inferir data diretamente
-                "Campaign End Date": "DATE",  # inferir data diretamente
-                "Audience": "VARCHAR",
-                "Impressions": "INT",
-                "Views (excluding off-site video views)": "INT",
-                "Off-site Views": "INT",
-                "Clicks": "INT",
-                "Click-Through Rate (CTR)": "FLOAT",
-                "Likes": "INT",
-                "Comments": "INT",
-                "Shares": "INT",
-                "Followers": "INT",
-                "Engagement Rate": "FLOAT",
-                "Content Type": "VARCHAR",
-            },
-            "followers_new": {
-                "Date": "DATE",  # inferir data diretamente
-                "Followers Sponsored": "INT",
-                "Followers Organic": "INT",
-                "Total Followers": "INT",
-            },
-            "followers_location": {"Location": "VARCHAR", "Total Followers": "INT"},
-            "followers_function": {"Function": "VARCHAR", "Total Followers": "INT"},
-            "followers_experience": {
-                "Experience Level": "VARCHAR",
-                "Total Followers": "INT",
-            },
-            "followers_industry": {"Industry": "VARCHAR", "Total Followers": "INT"},
-            "followers_company_size": {
-                "Company Size": "VARCHAR",
-                "Total Followers": "INT",
-            },
-            "visitors_metrics": {
-                "Date": "DATE",  # inferir data diretamente
-                "Page Views Overview (Desktop)": "INT",
-                "Page Views Overview (Mobile Devices)": "INT",
-                "Page Views Overview (Total)": "INT",
-                "Unique Visitors Overview (Desktop)": "INT",
-                "Unique Visitors Overview (Mobile Devices)": "INT",
-                "Unique Visitors Overview (Total)": "INT",
-                "Page Views Day by Day (Desktop)": "INT",
-                "Page Views Day by Day (Mobile Devices)": "INT",
-                "Page Views Day by Day (Total)": "INT",
-                "Unique Visitors Day by Day (Desktop)": "INT",
-                "Unique Visitors Day by Day (Mobile Devices)": "INT",
-                "Unique Visitors Day by Day (Total)": "INT",
-                "Page Views Jobs (Desktop)": "INT",
-                "Page Views Jobs (Mobile Devices)": "INT",
-                "Page Views Jobs (Total)": "INT",
-                "Unique Visitors Jobs (Desktop)": "INT",
-                "Unique Visitors Jobs (Mobile Devices)": "INT",
-                "Unique Visitors Jobs (Total)": "INT",
-                "Total Page Views (Desktop)": "INT",
-                "Total Page Views (Mobile Devices)": "INT",
-                "Total Page Views (Total)": "INT",
-                "Total Unique Visitors (Desktop)": "INT",
-                "Total Unique Visitors (Mobile Devices)": "INT",
-                "Total Unique Visitors (Total)": "INT",
-            },
-            "visitors_location": {"Location": "VARCHAR", "Total Views": "INT"},
-            "visitors_function": {"Function": "VARCHAR", "Total Views": "INT"},
-            "visitors_experience": {
-                "Experience Level": "VARCHAR",
-                "Total Views": "INT",
-            },
-            "visitors_industry": {"Industry": "VARCHAR", "Total Views": "INT"},
-            "visitors_company_size": {"Company Size": "VARCHAR", "Total Views": "INT"},
-            "competitor": {
-                "Page": "VARCHAR",
-                "Total Followers": "INT",
-                "New Followers": "INT",
-                "Total Post Engagements": "FLOAT",
-                "Total Posts": "INT",
-            },
-        }
-
         db_table_name = (
             f"{dataframe['dataframe_name']}_{dataframe['extraction_period']}"
         )
-        table_attribute = table_attributes.get(dataframe["dataframe_name"])
+        table_attribute = TABLE_ATTRIBUTES.get(dataframe["dataframe_name"])
 
         translated_columns = table_attribute.keys()
         dataframe["df"].columns = list(translated_columns)
@@ -315,126 +449,203 @@ class EtlLinkedinDuckDb:
 
         return table_dict
 
-    def process_content_metrics(self, table):
+    def register_dataframes_in_bulk(self, data):
         """
-        Processa a tabela conteúdo_métrica.
+        Registra no DuckDB todos os DataFrames de cada tipo de planilha de uma só vez.
+
+        Os DataFrames de um mesmo dataframe_name são convertidos em um único lote Arrow, com o
+        período de extração e a ordem original das linhas, e viram uma tabela stacked_<nome>
+        tipada a partir de TABLE_ATTRIBUTES em um único CREATE TABLE AS. O DuckDB lê o lote
+        Arrow sem copiá-lo. Cada tabela por extração é uma view sobre a tabela empilhada, como
+        em transform_stacked_tables, o que troca dois comandos por planilha por um por tipo.
 
         Parâmetros:
-        table (str): Nome da tabela a ser processada.
+        data (list): Lista de dicionários contendo os dados extraídos.
 
         Retorno:
-        int: Retorna 1 se o processamento for bem-sucedido.
+        list: Lista de dicionários contendo dados das tabelas.
         """
+        grouped_dataframes = {}
+        for dataframe in data:
+            grouped_dataframes.setdefault(dataframe["dataframe_name"], []).append(
+                dataframe
+            )
 
-        self.con.execute(
-            f"""
-            CREATE TABLE {table}_temp AS
-            SELECT *,
-                CASE WHEN "Reactions (total)" >= 0 THEN "Reactions (total)" ELSE 0 END AS "Reactions (positive)",
-                CASE WHEN "Comments (total)" >= 0 THEN "Comments (total)" ELSE 0 END AS "Comments (positive)",
-                CASE WHEN "Shares (total)" >= 0 THEN "Shares (total)" ELSE 0 END AS "Shares (positive)",
-                CASE WHEN "Clicks (total)" >= 0 THEN "Clicks (total)" ELSE 0 END AS "Clicks (positive)"
-            FROM {table}
+        tables = []
+        for dataframe_name, group in grouped_dataframes.items():
+            stacked_table = f"stacked_{dataframe_name}"
+            table_attribute = TABLE_ATTRIBUTES.get(dataframe_name)
+            batch = self.build_arrow_batch(group, list(table_attribute.keys()))
+
+            select_columns = []
+            for col, dtype in table_attribute.items():
+                column_type = batch.schema.field(col).type
+                expression = f'"{col}"'
+                if dtype == "DATE" and pa.types.is_string(column_type):
+                    expression = f'CASE WHEN "{col}" = \'\' THEN NULL ELSE STRPTIME("{col}", \'%m/%d/%Y\') END'
+                elif dtype == "DATE" and not (
+                    pa.types.is_timestamp(column_type) or pa.types.is_date(column_type)
+                ):
+                    # coluna de data sem nenhum texto (ex.: float64 vazia)
+                    expression = f'STRPTIME(CAST("{col}" AS VARCHAR), \'%m/%d/%Y\')'
+                select_columns.append(f'CAST({expression} AS {dtype}) AS "{col}"')
+
+            self.con.register("arrow_batch", batch)
+            self.con.execute(
+                f"CREATE OR REPLACE TABLE {stacked_table} AS "
+                f"SELECT {', '.join(select_columns)}, extraction_period, source_row FROM arrow_batch"
+            )
+            self.con.unregister("arrow_batch")
+
+            views_query = ""
+            for dataframe in group:
+                db_table_name = f"{dataframe_name}_{dataframe['extraction_period']}"
+                views_query += f"""
+                    CREATE OR REPLACE VIEW {db_table_name} AS
+                    SELECT * EXCLUDE (extraction_period, source_row) FROM {stacked_table}
+                    WHERE extraction_period = '{dataframe["extraction_period"]}'
+                    ORDER BY source_row;
+                """
+                tables.append(
+                    {
+                        "dataframe_name": dataframe_name,
+                        "extraction_period": dataframe["extraction_period"],
+                        "db_table_name": db_table_name,
+                        "export_dir": os.path.join(
+                            self.clean_directory, *dataframe["dir"]
+                        ),
+                    }
+                )
+            self.con.execute(views_query)
+
+        return tables
+
+    def build_arrow_batch(self, group, columns):
         """
-        )
+        Junta os DataFrames de um mesmo tipo de planilha em uma única tabela Arrow.
 
-        # Adicionar colunas para média móvel na tabela temporária auxiliar
-        self.con.execute(
-            f"""
-            ALTER TABLE {table}_temp
-            ADD COLUMN "Reactions (moving average)" DOUBLE"""
-        )
+        As colunas são renomeadas pela posição, como em register_dataframe_in_duckdb. Quando uma
+        coluna chega com tipos diferentes entre as extrações (ex.: float64 vazia em uma e texto
+        em outra), ela vai como float64 se todos forem numéricos ou como texto nos demais casos,
+        e o CAST do CREATE TABLE AS faz a conversão final.
 
-        self.con.execute(
-            f"""
-            ALTER TABLE {table}_temp
-            ADD COLUMN "Comments (moving average)" DOUBLE"""
-        )
-        self.con.execute(
-            f"""
-            ALTER TABLE {table}_temp
-            ADD COLUMN "Shares (moving average)" DOUBLE"""
-        )
-        self.con.execute(
-            f"""
-            ALTER TABLE {table}_temp
-            ADD COLUMN "Clicks (moving average)" DOUBLE"""
-        )
+        Parâmetros:
+        group (list): Dicionários das extrações de um mesmo dataframe_name.
+        columns (list): Nomes das colunas, na ordem das planilhas.
 
-        self.con.execute(
-            f"""
-            ALTER TABLE {table}_temp
-            ADD COLUMN "Reactions (final)" DOUBLE"""
-        )
-        self.con.execute(
-            f"""
-            ALTER TABLE {table}_temp
-            ADD COLUMN "Comments (final)" DOUBLE"""
-        )
-        self.con.execute(
-            f"""
-            ALTER TABLE {table}_temp
-            ADD COLUMN "Shares (final)" DOUBLE"""
-        )
-        self.con.execute(
-            f"""
-            ALTER TABLE {table}_temp
-            ADD COLUMN "Clicks (final)" DOUBLE"""
-        )
+        Retorno:
+        pyarrow.Table: Lote com as colunas da planilha, extraction_period e source_row.
+        """
+        batches = []
+        for dataframe in group:
+            dataframe["df"].columns = columns
+            rows = len(dataframe["df"])
+            arrays = [self.arrow_column(dataframe["df"][col]) for col in columns]
+            arrays.append(pa.array([dataframe["extraction_period"]] * rows, pa.string()))
+            arrays.append(pa.array(range(rows), pa.int64()))
+            batches.append(
+                pa.Table.from_arrays(
+                    arrays, names=columns + ["extraction_period", "source_row"]
+                )
+            )
 
-        # Calculando média móvel na tabela temporária auxiliar
-        self.con.execute(
-            f"""
-            UPDATE {table}_temp
-            SET "Reactions (moving average)" = (SELECT AVG("Reactions (positive)") FROM {table}_temp t2 WHERE t2."Date" BETWEEN t1."Date" - 2 AND t1."Date"),
-                "Comments (moving average)" = (SELECT AVG("Comments (positive)") FROM {table}_temp t2 WHERE t2."Date" BETWEEN t1."Date" - 2 AND t1."Date"),
-                "Shares (moving average)" = (SELECT AVG("Shares (positive)") FROM {table}_temp t2 WHERE t2."Date" BETWEEN t1."Date" - 2 AND t1."Date"),
-                "Clicks (moving average)" = (SELECT AVG("Clicks (positive)") FROM {table}_temp t2 WHERE t2."Date" BETWEEN t1."Date" - 2 AND t1."Date")
-            FROM {table}_temp t1
+        # unifica os tipos de cada coluna entre as extrações (colunas só com nulos não contam)
+        for i, col in enumerate(columns):
+            column_types = {
+                batch.schema.field(i).type
+                for batch in batches
+                if not pa.types.is_null(batch.schema.field(i).type)
+            }
+            if len(column_types) <= 1:
+                continue
+            if all(
+                pa.types.is_integer(column_type) or pa.types.is_floating(column_type)
+                for column_type in column_types
+            ):
+                target_type = pa.float64()
+            else:
+                target_type = pa.string()
+            batches = [
+                batch.set_column(
+                    i, col, batch.column(i).cast(target_type)
+                )
+                for batch in batches
+            ]
+
+        return pa.concat_tables(batches, promote_options="default")
+
+    def arrow_column(self, series):
         """
-        )
+        Converte uma coluna do pandas para Arrow.
 
-        # Colunas finais na tabela temporária auxiliar
-        self.con.execute(
-            f"""
-            UPDATE {table}_temp
-            SET "Reactions (final)" = CASE WHEN "Reactions (total)" >= 0 THEN "Reactions (total)" ELSE "Reactions (moving average)" END,
-                "Comments (final)" = CASE WHEN "Comments (total)" >= 0 THEN "Comments (total)" ELSE "Comments (moving average)" END,
-                "Shares (final)" = CASE WHEN "Shares (total)" >= 0 THEN "Shares (total)" ELSE "Shares (moving average)" END,
-                "Clicks (final)" = CASE WHEN "Clicks (total)" >= 0 THEN "Clicks (total)" ELSE "Clicks (moving average)" END
+        Colunas object com valores de tipos misturados (ex.: números e texto) vão como texto.
+
+        Parâmetros:
+        series (pandas.Series): Coluna do DataFrame extraído.
+
+        Retorno:
+        pyarrow.Array: Coluna convertida.
         """
-        )
+        try:
+            return pa.Array.from_pandas(series)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return pa.Array.from_pandas(series.astype("string"))
+
+    def process_content_metrics(self, table, partition_column=None, order_column="rowid"):
+        """
+        Processa a tabela conteúdo_métrica.
+
+        Valores negativos são substituídos pela média móvel de 3 linhas dos valores positivos
+        (negativos contam como 0), na ordem original das linhas e, assim como no pandas e no
+        polars, nula enquanto não houver 3 linhas na janela. A tabela é recriada em um único
+        CREATE TABLE AS com funções de janela, mantendo os tipos das colunas.
+
+        Parâmetros:
+        table (str): Nome da tabela a ser processada.
+        partition_column (str): Coluna que identifica cada extração em uma tabela empilhada. A média móvel não cruza extrações.
+        order_column (str): Coluna com a ordem original das linhas.
+
+        Retorno:
+        int: Retorna 1 se o processamento for bem-sucedido.
+        """
+        replaced_columns = []
+        for metric in ["Reactions", "Comments", "Shares", "Clicks"]:
+            column = f'"{metric} (total)"'
+            moving_average = (
+                f"CASE WHEN COUNT(*) OVER moving_window = 3 "
+                f"THEN AVG(CASE WHEN {column} >= 0 THEN {column} ELSE 0 END) OVER moving_window END"
+            )
+            replaced_columns.append(
+                f"CASE WHEN {column} < 0 THEN CAST({moving_average} AS INT) ELSE {column} END AS {column}"
+            )
+
+        partition_clause = f"PARTITION BY {partition_column} " if partition_column else ""
+        order_clause = f"{partition_column}, {order_column}" if partition_column else order_column
 
-        # Copiar os valores finais da tabela temporária auxiliar para a tabela original
         self.con.execute(
             f"""
-            UPDATE {table}
-            SET "Reactions (total)" = t."Reactions (final)",
-                "Comments (total)" = t."Comments (final)",
-                "Shares (total)" = t."Shares (final)",
-                "Clicks (total)" = t."Clicks (final)"
-            FROM {table}_temp t
-            WHERE {table}."Date" = t."Date"
+            CREATE OR REPLACE TABLE {table} AS
+            SELECT * REPLACE ({", ".join(replaced_columns)})
+            FROM {table}
+            WINDOW moving_window AS (
+                {partition_clause}ORDER BY {order_column} ROWS BETWEEN 2 PRECEDING AND CURRENT ROW
+            )
+            ORDER BY {order_clause}
         """
         )
 
-        # Deletar a tabela temporária auxiliar
-        self.con.execute(f"DROP TABLE {table}_temp")
-
         return 1
 
-    def add_final_date(self, table):
+    def get_final_date(self, extraction_period):
         """
-        Adiciona uma data final a tabela com base no período de extração.
+        Calcula a data final de um período de extração.
 
         Parâmetros:
-        table: Dicionário contendo o informações da tabela.
+        extraction_period (str): Período de extração no formato ano_mês_extração (ex.: 2024_Mar_2).
 
         Retorno:
-        dict: O mesmo dicionário com a data final adicionada.
+        str: Data final do período.
         """
-
-        extraction_period = table["extraction_period"]
         year, month, period = extraction_period.split("_")
 
         month_order_pt = {
@@ -458,7 +669,20 @@ class EtlLinkedinDuckDb:
         else:
             day = 15
 
-        final_date = f"{year}-{month}-{day}"
+        return f"{year}-{month}-{day}"
+
+    def add_final_date(self, table):
+        """
+        Adiciona uma data final a tabela com base no período de extração.
+
+        Parâmetros:
+        table: Dicionário contendo o informações da tabela.
+
+        Retorno:
+        dict: O mesmo dicionário com a data final adicionada.
+        """
+
+        final_date = self.get_final_date(table["extraction_period"])
 
         self.con.execute(
             f"""
@@ -483,6 +707,10 @@ class EtlLinkedinDuckDb:
         Retorno:
         list: Lista de dicionários contendo os dados transformados.
         """
+        # com a ingestão em lote as tabelas por extração já são views sobre a tabela empilhada
+        if self.stacked_transform or self.bulk_ingestion:
+            return self.transform_stacked_tables(tables)
+
         for table in tables:
             if table["dataframe_name"] == "content_metrics":
                 self.process_content_metrics(table["db_table_name"])
@@ -490,6 +718,77 @@ class EtlLinkedinDuckDb:
             self.add_final_date(table)
         return tables
 
+    def transform_stacked_tables(self, tables):
+        """
+        Aplica as transformações empilhando antes todas as tabelas de um mesmo tipo de planilha.
+
+        As tabelas de um mesmo dataframe_name são unidas em uma única tabela stacked_<nome>, já com
+        a data final, o período de extração e a ordem original das linhas, e transformadas de uma
+        vez. Cada tabela por extração é então substituída por uma view sobre a tabela empilhada,
+        de modo que as etapas de carga e concatenação seguem iguais.
+
+        Parâmetros:
+        tables (list): Lista de dicionários contendo os dados extraídos.
+
+        Com a ingestão em lote, a tabela empilhada e as views já existem desde a extração e só
+        recebem a data final.
+
+        Retorno:
+        list: Lista de dicionários contendo os dados transformados.
+        """
+        grouped_tables = {}
+        for table in tables:
+            grouped_tables.setdefault(table["dataframe_name"], []).append(table)
+
+        for dataframe_name, group in grouped_tables.items():
+            stacked_table = f"stacked_{dataframe_name}"
+
+            if self.bulk_ingestion:
+                # a tabela empilhada já existe desde a ingestão, só falta a data final
+                final_dates = " ".join(
+                    f"""WHEN '{table["extraction_period"]}' THEN CAST('{self.get_final_date(table["extraction_period"])}' AS DATE)"""
+                    for table in group
+                )
+                self.con.execute(
+                    f"""
+                    CREATE OR REPLACE TABLE {stacked_table} AS
+                    SELECT * EXCLUDE (extraction_period, source_row),
+                        CASE extraction_period {final_dates} END AS "Extraction Range",
+                        extraction_period, source_row
+                    FROM {stacked_table}
+                """
+                )
+            else:
+                union_all_query = " UNION ALL ".join(
+                    f"""SELECT *, CAST('{self.get_final_date(table["extraction_period"])}' AS DATE) AS "Extraction Range", """
+                    f"""'{table["extraction_period"]}' AS extraction_period, rowid AS source_row FROM {table["db_table_name"]}"""
+                    for table in group
+                )
+                self.con.execute(
+                    f"CREATE OR REPLACE TABLE {stacked_table} AS {union_all_query}"
+                )
+
+            if dataframe_name == "content_metrics":
+                self.process_content_metrics(
+                    stacked_table,
+                    partition_column="extraction_period",
+                    order_column="source_row",
+                )
+
+            views_query = ""
+            for table in group:
+                if not self.bulk_ingestion:
+                    views_query += f'DROP TABLE {table["db_table_name"]};'
+                views_query += f"""
+                    CREATE OR REPLACE VIEW {table["db_table_name"]} AS
+                    SELECT * EXCLUDE (extraction_period, source_row) FROM {stacked_table}
+                    WHERE extraction_period = '{table["extraction_period"]}'
+                    ORDER BY source_row;
+                """
+            self.con.execute(views_query)
+
+        return tables
+
     def load_to_clean(self, tables):
         """
         Carrega os dados transformados no diretório de dados limpos.
@@ -504,9 +803,9 @@ class EtlLinkedinDuckDb:
             if not os.path.exists(table["export_dir"]):
                 os.makedirs(table["export_dir"])
 
-            export_filename = table["db_table_name"] + ".csv"
+            export_filename = f"{table['db_table_name']}.{self.output_format}"
             self.con.execute(
-                f"COPY {table['db_table_name']} TO '{table['export_dir']}/{export_filename}' (HEADER, DELIMITER ';')"
+                f"COPY {table['db_table_name']} TO '{table['export_dir']}/{export_filename}' {self.copy_options()}"
             )
 
         return 1
@@ -538,15 +837,15 @@ class EtlLinkedinDuckDb:
 
         for category_year_month, grouped_data in monthly_data.items():
             table_name = category_year_month
-            table_1 = grouped_data["tables"][0]
-            table_2 = grouped_data["tables"][1]
+            # une todas as extrações do mês, não só as duas primeiras
+            union_query = " UNION ALL ".join(
+                f'SELECT * FROM "{table}"' for table in grouped_data["tables"]
+            )
 
             self.con.execute(
                 f"""
                 CREATE OR REPLACE TABLE "{table_name}" AS
-                SELECT * FROM "{table_1}"
-                UNION ALL
-                SELECT * FROM "{table_2}"
+                {union_query}
             """
             )
 
@@ -554,7 +853,7 @@ class EtlLinkedinDuckDb:
 
     def export_tables(self, tables, export_type):
         """
-        Exporta um DataFrame concatenado para um arquivo CSV.
+        Exporta as tabelas concatenadas para arquivos no formato de saída configurado.
 
         Parâmetros:
         tables (dict): Dicionário contendo as tabelas a serem exportadas.
@@ -568,12 +867,23 @@ class EtlLinkedinDuckDb:
             if not os.path.exists(table_atributes["export_dir"]):
                 os.makedirs(table_atributes["export_dir"])
 
-            export_filename = f"{export_type}_{table_name}.csv"
+            export_filename = f"{export_type}_{table_name}.{self.output_format}"
             self.con.execute(
-                f"COPY {table_name} TO '{table_atributes['export_dir']}/{export_filename}' (HEADER, DELIMITER ';')"
+                f"COPY {table_name} TO '{table_atributes['export_dir']}/{export_filename}' {self.copy_options()}"
             )
         return 1
 
+    def copy_options(self):
+        """
+        Monta as opções do COPY para o formato de saída configurado.
+
+        Retorno:
+        str: Opções do COPY (CSV delimitado por ';' ou Parquet com a compressão escolhida).
+        """
+        if self.output_format == "parquet":
+            return f"(FORMAT PARQUET, COMPRESSION '{self.parquet_compression}')"
+        return "(HEADER, DELIMITER ';')"
+
     def concatenate_category_tables(self, monthly_data):
         """
         Identifica e agrupa tabelas de mesma categoria.
@@ -618,6 +928,35 @@ class EtlLinkedinDuckDb:
 
         return grouped_data_category
 
+    def drop_tables(self, tables):
+        """
+        Remove do DuckDB as tabelas por extração que já não são necessárias.
+
+        No modo streaming, as tabelas de um mês deixam de ser usadas depois da concatenação
+        mensal (que as copia). Com stacked_transform ou bulk_ingestion, elas são views, e as
+        tabelas empilhadas são substituídas pelas do mês seguinte.
+
+        Parâmetros:
+        tables (list): Lista de dicionários contendo os dados das tabelas.
+
+        Retorno:
+        int: Retorna 1 se a remoção for bem-sucedida.
+        """
+        views = {
+            view_name
+            for (view_name,) in self.con.execute(
+                "SELECT view_name FROM duckdb_views() WHERE NOT internal"
+            ).fetchall()
+        }
+        drop_query = ""
+        for table in tables:
+            object_type = "VIEW" if table["db_table_name"] in views else "TABLE"
+            drop_query += f'DROP {object_type} IF EXISTS "{table["db_table_name"]}";'
+        if drop_query:
+            self.con.execute(drop_query)
+
+        return 1
+
 
 def main():
     raw_directory = "data/linkedin/raw_2030"
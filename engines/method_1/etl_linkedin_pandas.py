@@ -2,27 +2,74 @@ import pandas as pd
 import os
 import csv
 import calendar
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+
+from engines.clean_files import validate_output_format
+from engines.excel_readers import ExcelReader
+from engines.raw_cache import RawFileCache
+from engines.raw_manifest import scan_raw_files
+from engines.sheet_layout import category_sheet_keys
 
 import warnings
 
 warnings.simplefilter("ignore")
 
+# Métricas de content_metrics cujos valores negativos são substituídos pela média móvel
+CONTENT_METRICS_WITH_NEGATIVES = [
+    "Reactions (total)",
+    "Comments (total)",
+    "Shares (total)",
+    "Clicks (total)",
+]
+
 
 class EtlLinkedinPandas:
     """
     Classe responsável pelo processamento ETL (Extração, Transformação e Carga) de dados do LinkedIn.
     """
 
-    def __init__(self, raw_directory, clean_directory):
+    def __init__(
+        self,
+        raw_directory,
+        clean_directory,
+        single_pass_read=True,
+        extraction_workers=1,
+        cache_directory=None,
+        stacked_transform=False,
+        output_format="csv",
+        parquet_compression="snappy",
+        excel_backends=None,
+        raw_manifest=None,
+    ):
         """
         Inicializa a classe LinkedInETLProcessor com os diretórios de dados brutos e limpos.
 
         Parâmetros:
         raw_directory (str): Diretório contendo os dados brutos.
         clean_directory (str): Diretório onde os dados limpos serão armazenados.
+        single_pass_read (bool): Se True, cada arquivo Excel é aberto uma única vez para ler todas as suas planilhas.
+        extraction_workers (int): Quantidade de processos usados na extração. Com 1, a extração é sequencial.
+        cache_directory (str): Diretório do cache persistente das planilhas lidas. Se None, o cache fica desativado.
+        stacked_transform (bool): Se True, as extrações de um mesmo tipo de planilha são empilhadas e transformadas de uma só vez.
+        output_format (str): Formato dos arquivos da camada limpa: csv ou parquet.
+        parquet_compression (str): Compressão dos arquivos Parquet (ex.: snappy, zstd, gzip).
+        excel_backends (dict ou str): Backend de leitura do Excel por formato (ex.: {"xlsx": "calamine"}) ou caminho do JSON gravado pela calibração (python -m benchmark.excel_calibration). Se None, usa os backends padrão da biblioteca.
+        raw_manifest (str): Arquivo JSON do manifesto dos arquivos brutos (ver RawFileManifest). Se informado, o manifesto é gravado e reaproveitado entre execuções e os hashes dele alimentam o cache. Se None, a varredura fica só em memória.
         """
         self.raw_directory = raw_directory
         self.clean_directory = clean_directory
+        self.single_pass_read = single_pass_read
+        self.extraction_workers = extraction_workers
+        self.raw_cache = (
+            RawFileCache(cache_directory, "pandas") if cache_directory else None
+        )
+        self.stacked_transform = stacked_transform
+        self.output_format = validate_output_format(output_format)
+        self.parquet_compression = parquet_compression
+        self.excel_reader = ExcelReader("pandas", excel_backends)
+        self.raw_manifest = raw_manifest
 
     def detect_file_category(self, file):
         """
@@ -54,32 +101,68 @@ class EtlLinkedinPandas:
         Retorno:
         list: Lista de dicionários com informações sobre os arquivos brutos.
         """
-        extraction_files = []
-        for category in os.listdir(raw_directory):
-            category_path = os.path.join(raw_directory, category)
-
-            for year in os.listdir(category_path):
-                year_path = os.path.join(category_path, year)
-
-                for month in os.listdir(year_path):
-                    month_path = os.path.join(year_path, month)
-
-                    monthly_files = os.listdir(month_path)
-                    if not monthly_files:
-                        continue
-
-                    for i, file in enumerate(monthly_files):
-                        file_path = os.path.join(month_path, file)
-                        df_category = self.detect_file_category(file)
-                        extraction_files.append(
-                            {
-                                "category": df_category,
-                                "file_path": file_path,
-                                "dir": [category, year, month],
-                                "extraction_period": f"{year}-{month}-{i+1}",
-                            }
-                        )
-        return extraction_files
+        # categoria/ano/mês, em ordem estável: a numeração das extrações de cada mês segue o nome dos arquivos
+        return [
+            {
+                "category": self.detect_file_category(file["filename"]),
+                "file_path": file["file_path"],
+                "dir": file["dir"],
+                "extraction_period": f"{file['dir'][1]}-{file['dir'][2]}-{file['position']}",
+                "content_hash": file["content_hash"],
+            }
+            for file in scan_raw_files(raw_directory, self.raw_manifest)
+            if len(file["dir"]) == 3
+        ]
+
+    def read_excel_sheets(self, file_path, sheets, content_hash=None):
+        """
+        Lê as planilhas indicadas de um arquivo Excel, passando pelo cache persistente quando ativo.
+
+        Parâmetros:
+        file_path (str): Caminho do arquivo Excel.
+        sheets (list): Lista de dicionários com a posição (sheet_pos) e as linhas a ignorar (skiprows) de cada planilha.
+        content_hash (str): Hash do conteúdo do arquivo, se já conhecido.
+
+        Retorno:
+        list: Lista de DataFrames, na mesma ordem de sheets.
+        """
+        if self.raw_cache is None:
+            return self.parse_excel_sheets(file_path, sheets)
+
+        identity = self.raw_cache.file_identity(file_path, content_hash)
+        backend = self.excel_reader.backend_for(file_path)
+        dataframes = self.raw_cache.load(identity, sheets, backend, pd.read_parquet)
+        if dataframes is None:
+            dataframes = self.parse_excel_sheets(file_path, sheets)
+            self.raw_cache.store(
+                identity,
+                sheets,
+                backend,
+                dataframes,
+                lambda df, path: df.to_parquet(path, index=False),
+            )
+
+        return dataframes
+
+    def parse_excel_sheets(self, file_path, sheets):
+        """
+        Lê as planilhas indicadas de um arquivo Excel.
+
+        No modo de leitura única (padrão), o arquivo é aberto e descompactado uma só vez
+        e cada planilha é separada em seu próprio DataFrame, respeitando o seu skiprows.
+        Caso contrário, o arquivo é reaberto a cada planilha lida.
+        O backend de leitura é escolhido pelo formato do arquivo (ver ExcelReader).
+
+        Parâmetros:
+        file_path (str): Caminho do arquivo Excel.
+        sheets (list): Lista de dicionários com a posição (sheet_pos) e as linhas a ignorar (skiprows) de cada planilha.
+
+        Retorno:
+        list: Lista de DataFrames, na mesma ordem de sheets.
+        """
+        return self.excel_reader.read_sheets(
+            file_path, sheets, self.single_pass_read
+        )
 
     def read_excel_file(self, file):
         """
@@ -91,41 +174,13 @@ class EtlLinkedinPandas:
         Retorno:
         list: Lista de dicionários contendo o nome do DataFrame, diretório, período de extração e o DataFrame.
         """
-        category_keys = {
-            "competitor": [{"sheet_name": "competitor", "sheet_pos": 0, "skiprows": 1}],
-            "content": [
-                {"sheet_name": "content_metrics", "sheet_pos": 0, "skiprows": 1},
-                {"sheet_name": "content_posts", "sheet_pos": 1, "skiprows": 1},
-            ],
-            "followers": [
-                {"sheet_name": "followers_new", "sheet_pos": 0, "skiprows": 0},
-                {"sheet_name": "followers_location", "sheet_pos": 1, "skiprows": 0},
-                {"sheet_name": "followers_function", "sheet_pos": 2, "skiprows": 0},
-                {"sheet_name": "followers_experience", "sheet_pos": 3, "skiprows": 0},
-                {"sheet_name": "followers_industry", "sheet_pos": 4, "skiprows": 0},
-                {"sheet_name": "followers_company_size", "sheet_pos": 5, "skiprows": 0},
-            ],
-            "visitors": [
-                {"sheet_name": "visitors_metrics", "sheet_pos": 0, "skiprows": 0},
-                {"sheet_name": "visitors_location", "sheet_pos": 1, "skiprows": 0},
-                {"sheet_name": "visitors_function", "sheet_pos": 2, "skiprows": 0},
-                {"sheet_name": "visitors_experience", "sheet_pos": 3, "skiprows": 0},
-                {"sheet_name": "visitors_industry", "sheet_pos": 4, "skiprows": 0},
-                {"sheet_name": "visitors_company_size", "sheet_pos": 5, "skiprows": 0},
-            ],
-        }
-
-        sheets_to_read = category_keys[file["category"]]
+        sheets_to_read = category_sheet_keys(file["category"], "pandas")
+        sheets_dataframes = self.read_excel_sheets(
+            file["file_path"], sheets_to_read, file.get("content_hash")
+        )
 
         dataframes = []
-        for sheet in sheets_to_read:
-
-            df = pd.read_excel(
-                file["file_path"],
-                sheet_name=sheet["sheet_pos"],
-                skiprows=sheet["skiprows"],
-            )
-
+        for sheet, df in zip(sheets_to_read, sheets_dataframes):
             dataframes.append(
                 {
                     "dataframe_name": sheet["sheet_name"],
@@ -147,9 +202,72 @@ class EtlLinkedinPandas:
 
         files = self.get_raw_files(self.raw_directory)
 
+        if self.extraction_workers > 1:
+            return self.extract_data_parallel(files)
+
         data = [obj for file in files for obj in self.read_excel_file(file)]
         return data
 
+    def extract_data_parallel(self, files):
+        """
+        Extrai os arquivos brutos em um pool de processos.
+
+        A leitura do Excel é CPU-bound e feita em Python, por isso os arquivos são distribuídos
+        entre processos. O resultado segue a mesma ordem de get_raw_files, mantendo determinísticas
+        as concatenações e os nomes das tabelas.
+
+        Parâmetros:
+        files (list): Lista de dicionários com informações sobre os arquivos brutos.
+
+        Retorno:
+        list: Lista de dicionários contendo os dados extraídos.
+        """
+        chunksize = max(1, len(files) // (self.extraction_workers * 4))
+
+        # spawn evita herdar via fork os pools de threads já iniciados pelas bibliotecas
+        with ProcessPoolExecutor(
+            max_workers=self.extraction_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            extracted_files = executor.map(
+                self.read_excel_file, files, chunksize=chunksize
+            )
+            data = [obj for dataframes in extracted_files for obj in dataframes]
+
+        return data
+
+    def extract_data_by_month(self):
+        """
+        Extrai os dados brutos mês a mês, como um gerador, para o modo streaming.
+
+        Os arquivos de get_raw_files são agrupados pelo diretório (categoria, ano e mês), na
+        mesma ordem da extração completa, e cada mês só é lido quando o anterior já foi
+        consumido. Com extraction_workers > 1, os arquivos de cada mês são lidos em paralelo
+        por um pool de processos que dura toda a extração.
+
+        Retorno:
+        generator: Para cada mês, uma lista de dicionários contendo os dados extraídos.
+        """
+        files = self.get_raw_files(self.raw_directory)
+        monthly_files = [
+            list(month_files)
+            for _, month_files in groupby(files, key=lambda file: file["dir"])
+        ]
+
+        if self.extraction_workers <= 1:
+            for month_files in monthly_files:
+                yield [obj for file in month_files for obj in self.read_excel_file(file)]
+            return
+
+        # spawn evita herdar via fork os pools de threads já iniciados pelas bibliotecas
+        with ProcessPoolExecutor(
+            max_workers=self.extraction_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            for month_files in monthly_files:
+                extracted_files = executor.map(self.read_excel_file, month_files)
+                yield [obj for dataframes in extracted_files for obj in dataframes]
+
     def translate_cols(self, dataframe):
         """
         Traduza os nomes das colunas de um DataFrame para o inglês.
@@ -260,17 +378,16 @@ class EtlLinkedinPandas:
         dataframe["df"].columns = translated_columns.get(dataframe["dataframe_name"])
         return dataframe
 
-    def add_final_date(self, dataframe):
+    def get_final_date(self, extraction_period):
         """
-        Adiciona uma data final ao DataFrame com base no período de extração.
+        Calcula a data final de um período de extração.
 
         Parâmetros:
-        dataframe (dict): Dicionário contendo o DataFrame e suas informações.
+        extraction_period (str): Período de extração no formato ano-mês-extração (ex.: 2024-Mar-2).
 
         Retorno:
-        dict: O mesmo dicionário com a data final adicionada.
+        str: Data final do período.
         """
-        extraction_period = dataframe["extraction_period"]
         year, month, period = extraction_period.split("-")
 
         month_order_pt = {
@@ -294,7 +411,19 @@ class EtlLinkedinPandas:
         else:
             day = 15
 
-        final_date = f"{year}-{month}-{day}"
+        return f"{year}-{month}-{day}"
+
+    def add_final_date(self, dataframe):
+        """
+        Adiciona uma data final ao DataFrame com base no período de extração.
+
+        Parâmetros:
+        dataframe (dict): Dicionário contendo o DataFrame e suas informações.
+
+        Retorno:
+        dict: O mesmo dicionário com a data final adicionada.
+        """
+        final_date = self.get_final_date(dataframe["extraction_period"])
 
         dataframe["df"]["Extraction Range"] = final_date
         return dataframe
@@ -324,18 +453,22 @@ class EtlLinkedinPandas:
 
         return dataframe
 
-    def clean_content_metrics_data(self, dataframe):
+    def clean_content_metrics_data(self, dataframe, partition_column=None):
         """
         Limpa e processa os dados de conteúdo metricas.
 
         Parâmetros:
         dataframe (dict): Dicionário contendo o DataFrame e suas informações.
+        partition_column (str): Coluna que identifica cada extração em um DataFrame empilhado. A média móvel não cruza extrações e a coluna é mantida.
 
         Retorno:
         dict: O mesmo dicionário com os dados de métricas de conteúdo limpos.
         """
+        partition_columns = [partition_column] if partition_column else []
+
         df = dataframe["df"][
-            [
+            partition_columns
+            + [
                 "Date",
                 "Impressions (total)",
                 "Clicks (total)",
@@ -345,84 +478,40 @@ class EtlLinkedinPandas:
                 "Engagement rate (total)",
                 "Extraction Range",
             ]
-        ]
-
-        df["Reactions (positive)"] = df["Reactions (total)"][
-            df["Reactions (total)"] >= 0
-        ]
-        df["Comments (positive)"] = df["Comments (total)"][df["Comments (total)"] >= 0]
-        df["Shares (positive)"] = df["Shares (total)"][df["Shares (total)"] >= 0]
-        df["Clicks (positive)"] = df["Clicks (total)"][df["Clicks (total)"] >= 0]
-
-        df["Reactions (positive)"] = df["Reactions (positive)"].fillna(0)
-        df["Comments (positive)"] = df["Comments (positive)"].fillna(0)
-        df["Shares (positive)"] = df["Shares (positive)"].fillna(0)
-        df["Clicks (positive)"] = df["Clicks (positive)"].fillna(0)
+        ].copy()
 
         window = 3
 
-        df["Reactions (moving average)"] = (
-            df["Reactions (positive)"].rolling(window=window).mean()
-        )
-        df["Comments (moving average)"] = (
-            df["Comments (positive)"].rolling(window=window).mean()
-        )
-        df["Shares (moving average)"] = (
-            df["Shares (positive)"].rolling(window=window).mean()
-        )
-        df["Clicks (moving average)"] = (
-            df["Clicks (positive)"].rolling(window=window).mean()
-        )
-
-        df["Reactions (total)"] = df.apply(
-            lambda row: (
-                row["Reactions (moving average)"]
-                if row["Reactions (total)"] < 0
-                else row["Reactions (total)"]
-            ),
-            axis=1,
-        )
-
-        df["Comments (total)"] = df.apply(
-            lambda row: (
-                row["Comments (moving average)"]
-                if row["Comments (total)"] < 0
-                else row["Comments (total)"]
-            ),
-            axis=1,
-        )
-
-        df["Shares (total)"] = df.apply(
-            lambda row: (
-                row["Shares (moving average)"]
-                if row["Shares (total)"] < 0
-                else row["Shares (total)"]
-            ),
-            axis=1,
-        )
-
-        df["Clicks (total)"] = df.apply(
-            lambda row: (
-                row["Clicks (moving average)"]
-                if row["Clicks (total)"] < 0
-                else row["Clicks (total)"]
-            ),
-            axis=1,
-        )
-
-        df["Engagement Rate (total)"] = df.apply(
-            lambda row: (
-                row["Reactions (total)"]
-                + row["Comments (total)"]
-                + row["Clicks (total)"]
-                + row["Shares (total)"]
-            )
-            / row["Impressions (total)"],
-            axis=1,
-        )
+        # valores negativos são substituídos pela média móvel dos valores positivos
+        for metric in CONTENT_METRICS_WITH_NEGATIVES:
+            total = df[metric]
+            positive = total.where(total >= 0, 0)
+            if partition_column:
+                moving_average = (
+                    positive.groupby(df[partition_column], sort=False)
+                    .rolling(window=window)
+                    .mean()
+                    .reset_index(level=0, drop=True)
+                )
+            else:
+                moving_average = positive.rolling(window=window).mean()
+
+            negative = total < 0
+            if negative.any():
+                df[metric] = total.astype("float64").mask(
+                    negative, moving_average
+                )
+
+        df["Engagement Rate (total)"] = (
+            df["Reactions (total)"]
+            + df["Comments (total)"]
+            + df["Clicks (total)"]
+            + df["Shares (total)"]
+        ) / df["Impressions (total)"]
 
         dataframe["df"] = df[
-            [
+            partition_columns
+            + [
                 "Date",
                 "Impressions (total)",
                 "Clicks (total)",
@@ -446,6 +535,9 @@ class EtlLinkedinPandas:
         Retorno:
         list: Lista de dicionários contendo os dados transformados.
         """
+        if self.stacked_transform:
+            return self.transform_stacked_data(data)
+
         for dataframe in data:
 
             dataframe = self.translate_cols(dataframe)
@@ -456,6 +548,111 @@ class EtlLinkedinPandas:
 
         return data
 
+    def transform_stacked_data(self, data):
+        """
+        Aplica as transformações empilhando antes todas as extrações de um mesmo tipo de planilha.
+
+        Em vez de transformar cada um dos pequenos DataFrames extraídos, as extrações de um mesmo
+        dataframe_name são concatenadas com a coluna extraction_period e transformadas uma única vez.
+        O resultado só é separado novamente por extração ao final, pois a carga na camada limpa
+        e a concatenação mensal trabalham com os arquivos de cada extração.
+
+        Parâmetros:
+        data (list): Lista de dicionários contendo os dados extraídos.
+
+        Retorno:
+        list: Lista de dicionários contendo os dados transformados.
+        """
+        grouped_data = {}
+        for dataframe in data:
+            dataframe = self.translate_cols(dataframe)
+            grouped_data.setdefault(dataframe["dataframe_name"], []).append(dataframe)
+
+        for dataframe_name, dataframes in grouped_data.items():
+            periods = [dataframe["extraction_period"] for dataframe in dataframes]
+            integer_dtypes = [
+                self.integer_dtypes(dataframe) for dataframe in dataframes
+            ]
+
+            stacked = {
+                "dataframe_name": dataframe_name,
+                "df": pd.concat(
+                    [dataframe["df"] for dataframe in dataframes],
+                    keys=periods,
+                    names=["extraction_period", None],
+                )
+                .reset_index(level="extraction_period")
+                .reset_index(drop=True),
+            }
+
+            final_dates = {period: self.get_final_date(period) for period in periods}
+            stacked["df"]["Extraction Range"] = stacked["df"]["extraction_period"].map(
+                final_dates
+            )
+
+            stacked = self.convert_column_types(stacked)
+            if dataframe_name == "content_metrics":
+                stacked = self.clean_content_metrics_data(
+                    stacked, partition_column="extraction_period"
+                )
+
+            self.split_stacked_dataframe(stacked["df"], dataframes)
+
+            # o empilhamento (e a média móvel em uma única extração com negativos) converte a
+            # coluna inteira para float; cada extração volta aos tipos do fluxo padrão
+            for dataframe, dtypes in zip(dataframes, integer_dtypes):
+                dataframe["df"] = dataframe["df"].astype(
+                    {
+                        column: dtype
+                        for column, dtype in dtypes.items()
+                        if column in dataframe["df"].columns
+                    }
+                )
+
+        return data
+
+    def integer_dtypes(self, dataframe):
+        """
+        Levanta as colunas inteiras que uma extração mantém como inteiras no fluxo padrão.
+
+        Em content_metrics, uma métrica com valores negativos vira float na limpeza, então
+        fica de fora.
+
+        Parâmetros:
+        dataframe (dict): Dicionário com o DataFrame de uma extração, com as colunas traduzidas.
+
+        Retorno:
+        dict: Dicionário {coluna: tipo inteiro}.
+        """
+        df = dataframe["df"]
+        return {
+            column: dtype
+            for column, dtype in df.dtypes.items()
+            if pd.api.types.is_integer_dtype(dtype)
+            and not (
+                dataframe["dataframe_name"] == "content_metrics"
+                and column in CONTENT_METRICS_WITH_NEGATIVES
+                and (df[column] < 0).any()
+            )
+        }
+
+    def split_stacked_dataframe(self, stacked_df, dataframes):
+        """
+        Separa um DataFrame empilhado de volta nos DataFrames de cada extração.
+
+        Parâmetros:
+        stacked_df (DataFrame): DataFrame empilhado, com a coluna extraction_period.
+        dataframes (list): Dicionários das extrações empilhadas, que recebem o seu pedaço do DataFrame.
+        """
+        extraction_dfs = dict(
+            tuple(stacked_df.groupby("extraction_period", sort=False))
+        )
+        empty_df = stacked_df.iloc[0:0]
+
+        for dataframe in dataframes:
+            df = extraction_dfs.get(dataframe["extraction_period"], empty_df)
+            dataframe["df"] = df.drop(columns="extraction_period")
+
     def load_to_clean(self, data):
         """
         Carrega os dados transformados no diretório de dados limpos.
@@ -475,17 +672,27 @@ class EtlLinkedinPandas:
                 dataframe["dataframe_name"]
                 + "_"
                 + dataframe["extraction_period"].split("-")[-1]
-                + ".csv"
+                + "."
+                + self.output_format
             )
 
-            dataframe["df"].to_csv(
-                os.path.join(dir_export, export_filename),
-                index=False,
-                quoting=csv.QUOTE_ALL,
-            )
+            self.write_dataframe(dataframe["df"], os.path.join(dir_export, export_filename))
 
         return 1
 
+    def write_dataframe(self, df, full_path):
+        """
+        Grava um DataFrame no formato de saída configurado (CSV ou Parquet).
+
+        Parâmetros:
+        df (DataFrame): DataFrame a ser gravado.
+        full_path (str): Caminho do arquivo, já com a extensão do formato.
+        """
+        if self.output_format == "parquet":
+            df.to_parquet(full_path, index=False, compression=self.parquet_compression)
+        else:
+            df.to_csv(full_path, index=False, quoting=csv.QUOTE_ALL)
+
     def concatenate_monthly_dataframes(self, data):
         """
         Agrupa e concatena os DataFrames extraídos por mês.
@@ -520,7 +727,7 @@ class EtlLinkedinPandas:
 
     def export_dataframes(self, data, file_prefix):
         """
-        Exporta dataframes concatenados para um arquivo CSV.
+        Exporta dataframes concatenados para arquivos no formato de saída configurado.
 
         Parâmetros:
         data (dict): Dicionário com os DataFrames concatenados.
@@ -531,15 +738,15 @@ class EtlLinkedinPandas:
         """
         for key, dataframe in data.items():
             export_dir = dataframe["export_dir"]
-            export_filename = f"{file_prefix}_{dataframe['category']}.csv"
+            export_filename = (
+                f"{file_prefix}_{dataframe['category']}.{self.output_format}"
+            )
 
             if os.path.exists(export_dir) == False:
                 os.makedirs(export_dir)
 
             full_path = os.path.join(export_dir, export_filename)
-            dataframe["concatenated_df"].to_csv(
-                full_path, index=False, quoting=csv.QUOTE_ALL
-            )
+            self.write_dataframe(dataframe["concatenated_df"], full_path)
         return 1
 
     def concatenate_category_dataframes(self, data):
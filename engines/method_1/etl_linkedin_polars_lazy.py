@@ -0,0 +1,176 @@
+import polars as pl
+import os
+
+from engines.method_1.etl_linkedin_polars import EtlLinkedinPolars
+
+
+class EtlLinkedinPolarsLazy(EtlLinkedinPolars):
+    """
+    Classe responsável pelo processamento ETL (Extração, Transformação e Carga) de dados do LinkedIn com LazyFrames do Polars.
+
+    A extração é a mesma da engine eager, já que as planilhas são lidas para DataFrames. A
+    transformação e as concatenações, por outro lado, só montam planos de LazyFrames, que são
+    executados nos pontos de gravação (load_to_clean e export_dataframes), todos de uma vez
+    com pl.collect_all. Assim o otimizador do Polars enxerga o fluxo inteiro: junta as
+    operações de cada extração em um único plano, descarta as colunas que não chegam à saída
+    e executa os planos independentes em paralelo. Depois de gravados, os resultados
+    materializados entram no lugar dos planos, para que as concatenações seguintes não
+    recalculem as etapas anteriores. Com stacked_transform, cada plano empilhado é executado
+    uma única vez e só então separado por extração.
+
+    Como a execução fica para a gravação, o tempo de transform_data e das concatenações
+    passa para load_to_clean e export_monthly_data/export_category_data.
+    """
+
+    def transform_data(self, data):
+        """
+        Monta os planos lazy das transformações dos dados extraídos.
+
+        Parâmetros:
+        data (list): Lista de dicionários contendo os dados extraídos.
+
+        Retorno:
+        list: Lista de dicionários contendo os planos (LazyFrames) dos dados transformados.
+        """
+        for dataframe in data:
+            dataframe["df"] = dataframe["df"].lazy()
+
+        return super().transform_data(data)
+
+    def split_stacked_dataframe(self, stacked_df, dataframes):
+        """
+        Separa o plano empilhado de volta nos planos de cada extração.
+
+        Cada extração recebe um filtro sobre o plano empilhado e guarda o próprio plano
+        empilhado em stacked_df. O collect_all não compartilha subplanos entre consultas,
+        então collect_dataframes executa o plano empilhado uma única vez e o separa depois,
+        em vez de executar um filtro por extração.
+
+        Parâmetros:
+        stacked_df (LazyFrame): Plano empilhado, com a coluna extraction_period.
+        dataframes (list): Dicionários das extrações empilhadas, que recebem o seu plano.
+        """
+        for dataframe in dataframes:
+            dataframe["df"] = stacked_df.filter(
+                pl.col("extraction_period") == dataframe["extraction_period"]
+            ).drop("extraction_period")
+            dataframe["stacked_df"] = stacked_df
+
+    def collect_dataframes(self, data, key):
+        """
+        Executa de uma vez os planos lazy de uma lista de dicionários e guarda os resultados no lugar dos planos.
+
+        Parâmetros:
+        data (iterable): Dicionários com o plano na chave key.
+        key (str): Chave do plano (df ou concatenated_df).
+        """
+        # planos empilhados, executados uma vez e separados entre as extrações que os usam
+        stacked_groups = {}
+        lazy_data = []
+        for dataframe in data:
+            stacked_df = dataframe.pop("stacked_df", None)
+            if stacked_df is not None:
+                stacked_groups.setdefault(id(stacked_df), (stacked_df, []))[1].append(
+                    dataframe
+                )
+            elif isinstance(dataframe[key], pl.LazyFrame):
+                lazy_data.append(dataframe)
+
+        collected_dfs = pl.collect_all(
+            [stacked_df for stacked_df, _ in stacked_groups.values()]
+            + [dataframe[key] for dataframe in lazy_data]
+        )
+        for (_, dataframes), df in zip(stacked_groups.values(), collected_dfs):
+            super().split_stacked_dataframe(df, dataframes)
+        for dataframe, df in zip(lazy_data, collected_dfs[len(stacked_groups) :]):
+            dataframe[key] = df
+
+    def load_to_clean(self, data):
+        """
+        Executa os planos das transformações e carrega os dados no diretório de dados limpos.
+
+        Parâmetros:
+        data (list): Lista de dicionários contendo os planos dos dados transformados.
+
+        Retorno:
+        int: Retorna 1 se a carga for bem-sucedida.
+        """
+        self.collect_dataframes(data, "df")
+        return super().load_to_clean(data)
+
+    def concatenate_monthly_dataframes(self, data):
+        """
+        Monta os planos lazy das concatenações mensais.
+
+        Parâmetros:
+        data (list): Lista de dicionários contendo os dados transformados.
+
+        Retorno:
+        dict: Dicionário com os planos concatenados, categoria e diretório de saída.
+        """
+        return super().concatenate_monthly_dataframes(
+            [dict(dataframe, df=dataframe["df"].lazy()) for dataframe in data]
+        )
+
+    def export_dataframes(self, data, file_prefix):
+        """
+        Executa os planos das concatenações e exporta os DataFrames no formato de saída configurado.
+
+        Parâmetros:
+        data (dict): Dicionário com os planos concatenados.
+        file_prefix (str): Tipo de exportação (e.g., 'month', 'clean').
+
+        Retorno:
+        int: Retorna 1 se a exportação for bem-sucedida.
+        """
+        self.collect_dataframes(data.values(), "concatenated_df")
+        return super().export_dataframes(data, file_prefix)
+
+    def concatenate_category_dataframes(self, data):
+        """
+        Monta os planos lazy das concatenações por categoria.
+
+        Parâmetros:
+        data (dict): Dicionário com os DataFrames concatenados por mês.
+
+        Retorno:
+        dict: Dicionário com os planos concatenados por categoria.
+        """
+        return super().concatenate_category_dataframes(
+            {
+                key: dict(dataframe, concatenated_df=dataframe["concatenated_df"].lazy())
+                for key, dataframe in data.items()
+            }
+        )
+
+
+def main():
+
+    raw_directory = "data/linkedin/raw_2025"
+    clean_directory = "data/linkedin/clean/polars_lazy"
+
+    etl = EtlLinkedinPolarsLazy(raw_directory, clean_directory)
+    data = etl.extract_data()
+    data = etl.transform_data(data)
+    etl.load_to_clean(data)
+
+    concatenated_monthly_dataframes = etl.concatenate_monthly_dataframes(data)
+    etl.export_dataframes(concatenated_monthly_dataframes, file_prefix="month")
+
+    concatenated_category_dataframes = etl.concatenate_category_dataframes(
+        concatenated_monthly_dataframes
+    )
+    etl.export_dataframes(
+        concatenated_category_dataframes, file_prefix="all_extractions"
+    )
+
+
+if __name__ == "__main__":
+    # debug
+    # delete clean_dir
+    import shutil
+
+    if os.path.exists("data/linkedin/clean/polars_lazy"):
+        shutil.rmtree("data/linkedin/clean/polars_lazy")
+
+    main()
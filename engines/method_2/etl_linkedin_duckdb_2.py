@@ -1,4 +1,3 @@
-import pandas as pd
 import os
 import duckdb
 import calendar
@@ -6,6 +5,17 @@ import calendar
 import warnings
 import logging
 
+from engines.clean_files import list_clean_files, validate_output_format
+from engines.excel_readers import ExcelReader
+from engines.raw_manifest import scan_raw_files
+from engines.segment_manifest import (
+    SegmentManifest,
+    check_columns,
+    segment_filename,
+    source_identity,
+)
+from engines.sheet_layout import category_sheet_keys
+
 # Suprimir avisos específicos da openpyxl
 warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
 
@@ -19,7 +29,17 @@ class EtlLinkedinDuckDb:
     """
 
     def __init__(
-        self, clean_concatenated_directory, unique_extraction_directory, export_dir
+        self,
+        clean_concatenated_directory,
+        unique_extraction_directory,
+        export_dir,
+        single_pass_read=True,
+        output_format="csv",
+        parquet_compression="snappy",
+        incremental=False,
+        threads=None,
+        excel_backends=None,
+        raw_manifest=None,
     ):
         """
         Inicializa a classe LinkedInETLProcessor com os diretórios de dados brutos e limpos.
@@ -27,11 +47,27 @@ class EtlLinkedinDuckDb:
         Parâmetros:
         raw_directory (str): Diretório contendo os dados brutos.
         clean_directory (str): Diretório onde os dados limpos serão armazenados.
+        single_pass_read (bool): Se True, cada arquivo Excel é aberto uma única vez para ler todas as suas planilhas.
+        output_format (str): Formato dos arquivos exportados: csv ou parquet. A leitura dos dados limpos usa o Parquet sempre que ele existir.
+        parquet_compression (str): Compressão dos arquivos Parquet (ex.: snappy, zstd, gzip).
+        incremental (bool): Se True, cada nova extração é gravada como um segmento à parte, com atualização do manifesto, em vez de reescrever todo o histórico.
+        threads (int): Quantidade de threads do DuckDB (SET threads). Se None, o DuckDB usa o padrão dele (todos os núcleos).
+        excel_backends (dict ou str): Backend de leitura do Excel por formato (ex.: {"xlsx": "calamine"}) ou caminho do JSON gravado pela calibração (python -m benchmark.excel_calibration). Se None, usa os backends padrão da biblioteca.
+        raw_manifest (str): Arquivo JSON do manifesto do diretório de extração única (ver RawFileManifest). Se informado, o manifesto é gravado e reaproveitado entre execuções, e o hash de cada arquivo vai para o segmento gerado a partir dele no modo incremental. Se None, a varredura fica só em memória.
         """
         self.clean_concatenated_directory = clean_concatenated_directory
         self.unique_extraction_directory = unique_extraction_directory
         self.export_dir = export_dir
+        self.single_pass_read = single_pass_read
+        self.output_format = validate_output_format(output_format)
+        self.parquet_compression = parquet_compression
+        self.incremental = incremental
+        self.threads = threads
+        self.excel_reader = ExcelReader("pandas", excel_backends)
+        self.raw_manifest = raw_manifest
         self.con = duckdb.connect(database=":memory:")
+        if threads:
+            self.con.execute(f"SET threads = {int(threads)}")
 
     def detect_file_category(self, file):
         """
@@ -53,6 +89,26 @@ class EtlLinkedinDuckDb:
             return "visitors"
         return 0
 
+    def read_excel_sheets(self, file_path, sheets):
+        """
+        Lê as planilhas indicadas de um arquivo Excel.
+
+        No modo de leitura única (padrão), o arquivo é aberto e descompactado uma só vez
+        e cada planilha é separada em seu próprio DataFrame, respeitando o seu skiprows.
+        Caso contrário, o arquivo é reaberto a cada planilha lida.
+        O backend de leitura é escolhido pelo formato do arquivo (ver ExcelReader).
+
+        Parâmetros:
+        file_path (str): Caminho do arquivo Excel.
+        sheets (list): Lista de dicionários com a posição (sheet_pos) e as linhas a ignorar (skiprows) de cada planilha.
+
+        Retorno:
+        list: Lista de DataFrames, na mesma ordem de sheets.
+        """
+        return self.excel_reader.read_sheets(
+            file_path, sheets, self.single_pass_read
+        )
+
     def read_excel_file(self, file):
         """
         Lê um arquivo Excel e retorna seus dados como uma lista de DataFrames.
@@ -63,46 +119,17 @@ class EtlLinkedinDuckDb:
         Retorno:
         list: Lista de dicionários contendo o nome do DataFrame, diretório, período de extração e o DataFrame.
         """
-        category_keys = {
-            "competitor": [{"sheet_name": "competitor", "sheet_pos": 0, "skiprows": 1}],
-            "content": [
-                {"sheet_name": "content_metrics", "sheet_pos": 0, "skiprows": 1},
-                {"sheet_name": "content_posts", "sheet_pos": 1, "skiprows": 1},
-            ],
-            "followers": [
-                {"sheet_name": "followers_new", "sheet_pos": 0, "skiprows": 0},
-                {"sheet_name": "followers_location", "sheet_pos": 1, "skiprows": 0},
-                {"sheet_name": "followers_function", "sheet_pos": 2, "skiprows": 0},
-                {"sheet_name": "followers_experience", "sheet_pos": 3, "skiprows": 0},
-                {"sheet_name": "followers_industry", "sheet_pos": 4, "skiprows": 0},
-                {"sheet_name": "followers_company_size", "sheet_pos": 5, "skiprows": 0},
-            ],
-            "visitors": [
-                {"sheet_name": "visitors_metrics", "sheet_pos": 0, "skiprows": 0},
-                {"sheet_name": "visitors_location", "sheet_pos": 1, "skiprows": 0},
-                {"sheet_name": "visitors_function", "sheet_pos": 2, "skiprows": 0},
-                {"sheet_name": "visitors_experience", "sheet_pos": 3, "skiprows": 0},
-                {"sheet_name": "visitors_industry", "sheet_pos": 4, "skiprows": 0},
-                {"sheet_name": "visitors_company_size", "sheet_pos": 5, "skiprows": 0},
-            ],
-        }
-
-        sheets_to_read = category_keys[file["category"]]
+        sheets_to_read = category_sheet_keys(file["category"], "pandas")
+        sheets_dataframes = self.read_excel_sheets(file["file_path"], sheets_to_read)
 
         dataframes = []
-        for sheet in sheets_to_read:
-
-            df = pd.read_excel(
-                file["file_path"],
-                sheet_name=sheet["sheet_pos"],
-                skiprows=sheet["skiprows"],
-            )
-
+        for sheet, df in zip(sheets_to_read, sheets_dataframes):
             dataframes.append(
                 {
                     "dataframe_name": sheet["sheet_name"],
                     "dir": file["dir"],
                     "extraction_period": file["extraction_period"],
+                    "source": file["source"],
                     "df": df,
                 }
             )
@@ -262,6 +289,7 @@ class EtlLinkedinDuckDb:
         table_dict = {
             "dataframe_name": dataframe["dataframe_name"],
             "extraction_period": dataframe["extraction_period"],
+            "source": dataframe["source"],
             "db_table_name": db_table_name,
         }
 
@@ -271,108 +299,38 @@ class EtlLinkedinDuckDb:
         """
         Processa a tabela conteúdo_métrica.
 
+        Valores negativos são substituídos pela média móvel de 3 linhas dos valores positivos
+        (negativos contam como 0), na ordem original das linhas e, assim como no pandas e no
+        polars, nula enquanto não houver 3 linhas na janela. A tabela é recriada em um único
+        CREATE TABLE AS com funções de janela, mantendo os tipos das colunas.
+
         Parâmetros:
         table (str): Nome da tabela a ser processada.
 
         Retorno:
         int: Retorna 1 se o processamento for bem-sucedido.
         """
+        replaced_columns = []
+        for metric in ["Reactions", "Comments", "Shares", "Clicks"]:
+            column = f'"{metric} (total)"'
+            moving_average = (
+                f"CASE WHEN COUNT(*) OVER moving_window = 3 "
+                f"THEN AVG(CASE WHEN {column} >= 0 THEN {column} ELSE 0 END) OVER moving_window END"
+            )
+            replaced_columns.append(
+                f"CASE WHEN {column} < 0 THEN CAST({moving_average} AS INT) ELSE {column} END AS {column}"
+            )
 
         self.con.execute(
             f"""
-            CREATE TABLE {table}_temp AS
-            SELECT *,
-                CASE WHEN "Reactions (total)" >= 0 THEN "Reactions (total)" ELSE 0 END AS "Reactions (positive)",
-                CASE WHEN "Comments (total)" >= 0 THEN "Comments (total)" ELSE 0 END AS "Comments (positive)",
-                CASE WHEN "Shares (total)" >= 0 THEN "Shares (total)" ELSE 0 END AS "Shares (positive)",
-                CASE WHEN "Clicks (total)" >= 0 THEN "Clicks (total)" ELSE 0 END AS "Clicks (positive)"
+            CREATE OR REPLACE TABLE {table} AS
+            SELECT * REPLACE ({", ".join(replaced_columns)})
             FROM {table}
+            WINDOW moving_window AS (ORDER BY rowid ROWS BETWEEN 2 PRECEDING AND CURRENT ROW)
+            ORDER BY rowid
         """
         )
 
-        # Adicionar colunas para média móvel na tabela temporária auxiliar
-        self.con.execute(
-            f"""
-            ALTER TABLE {table}_temp
-            ADD COLUMN "Reactions (moving average)" DOUBLE"""
-        )
-
-        self.con.execute(
-            f"""
-            ALTER TABLE {table}_temp
-            ADD COLUMN "Comments (moving average)" DOUBLE"""
-        )
-        self.con.execute(
-            f"""
-            ALTER TABLE {table}_temp
-            ADD COLUMN "Shares (moving average)" DOUBLE"""
-        )
-        self.con.execute(
-            f"""
-            ALTER TABLE {table}_temp
-            ADD COLUMN "Clicks (moving average)" DOUBLE"""
-        )
-
-        self.con.execute(
-            f"""
-            ALTER TABLE {table}_temp
-            ADD COLUMN "Reactions (final)" DOUBLE"""
-        )
-        self.con.execute(
-            f"""
-            ALTER TABLE {table}_temp
-            ADD COLUMN "Comments (final)" DOUBLE"""
-        )
-        self.con.execute(
-            f"""
-            ALTER TABLE {table}_temp
-            ADD COLUMN "Shares (final)" DOUBLE"""
-        )
-        self.con.execute(
-            f"""
-            ALTER TABLE {table}_temp
-            ADD COLUMN "Clicks (final)" DOUBLE"""
-        )
-
-        # Calculando média móvel na tabela temporária auxiliar
-        self.con.execute(
-            f"""
-            UPDATE {table}_temp
-            SET "Reactions (moving average)" = (SELECT AVG("Reactions (positive)") FROM {table}_temp t2 WHERE t2."Date" BETWEEN t1."Date" - 2 AND t1."Date"),
-                "Comments (moving average)" = (SELECT AVG("Comments (positive)") FROM {table}_temp t2 WHERE t2."Date" BETWEEN t1."Date" - 2 AND t1."Date"),
-                "Shares (moving average)" = (SELECT AVG("Shares (positive)") FROM {table}_temp t2 WHERE t2."Date" BETWEEN t1."Date" - 2 AND t1."Date"),
-                "Clicks (moving average)" = (SELECT AVG("Clicks (positive)") FROM {table}_temp t2 WHERE t2."Date" BETWEEN t1."Date" - 2 AND t1."Date")
-            FROM {table}_temp t1
-        """
-        )
-
-        # Colunas finais na tabela temporária auxiliar
-        self.con.execute(
-            f"""
-            UPDATE {table}_temp
-            SET "Reactions (final)" = CASE WHEN "Reactions (total)" >= 0 THEN "Reactions (total)" ELSE "Reactions (moving average)" END,
-                "Comments (final)" = CASE WHEN "Comments (total)" >= 0 THEN "Comments (total)" ELSE "Comments (moving average)" END,
-                "Shares (final)" = CASE WHEN "Shares (total)" >= 0 THEN "Shares (total)" ELSE "Shares (moving average)" END,
-                "Clicks (final)" = CASE WHEN "Clicks (total)" >= 0 THEN "Clicks (total)" ELSE "Clicks (moving average)" END
-        """
-        )
-
-        # Copiar os valores finais da tabela temporária auxiliar para a tabela original
-        self.con.execute(
-            f"""
-            UPDATE {table}
-            SET "Reactions (total)" = t."Reactions (final)",
-                "Comments (total)" = t."Comments (final)",
-                "Shares (total)" = t."Shares (final)",
-                "Clicks (total)" = t."Clicks (final)"
-            FROM {table}_temp t
-            WHERE {table}."Date" = t."Date"
-        """
-        )
-
-        # Deletar a tabela temporária auxiliar
-        self.con.execute(f"DROP TABLE {table}_temp")
-
         return 1
 
     def add_final_date(self, table):
@@ -444,17 +402,26 @@ class EtlLinkedinDuckDb:
 
     def get_clean_concatenated_data(self, concatenated_file_prefix="all_extractions_"):
         clean_data_tables = []
-        for filename in os.listdir(self.clean_concatenated_directory):
-            file_path = os.path.join(self.clean_concatenated_directory, filename)
+        clean_files = list_clean_files(
+            self.clean_concatenated_directory, concatenated_file_prefix
+        )
 
-            dataframe_name = filename.replace(concatenated_file_prefix, "").replace(
-                ".csv", ""
-            )
+        # no modo incremental o histórico não é lido, basta saber onde está cada arquivo
+        if self.incremental:
+            return clean_files
+
+        for dataframe_name, file_path in clean_files.items():
             dataframe_name = f"clean_{dataframe_name}"
 
+            # o Parquet já guarda os tipos das colunas, dispensando a inferência do CSV
+            if file_path.endswith(".parquet"):
+                read_function = "read_parquet"
+            else:
+                read_function = "read_csv_auto"
+
             create_query = f"""
                 CREATE TABLE "{dataframe_name}" AS
-                SELECT * FROM read_csv_auto('{file_path}')
+                SELECT * FROM {read_function}('{file_path}')
             """
             self.con.execute(create_query)
 
@@ -464,14 +431,17 @@ class EtlLinkedinDuckDb:
 
     def get_raw_unique_extraction_data(self, extraction_period="2035_Jan_1"):
         files = []
-        for file in os.listdir(self.unique_extraction_directory):
+        for file in scan_raw_files(self.unique_extraction_directory, self.raw_manifest):
+            if file["dir"]:
+                continue
             files.append(
                 {
-                    "filename": file,
-                    "file_path": os.path.join(self.unique_extraction_directory, file),
-                    "category": self.detect_file_category(file),
+                    "filename": file["filename"],
+                    "file_path": file["file_path"],
+                    "category": self.detect_file_category(file["filename"]),
                     "dir": ["-"],
                     "extraction_period": extraction_period,  # f"{year}-{month}-{i+1}"
+                    "source": source_identity(file["file_path"], file["content_hash"]),
                 }
             )
 
@@ -479,6 +449,9 @@ class EtlLinkedinDuckDb:
         return extraction_data
 
     def concatenate_unique_extraction_data(self, clean_tables, extraction_tables):
+        if self.incremental:
+            return self.prepare_segments(clean_tables, extraction_tables)
+
         concatenated_tables = []
         for table in extraction_tables:
             table_name = table["dataframe_name"]
@@ -495,21 +468,157 @@ class EtlLinkedinDuckDb:
             concatenated_tables.append(table_name)
         return concatenated_tables
 
+    def prepare_segments(self, clean_files, extraction_tables):
+        """
+        Prepara as novas extrações para o modo incremental, sem uni-las ao histórico.
+
+        Cada extração ganha uma view com o nome da categoria e as colunas na ordem do histórico.
+
+        Parâmetros:
+        clean_files (dict): Arquivos concatenados do método 1 por categoria, gerado por get_clean_concatenated_data.
+        extraction_tables (list): Lista de dicionários com as tabelas transformadas da nova extração.
+
+        Retorno:
+        list: Lista de dicionários com um segmento por categoria.
+        """
+        manifest = SegmentManifest(self.export_dir)
+
+        segments = []
+        for table in extraction_tables:
+            table_name = table["dataframe_name"]
+            clean_file = clean_files.get(table_name)
+
+            table_columns = self.read_columns(f'SELECT * FROM "{table["db_table_name"]}"')
+            columns = manifest.get_columns(table_name)
+            if columns is None:
+                columns = (
+                    self.read_clean_columns(clean_file) if clean_file else table_columns
+                )
+            check_columns(table_name, table_columns, columns)
+
+            select_columns = ", ".join(f'"{column}"' for column in columns)
+            self.con.execute(
+                f"""
+                CREATE OR REPLACE VIEW "{table_name}" AS
+                SELECT {select_columns} FROM "{table["db_table_name"]}"
+            """
+            )
+
+            segments.append(
+                {
+                    "table": table_name,
+                    "source": table["source"],
+                    "extraction_period": table["extraction_period"],
+                    "clean_file": clean_file,
+                    "columns": columns,
+                }
+            )
+
+        return segments
+
+    def read_columns(self, query):
+        """
+        Retorna as colunas do resultado de uma consulta, sem executá-la por completo.
+
+        Parâmetros:
+        query (str): Consulta SQL.
+
+        Retorno:
+        list: Nomes das colunas.
+        """
+        return [row[0] for row in self.con.execute(f"DESCRIBE {query}").fetchall()]
+
+    def read_clean_columns(self, file_path):
+        """
+        Lê apenas as colunas de um arquivo limpo, sem carregar os dados.
+
+        Parâmetros:
+        file_path (str): Caminho do arquivo CSV ou Parquet.
+
+        Retorno:
+        list: Nomes das colunas.
+        """
+        if file_path.endswith(".parquet"):
+            return self.read_columns(f"SELECT * FROM read_parquet('{file_path}')")
+        return self.read_columns(f"SELECT * FROM read_csv_auto('{file_path}')")
+
     def export_dataframes(self, tables):
+        if self.incremental:
+            return self.export_segments(tables)
+
         if not os.path.exists(self.export_dir):
             os.makedirs(self.export_dir)
 
         for table in tables:
-            export_filename = f"{table}.csv"
+            export_filename = f"{table}.{self.output_format}"
 
             query = f"""
-                COPY {table} TO '{os.path.join(self.export_dir, export_filename)}' (HEADER, DELIMITER ';')
+                COPY {table} TO '{os.path.join(self.export_dir, export_filename)}' {self.copy_options()}
 """
 
             self.con.execute(query)
 
         return 1
 
+    def copy_options(self):
+        """
+        Monta as opções do COPY para o formato de saída configurado.
+
+        Retorno:
+        str: Opções do COPY (CSV delimitado por ';' ou Parquet com a compressão escolhida).
+        """
+        if self.output_format == "parquet":
+            return f"(FORMAT PARQUET, COMPRESSION '{self.parquet_compression}')"
+        return "(HEADER, DELIMITER ';')"
+
+    def export_segments(self, segments):
+        """
+        Grava cada nova extração como um segmento da sua categoria e atualiza o manifesto.
+
+        Na primeira execução de uma categoria, o arquivo concatenado do método 1 é copiado
+        como segmento base. Depois disso, o custo de cada execução depende só do tamanho da
+        nova extração.
+        Cada arquivo bruto tem o seu próprio segmento: um arquivo novo acrescenta um segmento
+        e um arquivo já gravado tem o seu segmento substituído, ou mantido se o tamanho, o
+        mtime e o hash dele não mudaram (ver SegmentManifest.has_segment).
+
+        Parâmetros:
+        segments (list): Lista de segmentos, gerada por concatenate_unique_extraction_data.
+
+        Retorno:
+        int: Retorna 1 se a exportação for bem-sucedida.
+        """
+        manifest = SegmentManifest(self.export_dir)
+
+        for segment in segments:
+            category = segment["table"]
+            if not manifest.has_category(category):
+                manifest.add_category(category, segment["columns"], segment["clean_file"])
+
+            # segmento já gravado a partir do mesmo arquivo bruto: nada a regravar
+            if manifest.has_segment(category, segment["source"]):
+                continue
+
+            export_filename = segment_filename(
+                segment["source"]["source_file"], self.output_format
+            )
+            export_path = os.path.join(manifest.category_directory(category), export_filename)
+
+            # o COPY retorna a quantidade de linhas gravadas
+            rows = self.con.execute(
+                f"COPY {category} TO '{export_path}' {self.copy_options()}"
+            ).fetchone()[0]
+            manifest.add_segment(
+                category,
+                segment["source"],
+                segment["extraction_period"],
+                export_filename,
+                rows,
+            )
+
+        manifest.save()
+        return 1
+
 
 def main():
     clean_concatenated_directory = "data/linkedin/clean/duckdb/concatenated_dataframes"
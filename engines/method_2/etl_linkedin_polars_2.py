@@ -3,6 +3,17 @@ import os
 import calendar
 import re
 
+from engines.clean_files import list_clean_files, validate_output_format
+from engines.excel_readers import ExcelReader
+from engines.raw_manifest import scan_raw_files
+from engines.segment_manifest import (
+    SegmentManifest,
+    check_columns,
+    segment_filename,
+    source_identity,
+)
+from engines.sheet_layout import POLARS_TITLE_AS_HEADER, category_sheet_keys
+
 
 class EtlLinkedinPolars:
     """
@@ -10,7 +21,17 @@ class EtlLinkedinPolars:
     """
 
     def __init__(
-        self, clean_concatenated_directory, unique_extraction_directory, export_dir
+        self,
+        clean_concatenated_directory,
+        unique_extraction_directory,
+        export_dir,
+        single_pass_read=True,
+        output_format="csv",
+        parquet_compression="snappy",
+        incremental=False,
+        threads=None,
+        excel_backends=None,
+        raw_manifest=None,
     ):
         """
         Inicializa a classe LinkedInETLProcessor com os diretórios de dados brutos e limpos.
@@ -18,10 +39,29 @@ class EtlLinkedinPolars:
         Parâmetros:
         raw_directory (str): Diretório contendo os dados brutos.
         clean_directory (str): Diretório onde os dados limpos serão armazenados.
+        single_pass_read (bool): Se True, cada arquivo Excel é aberto uma única vez para ler todas as suas planilhas.
+        output_format (str): Formato dos arquivos exportados: csv ou parquet. A leitura dos dados limpos usa o Parquet sempre que ele existir.
+        parquet_compression (str): Compressão dos arquivos Parquet (ex.: snappy, zstd, gzip).
+        incremental (bool): Se True, cada nova extração é gravada como um segmento à parte, com atualização do manifesto, em vez de reescrever todo o histórico.
+        threads (int): Quantidade de threads esperada no pool do Polars. O pool é dimensionado pela variável POLARS_MAX_THREADS antes do import do polars; se o tamanho for outro, um ValueError é levantado.
+        excel_backends (dict ou str): Backend de leitura do Excel por formato (ex.: {"xlsx": "calamine"}) ou caminho do JSON gravado pela calibração (python -m benchmark.excel_calibration). Se None, usa os backends padrão da biblioteca.
+        raw_manifest (str): Arquivo JSON do manifesto do diretório de extração única (ver RawFileManifest). Se informado, o manifesto é gravado e reaproveitado entre execuções, e o hash de cada arquivo vai para o segmento gerado a partir dele no modo incremental. Se None, a varredura fica só em memória.
         """
         self.clean_concatenated_directory = clean_concatenated_directory
         self.unique_extraction_directory = unique_extraction_directory
         self.export_dir = export_dir
+        self.single_pass_read = single_pass_read
+        self.output_format = validate_output_format(output_format)
+        self.parquet_compression = parquet_compression
+        self.incremental = incremental
+        self.threads = threads
+        self.excel_reader = ExcelReader("polars", excel_backends)
+        self.raw_manifest = raw_manifest
+        if threads and pl.thread_pool_size() != threads:
+            raise ValueError(
+                f"O pool do Polars tem {pl.thread_pool_size()} threads, mas {threads} foram pedidas. "
+                "Defina POLARS_MAX_THREADS antes de importar o polars (ex.: com a célula isolada)."
+            )
 
     def detect_file_category(self, file):
         """
@@ -80,6 +120,26 @@ class EtlLinkedinPolars:
     #                     )
     #     return extraction_files
 
+    def read_excel_sheets(self, file_path, sheets):
+        """
+        Lê as planilhas indicadas de um arquivo Excel.
+
+        No modo de leitura única (padrão), as planilhas com o mesmo skiprows são lidas em uma
+        única chamada, de modo que o arquivo é aberto e descompactado uma só vez.
+        Caso contrário, o arquivo é reaberto a cada planilha lida.
+        O backend de leitura é escolhido pelo formato do arquivo (ver ExcelReader).
+
+        Parâmetros:
+        file_path (str): Caminho do arquivo Excel.
+        sheets (list): Lista de dicionários com a posição (sheet_pos) e as linhas a ignorar (skiprows) de cada planilha.
+
+        Retorno:
+        list: Lista de DataFrames, na mesma ordem de sheets.
+        """
+        return self.excel_reader.read_sheets(
+            file_path, sheets, self.single_pass_read
+        )
+
     def read_excel_file(self, file):
         """
         Lê um arquivo Excel e retorna seus dados como uma lista de DataFrames.
@@ -90,48 +150,13 @@ class EtlLinkedinPolars:
         Retorno:
         list: Lista de dicionários contendo o nome do DataFrame, diretório, período de extração e o DataFrame.
         """
-        category_keys = {
-            "competitor": [{"sheet_name": "competitor", "sheet_pos": 1, "skiprows": 1}],
-            "content": [
-                {"sheet_name": "content_metrics", "sheet_pos": 1, "skiprows": 0},
-                {"sheet_name": "content_posts", "sheet_pos": 2, "skiprows": 0},
-            ],
-            "followers": [
-                {"sheet_name": "followers_new", "sheet_pos": 1, "skiprows": 0},
-                {"sheet_name": "followers_location", "sheet_pos": 2, "skiprows": 0},
-                {"sheet_name": "followers_function", "sheet_pos": 3, "skiprows": 0},
-                {"sheet_name": "followers_experience", "sheet_pos": 4, "skiprows": 0},
-                {"sheet_name": "followers_industry", "sheet_pos": 5, "skiprows": 0},
-                {"sheet_name": "followers_company_size", "sheet_pos": 6, "skiprows": 0},
-            ],
-            "visitors": [
-                {"sheet_name": "visitors_metrics", "sheet_pos": 1, "skiprows": 0},
-                {"sheet_name": "visitors_location", "sheet_pos": 2, "skiprows": 0},
-                {"sheet_name": "visitors_function", "sheet_pos": 3, "skiprows": 0},
-                {"sheet_name": "visitors_experience", "sheet_pos": 4, "skiprows": 0},
-                {"sheet_name": "visitors_industry", "sheet_pos": 5, "skiprows": 0},
-                {"sheet_name": "visitors_company_size", "sheet_pos": 6, "skiprows": 0},
-            ],
-        }
-
-        sheets_to_read = category_keys[file["category"]]
+        sheets_to_read = category_sheet_keys(file["category"], "polars")
+        sheets_dataframes = self.read_excel_sheets(file["file_path"], sheets_to_read)
 
         dataframes = []
-        for sheet in sheets_to_read:
-            # Original Pandas
-            # df = pd.read_excel(
-            #     file["file_path"],
-            #     sheet_name=sheet["sheet_pos"],
-            #     skiprows=sheet["skiprows"],
-            # )
-
-            df = pl.read_excel(
-                source=file["file_path"],
-                sheet_id=sheet["sheet_pos"],
-                read_options={"skip_rows": sheet["skiprows"]},
-            )
-
-            if file["category"] == "content":
+        for sheet, df in zip(sheets_to_read, sheets_dataframes):
+            # a linha de título foi lida como cabeçalho: o cabeçalho de fato é a primeira linha
+            if file["category"] in POLARS_TITLE_AS_HEADER:
                 first_row = df.row(0)
                 df.columns = first_row
                 df = df.slice(1, df.height)
@@ -141,6 +166,7 @@ class EtlLinkedinPolars:
                     "dataframe_name": sheet["sheet_name"],
                     "dir": file["dir"],
                     "extraction_period": file["extraction_period"],
+                    "source": file["source"],
                     "df": df,
                 }
             )
@@ -489,7 +515,7 @@ class EtlLinkedinPolars:
 
     def export_dataframes(self, data):
         """
-        Exporta dataframes concatenados para um arquivo CSV.
+        Exporta dataframes concatenados para arquivos no formato de saída configurado.
 
         Parâmetros:
         data (dict): Dicionário com os DataFrames concatenados.
@@ -498,34 +524,115 @@ class EtlLinkedinPolars:
         Retorno:
         int: Retorna 1 se a exportação for bem-sucedida.
         """
+        if self.incremental:
+            return self.export_segments(data)
+
         for key, dataframe in data.items():
             export_dir = self.export_dir
-            export_filename = f"{dataframe['category']}.csv"
+            export_filename = f"{dataframe['category']}.{self.output_format}"
 
             if os.path.exists(export_dir) == False:
                 os.makedirs(export_dir)
 
             full_path = os.path.join(export_dir, export_filename)
-            # dataframe["concatenated_df"].to_csv(
-            #     full_path, index=False, quoting=csv.QUOTE_ALL
-            # )
-            dataframe["concatenated_df"].write_csv(full_path, quote_style="always")
+            self.write_dataframe(dataframe["concatenated_df"], full_path)
+        return 1
+
+    def write_dataframe(self, df, full_path):
+        """
+        Grava um DataFrame no formato de saída configurado (CSV ou Parquet).
+
+        Parâmetros:
+        df (DataFrame): DataFrame a ser gravado.
+        full_path (str): Caminho do arquivo, já com a extensão do formato.
+        """
+        if self.output_format == "parquet":
+            df.write_parquet(full_path, compression=self.parquet_compression)
+        else:
+            df.write_csv(full_path, quote_style="always")
+
+    def export_segments(self, data):
+        """
+        Grava cada nova extração como um segmento da sua categoria e atualiza o manifesto.
+
+        Na primeira execução de uma categoria, o arquivo concatenado do método 1 é copiado
+        como segmento base. Depois disso, o custo de cada execução depende só do tamanho da
+        nova extração.
+        Cada arquivo bruto tem o seu próprio segmento: um arquivo novo acrescenta um segmento
+        e um arquivo já gravado tem o seu segmento substituído, ou mantido se o tamanho, o
+        mtime e o hash dele não mudaram (ver SegmentManifest.has_segment).
+
+        Parâmetros:
+        data (dict): Dicionário com os segmentos, gerado por concatenate_unique_extraction_data.
+
+        Retorno:
+        int: Retorna 1 se a exportação for bem-sucedida.
+        """
+        manifest = SegmentManifest(self.export_dir)
+
+        for key, segment in data.items():
+            category = segment["category"]
+            if not manifest.has_category(category):
+                manifest.add_category(category, segment["columns"], segment["clean_file"])
+
+            # segmento já gravado a partir do mesmo arquivo bruto: nada a regravar
+            if manifest.has_segment(category, segment["source"]):
+                continue
+
+            export_filename = segment_filename(
+                segment["source"]["source_file"], self.output_format
+            )
+            self.write_dataframe(
+                segment["segment_df"],
+                os.path.join(manifest.category_directory(category), export_filename),
+            )
+            manifest.add_segment(
+                category,
+                segment["source"],
+                segment["extraction_period"],
+                export_filename,
+                segment["segment_df"].height,
+            )
+
+        manifest.save()
         return 1
 
+    def read_clean_columns(self, file_path):
+        """
+        Lê apenas as colunas de um arquivo limpo, sem carregar os dados.
+
+        Parâmetros:
+        file_path (str): Caminho do arquivo CSV ou Parquet.
+
+        Retorno:
+        list: Nomes das colunas.
+        """
+        if file_path.endswith(".parquet"):
+            return list(pl.read_parquet_schema(file_path))
+        return pl.read_csv(file_path, n_rows=0).columns
+
     def get_clean_concatenated_data(self, concatenated_file_prefix="all_extractions_"):
         clean_data = {}
-        for filename in os.listdir(self.clean_concatenated_directory):
+        clean_files = list_clean_files(
+            self.clean_concatenated_directory, concatenated_file_prefix
+        )
+
+        # no modo incremental o histórico não é lido, basta saber onde está cada arquivo
+        if self.incremental:
+            return clean_files
+
+        for dataframe_name, file_path in clean_files.items():
 
             # creating obj to send in convert_column_types
             dataframe = {}
-            dataframe["dataframe_name"] = filename.replace(
-                concatenated_file_prefix, ""
-            ).replace(".csv", "")
-            dataframe["df"] = pl.read_csv(
-                os.path.join(self.clean_concatenated_directory, filename),
-            )
+            dataframe["dataframe_name"] = dataframe_name
 
-            dataframe = self.convert_column_types(dataframe)
+            # o Parquet já guarda os tipos das colunas, sem precisar reconverter datas
+            if file_path.endswith(".parquet"):
+                dataframe["df"] = pl.read_parquet(file_path)
+            else:
+                dataframe["df"] = pl.read_csv(file_path)
+                dataframe = self.convert_column_types(dataframe)
 
             # force conversion in content_metrics
             if dataframe["dataframe_name"] == "content_metrics":
@@ -581,14 +688,17 @@ class EtlLinkedinPolars:
         list: Lista de dicionários contendo os dados extraídos.
         """
         files = []
-        for file in os.listdir(self.unique_extraction_directory):
+        for file in scan_raw_files(self.unique_extraction_directory, self.raw_manifest):
+            if file["dir"]:
+                continue
             files.append(
                 {
-                    "filename": file,
-                    "file_path": os.path.join(self.unique_extraction_directory, file),
-                    "category": self.detect_file_category(file),
+                    "filename": file["filename"],
+                    "file_path": file["file_path"],
+                    "category": self.detect_file_category(file["filename"]),
                     "dir": ["-"],
                     "extraction_period": extraction_period,  # f"{year}-{month}-{i+1}"
+                    "source": source_identity(file["file_path"], file["content_hash"]),
                 }
             )
 
@@ -596,6 +706,9 @@ class EtlLinkedinPolars:
         return extraction_data
 
     def concatenate_unique_extraction_data(self, clean_dataframes, extraction_data):
+        if self.incremental:
+            return self.prepare_segments(clean_dataframes, extraction_data)
+
         concatenated_data = {}
         for data in extraction_data:
             if data["df"].height == 0:
@@ -618,6 +731,51 @@ class EtlLinkedinPolars:
 
         return concatenated_data
 
+    def prepare_segments(self, clean_files, extraction_data):
+        """
+        Prepara as novas extrações para o modo incremental, sem concatená-las ao histórico.
+
+        Parâmetros:
+        clean_files (dict): Arquivos concatenados do método 1 por categoria, gerado por get_clean_concatenated_data.
+        extraction_data (list): Lista de dicionários contendo os dados transformados da nova extração.
+
+        Retorno:
+        dict: Dicionário com um segmento por categoria e arquivo bruto, com as colunas na ordem do histórico.
+        """
+        manifest = SegmentManifest(self.export_dir)
+
+        segments = {}
+        for data in extraction_data:
+            if data["df"].height == 0:
+                continue
+
+            category = data["dataframe_name"]
+            clean_file = clean_files.get(category)
+
+            columns = manifest.get_columns(category)
+            if columns is None:
+                columns = (
+                    self.read_clean_columns(clean_file)
+                    if clean_file
+                    else data["df"].columns
+                )
+
+            check_columns(category, data["df"].columns, columns)
+            df = data["df"]
+            if df.columns != columns:
+                df = df.select(columns)
+
+            segments[(category, data["source"]["source_file"])] = {
+                "category": category,
+                "source": data["source"],
+                "extraction_period": data["extraction_period"],
+                "clean_file": clean_file,
+                "columns": columns,
+                "segment_df": df,
+            }
+
+        return segments
+
 
 def main():
     clean_concatenated_directory = "data/linkedin/clean/polars/concatenated_dataframes"
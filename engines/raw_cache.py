@@ -0,0 +1,195 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+# Incrementar sempre que a forma de ler ou armazenar as planilhas mudar
+CACHE_SCHEMA_VERSION = 2
+
+logger = logging.getLogger(__name__)
+
+
+def hash_file_content(file_path, chunk_size=1024 * 1024):
+    """
+    Calcula o hash SHA-256 do conteúdo de um arquivo.
+
+    Parâmetros:
+    file_path (str): Caminho do arquivo.
+    chunk_size (int): Tamanho dos blocos lidos do disco.
+
+    Retorno:
+    str: Hash hexadecimal do conteúdo.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RawFileCache:
+    """
+    Cache persistente das planilhas lidas dos arquivos brutos.
+
+    Cada arquivo Excel ganha uma entrada com um Parquet por planilha e um meta.json com a
+    identidade do arquivo (caminho, tamanho, mtime e hash do conteúdo), a versão do schema
+    do cache, o backend de leitura do Excel e as planilhas lidas. Entradas que não batem com o arquivo atual ou que não
+    podem ser lidas são descartadas e o arquivo é lido novamente do Excel.
+    """
+
+    def __init__(self, cache_directory, namespace):
+        """
+        Inicializa o cache.
+
+        Parâmetros:
+        cache_directory (str): Diretório raiz do cache.
+        namespace (str): Separa entradas de bibliotecas diferentes (ex.: pandas, polars), pois os DataFrames lidos diferem.
+        """
+        self.cache_directory = cache_directory
+        self.namespace = namespace
+
+    def file_identity(self, file_path, content_hash=None):
+        """
+        Levanta a identidade de um arquivo bruto.
+
+        Parâmetros:
+        file_path (str): Caminho do arquivo.
+        content_hash (str): Hash do conteúdo já conhecido (ex.: vindo do RawFileManifest). Se None, é calculado.
+
+        Retorno:
+        dict: Caminho absoluto, tamanho, mtime e hash do conteúdo do arquivo.
+        """
+        stat = os.stat(file_path)
+        return {
+            "path": os.path.abspath(file_path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "content_hash": content_hash or hash_file_content(file_path),
+        }
+
+    def entry_directory(self, identity):
+        """
+        Retorna o diretório da entrada de cache de um arquivo.
+
+        Parâmetros:
+        identity (dict): Identidade do arquivo, gerada por file_identity.
+
+        Retorno:
+        str: Caminho do diretório da entrada.
+        """
+        path_hash = hashlib.sha1(identity["path"].encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_directory, self.namespace, path_hash)
+
+    def entry_key(self, identity, sheets, backend):
+        """
+        Monta a chave que uma entrada válida precisa ter.
+
+        O backend entra na chave porque backends diferentes podem ler tipos diferentes das
+        mesmas planilhas.
+
+        Parâmetros:
+        identity (dict): Identidade do arquivo, gerada por file_identity.
+        sheets (list): Planilhas lidas do arquivo.
+        backend (str): Backend de leitura do Excel usado para o arquivo (ver ExcelReader.backend_for).
+
+        Retorno:
+        dict: Chave da entrada.
+        """
+        return {
+            "schema_version": CACHE_SCHEMA_VERSION,
+            "identity": identity,
+            "backend": backend,
+            "sheets": [[sheet["sheet_pos"], sheet["skiprows"]] for sheet in sheets],
+        }
+
+    def invalidate(self, identity):
+        """
+        Remove a entrada de cache de um arquivo, se existir.
+
+        Parâmetros:
+        identity (dict): Identidade do arquivo, gerada por file_identity.
+        """
+        shutil.rmtree(self.entry_directory(identity), ignore_errors=True)
+
+    def load(self, identity, sheets, backend, read_frame):
+        """
+        Carrega as planilhas de um arquivo a partir do cache.
+
+        Parâmetros:
+        identity (dict): Identidade do arquivo, gerada por file_identity.
+        sheets (list): Planilhas a serem lidas.
+        backend (str): Backend de leitura do Excel configurado para o arquivo.
+        read_frame (function): Função que lê um arquivo Parquet e retorna um DataFrame.
+
+        Retorno:
+        list: Lista de DataFrames na ordem de sheets, ou None se não houver entrada válida.
+        """
+        entry_directory = self.entry_directory(identity)
+        meta_path = os.path.join(entry_directory, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+
+        try:
+            with open(meta_path, "r", encoding="utf-8") as file:
+                meta = json.load(file)
+
+            if meta.get("key") != self.entry_key(identity, sheets, backend):
+                self.invalidate(identity)
+                return None
+
+            return [
+                read_frame(os.path.join(entry_directory, filename))
+                for filename in meta["files"]
+            ]
+        except Exception as error:
+            logger.warning("Entrada de cache corrompida para %s: %s", identity["path"], error)
+            self.invalidate(identity)
+            return None
+
+    def store(self, identity, sheets, backend, frames, write_frame):
+        """
+        Armazena as planilhas lidas de um arquivo no cache.
+
+        A entrada é escrita em um diretório temporário e só então movida para o lugar
+        definitivo, para que uma escrita interrompida não deixe uma entrada pela metade.
+
+        Parâmetros:
+        identity (dict): Identidade do arquivo, gerada por file_identity.
+        sheets (list): Planilhas lidas do arquivo.
+        backend (str): Backend de leitura do Excel usado para o arquivo.
+        frames (list): DataFrames lidos, na ordem de sheets.
+        write_frame (function): Função que recebe um DataFrame e o caminho e grava um arquivo Parquet.
+
+        Retorno:
+        bool: True se a entrada foi armazenada.
+        """
+        entry_directory = self.entry_directory(identity)
+        temp_directory = f"{entry_directory}.tmp-{os.getpid()}"
+
+        try:
+            shutil.rmtree(temp_directory, ignore_errors=True)
+            os.makedirs(temp_directory)
+
+            files = []
+            for i, frame in enumerate(frames):
+                filename = f"sheet_{i}.parquet"
+                write_frame(frame, os.path.join(temp_directory, filename))
+                files.append(filename)
+
+            with open(
+                os.path.join(temp_directory, "meta.json"), "w", encoding="utf-8"
+            ) as file:
+                json.dump(
+                    {"key": self.entry_key(identity, sheets, backend), "files": files},
+                    file,
+                )
+
+            self.invalidate(identity)
+            os.replace(temp_directory, entry_directory)
+            return True
+        except Exception as error:
+            # um DataFrame que não pode ser gravado em Parquet apenas não é cacheado
+            logger.warning("Não foi possível cachear %s: %s", identity["path"], error)
+            shutil.rmtree(temp_directory, ignore_errors=True)
+            return False
@@ -0,0 +1,218 @@
+import json
+import os
+import time
+
+from engines.raw_cache import hash_file_content
+
+# Incrementar sempre que a forma de varrer ou armazenar o manifesto mudar
+MANIFEST_SCHEMA_VERSION = 1
+
+# Um diretório modificado há menos que isso ainda pode mudar sem alterar o mtime gravado
+# (resolução do mtime do sistema de arquivos), então ele é listado de novo na próxima varredura
+MTIME_SAFETY_NS = 2 * 10**9
+
+
+class RawFileManifest:
+    """
+    Manifesto dos arquivos brutos de um diretório.
+
+    A árvore é varrida com os.scandir e cada diretório guarda o seu mtime, os subdiretórios e,
+    para cada arquivo, o tamanho, o mtime e o hash SHA-256 do conteúdo. Diretórios e arquivos
+    ficam ordenados por nome, então a ordem dos arquivos (e a numeração das extrações de cada
+    mês) não depende da ordem de listagem do sistema de arquivos.
+
+    Com manifest_path, o manifesto é gravado em JSON e reaproveitado nas execuções seguintes:
+    um diretório cujo mtime não mudou tem a mesma listagem da última varredura, então só o
+    próprio diretório é consultado, e os arquivos dele não são listados nem têm o hash
+    recalculado. Adicionar, remover ou renomear um arquivo muda o mtime do diretório; um arquivo
+    reescrito no mesmo lugar não muda, e só é notado se o diretório for listado de novo. O
+    cache das planilhas confere o tamanho e o mtime de cada arquivo por conta própria, então um
+    hash desatualizado não faz ele devolver planilhas antigas.
+    """
+
+    def __init__(self, raw_directory, manifest_path=None, hash_files=None):
+        """
+        Inicializa o manifesto, carregando o arquivo gravado se houver.
+
+        Parâmetros:
+        raw_directory (str): Diretório dos arquivos brutos.
+        manifest_path (str): Arquivo JSON do manifesto. Se None, a varredura fica só em memória.
+        hash_files (bool): Se True, calcula o hash do conteúdo dos arquivos novos ou alterados. Se None, só calcula quando o manifesto é gravado.
+        """
+        self.raw_directory = raw_directory
+        self.manifest_path = manifest_path
+        self.hash_files = bool(manifest_path) if hash_files is None else hash_files
+        self.directories = {}
+        self.scan_stats = {}
+
+        if manifest_path and os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as file:
+                manifest = json.load(file)
+            # manifestos de outra versão ou de outro diretório são descartados
+            if manifest.get("schema_version") == MANIFEST_SCHEMA_VERSION and manifest.get(
+                "raw_directory"
+            ) == os.path.abspath(raw_directory):
+                self.directories = manifest["directories"]
+
+    def refresh(self):
+        """
+        Atualiza o manifesto, listando de novo só os diretórios alterados, e o grava se houver manifest_path.
+
+        Retorno:
+        RawFileManifest: A própria instância.
+        """
+        previous_directories = self.directories
+        self.directories = {}
+        self.scan_stats = {"reused": 0, "scanned": 0, "hashed": 0}
+        self.scan_directory("", previous_directories, time.time_ns() - MTIME_SAFETY_NS)
+
+        if self.manifest_path:
+            self.save()
+        return self
+
+    def scan_directory(self, relative_directory, previous_directories, stable_before_ns, mtime_ns=None):
+        """
+        Registra um diretório e, recursivamente, os seus subdiretórios.
+
+        Parâmetros:
+        relative_directory (str): Caminho do diretório relativo a raw_directory ("" para a raiz).
+        previous_directories (dict): Diretórios da varredura anterior.
+        stable_before_ns (int): Diretórios com mtime anterior a este instante podem ser reaproveitados na próxima varredura.
+        mtime_ns (int): mtime do diretório, se já conhecido pela listagem do diretório pai.
+        """
+        path = os.path.join(self.raw_directory, relative_directory)
+        if mtime_ns is None:
+            mtime_ns = os.stat(path).st_mtime_ns
+        previous = previous_directories.get(relative_directory)
+
+        if previous is not None and previous["mtime_ns"] == mtime_ns:
+            # mesma listagem da última varredura: os arquivos não são consultados de novo
+            self.scan_stats["reused"] += 1
+            self.directories[relative_directory] = previous
+            for name in previous["directories"]:
+                self.scan_directory(
+                    os.path.join(relative_directory, name),
+                    previous_directories,
+                    stable_before_ns,
+                )
+            return
+
+        self.scan_stats["scanned"] += 1
+        previous_files = previous["files"] if previous else {}
+        subdirectories = {}
+        files = {}
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    subdirectories[entry.name] = entry.stat().st_mtime_ns
+                elif entry.is_file():
+                    files[entry.name] = self.file_record(entry, previous_files.get(entry.name))
+
+        self.directories[relative_directory] = {
+            "mtime_ns": mtime_ns if mtime_ns < stable_before_ns else None,
+            "directories": sorted(subdirectories),
+            "files": dict(sorted(files.items())),
+        }
+        for name in sorted(subdirectories):
+            self.scan_directory(
+                os.path.join(relative_directory, name),
+                previous_directories,
+                stable_before_ns,
+                subdirectories[name],
+            )
+
+    def file_record(self, entry, previous):
+        """
+        Monta o registro de um arquivo, reaproveitando o hash se o tamanho e o mtime não mudaram.
+
+        Parâmetros:
+        entry (os.DirEntry): Entrada do arquivo no os.scandir.
+        previous (dict): Registro do arquivo na varredura anterior, ou None.
+
+        Retorno:
+        dict: Tamanho, mtime e hash do conteúdo (None se os hashes estiverem desligados).
+        """
+        stat = entry.stat()
+        content_hash = None
+        if (
+            previous
+            and previous["size"] == stat.st_size
+            and previous["mtime_ns"] == stat.st_mtime_ns
+        ):
+            content_hash = previous["content_hash"]
+        if content_hash is None and self.hash_files:
+            content_hash = hash_file_content(entry.path)
+            self.scan_stats["hashed"] += 1
+
+        return {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "content_hash": content_hash,
+        }
+
+    def files(self):
+        """
+        Lista os arquivos do manifesto, em ordem estável: em profundidade, com diretórios e arquivos ordenados por nome.
+
+        Retorno:
+        list: Dicionários com o nome (filename), o caminho (file_path), os diretórios relativos a raw_directory (dir), a posição do arquivo no seu diretório a partir de 1 (position), o tamanho, o mtime e o hash do conteúdo.
+        """
+        files = []
+        pending = [""]
+        while pending:
+            relative_directory = pending.pop()
+            directory = self.directories[relative_directory]
+            dir_parts = relative_directory.split(os.sep) if relative_directory else []
+            for position, (filename, record) in enumerate(directory["files"].items(), start=1):
+                files.append(
+                    {
+                        "filename": filename,
+                        "file_path": os.path.join(
+                            self.raw_directory, relative_directory, filename
+                        ),
+                        "dir": dir_parts,
+                        "position": position,
+                        **record,
+                    }
+                )
+            # a pilha é desempilhada do fim, então os subdiretórios entram em ordem inversa
+            pending.extend(
+                os.path.join(relative_directory, name)
+                for name in reversed(directory["directories"])
+            )
+        return files
+
+    def save(self):
+        """
+        Grava o manifesto. O arquivo é escrito ao lado e então substituído, para não
+        deixar um manifesto pela metade.
+        """
+        directory = os.path.dirname(self.manifest_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "schema_version": MANIFEST_SCHEMA_VERSION,
+                    "raw_directory": os.path.abspath(self.raw_directory),
+                    "directories": self.directories,
+                },
+                file,
+            )
+        os.replace(temp_path, self.manifest_path)
+
+
+def scan_raw_files(raw_directory, manifest_path=None):
+    """
+    Atualiza o manifesto de um diretório de arquivos brutos e lista os arquivos dele.
+
+    Parâmetros:
+    raw_directory (str): Diretório dos arquivos brutos.
+    manifest_path (str): Arquivo JSON do manifesto. Se None, a varredura fica só em memória, sem hashes.
+
+    Retorno:
+    list: Arquivos do manifesto, no formato de RawFileManifest.files.
+    """
+    return RawFileManifest(raw_directory, manifest_path).refresh().files()
@@ -0,0 +1,249 @@
+import json
+import os
+import shutil
+
+MANIFEST_FILENAME = "_manifest.json"
+
+
+class SegmentManifest:
+    """
+    Manifesto do modo incremental do método 2.
+
+    Cada categoria é gravada como um diretório de segmentos: um segmento base, copiado uma
+    única vez do arquivo concatenado do método 1, e um segmento por arquivo bruto de extração
+    única. O manifesto (_manifest.json) guarda, por categoria, as colunas e a lista ordenada de
+    segmentos, com o formato de cada um (o segmento base mantém o formato do método 1), de
+    modo que cada execução só grava as novas extrações e atualiza este arquivo.
+
+    Um segmento é identificado pelo arquivo bruto de onde foi lido: executar de novo o mesmo
+    arquivo substitui o seu segmento, e um arquivo novo acrescenta um segmento. Cada segmento
+    guarda também o tamanho, o mtime e o hash do arquivo bruto (ver source_identity).
+    """
+
+    def __init__(self, directory):
+        """
+        Inicializa o manifesto, carregando o arquivo existente se houver.
+
+        Parâmetros:
+        directory (str): Diretório de exportação do método 2.
+        """
+        self.directory = directory
+        self.path = os.path.join(directory, MANIFEST_FILENAME)
+        self.categories = {}
+
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as file:
+                self.categories = json.load(file)["categories"]
+
+    def has_category(self, category):
+        """
+        Indica se a categoria já está registrada no manifesto.
+
+        Parâmetros:
+        category (str): Nome da categoria (ex.: content_metrics).
+
+        Retorno:
+        bool: True se a categoria já está no manifesto.
+        """
+        return category in self.categories
+
+    def get_columns(self, category):
+        """
+        Retorna as colunas registradas de uma categoria.
+
+        Parâmetros:
+        category (str): Nome da categoria.
+
+        Retorno:
+        list: Colunas da categoria, ou None se ela ainda não estiver no manifesto.
+        """
+        if category not in self.categories:
+            return None
+        return self.categories[category]["columns"]
+
+    def category_directory(self, category):
+        """
+        Retorna (e cria, se preciso) o diretório de segmentos de uma categoria.
+
+        Parâmetros:
+        category (str): Nome da categoria.
+
+        Retorno:
+        str: Caminho do diretório.
+        """
+        directory = os.path.join(self.directory, category)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        return directory
+
+    def add_category(self, category, columns, base_file_path=None):
+        """
+        Registra uma categoria, copiando o arquivo concatenado do método 1 como segmento base.
+
+        A cópia é feita byte a byte, sem ler o conteúdo, e só acontece na primeira
+        execução incremental da categoria.
+
+        Parâmetros:
+        category (str): Nome da categoria.
+        columns (list): Colunas da categoria.
+        base_file_path (str): Caminho do arquivo concatenado (CSV ou Parquet) do método 1. Se None, a categoria começa sem segmento base.
+        """
+        segments = []
+        if base_file_path:
+            filename = f"base{os.path.splitext(base_file_path)[1]}"
+            shutil.copyfile(
+                base_file_path,
+                os.path.join(self.category_directory(category), filename),
+            )
+            segments.append(
+                {
+                    "file": filename,
+                    "format": segment_format(filename),
+                    "source_file": None,
+                    "extraction_period": None,
+                    "rows": None,
+                }
+            )
+
+        self.categories[category] = {"columns": list(columns), "segments": segments}
+
+    def has_segment(self, category, source):
+        """
+        Indica se o segmento de um arquivo bruto já está gravado com o mesmo conteúdo.
+
+        O hash vem do manifesto dos arquivos brutos, que reaproveita a listagem (e os hashes)
+        de um diretório cujo mtime não mudou, então ele pode estar desatualizado para um
+        arquivo reescrito no mesmo lugar. Por isso o tamanho e o mtime atuais do arquivo
+        também precisam bater com os gravados no segmento.
+
+        Parâmetros:
+        category (str): Nome da categoria.
+        source (dict): Identidade do arquivo bruto, gerada por source_identity. Sem hash, o segmento nunca é considerado gravado.
+
+        Retorno:
+        bool: True se o segmento existe, tem a mesma identidade de origem e o arquivo dele ainda está no disco.
+        """
+        if source["source_hash"] is None or category not in self.categories:
+            return False
+        return any(
+            all(segment.get(key) == value for key, value in source.items())
+            and os.path.exists(os.path.join(self.directory, category, segment["file"]))
+            for segment in self.categories[category]["segments"]
+        )
+
+    def add_segment(self, category, source, extraction_period, filename, rows):
+        """
+        Registra o segmento de um arquivo bruto.
+
+        O segmento de um arquivo já registrado é substituído, mantendo a sua posição na
+        lista; um arquivo novo é acrescentado ao fim. Se o arquivo antigo do segmento tiver
+        outro nome (ex.: outro formato de saída), ele é removido do disco.
+
+        Parâmetros:
+        category (str): Nome da categoria.
+        source (dict): Identidade do arquivo bruto de onde a extração foi lida, gerada por source_identity.
+        extraction_period (str): Período da extração adicionada.
+        filename (str): Nome do arquivo do segmento, dentro do diretório da categoria.
+        rows (int): Quantidade de linhas do segmento.
+        """
+        new_segment = {
+            "file": filename,
+            "format": segment_format(filename),
+            **source,
+            "extraction_period": extraction_period,
+            "rows": rows,
+        }
+
+        segments = self.categories[category]["segments"]
+        for i, segment in enumerate(segments):
+            if segment.get("source_file") == source["source_file"]:
+                if segment["file"] != filename:
+                    old_path = os.path.join(self.directory, category, segment["file"])
+                    if os.path.exists(old_path):
+                        os.remove(old_path)
+                segments[i] = new_segment
+                return
+        segments.append(new_segment)
+
+    def save(self):
+        """
+        Grava o manifesto. O arquivo é escrito ao lado e então substituído, para não
+        deixar um manifesto pela metade.
+        """
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"categories": self.categories}, file, indent=2)
+        os.replace(temp_path, self.path)
+
+
+def source_identity(file_path, content_hash=None):
+    """
+    Levanta a identidade de um arquivo bruto de extração única, gravada no seu segmento.
+
+    O tamanho e o mtime vêm de um os.stat feito na hora, e não do manifesto dos arquivos
+    brutos, para que um arquivo reescrito no mesmo lugar seja notado.
+
+    Parâmetros:
+    file_path (str): Caminho do arquivo bruto.
+    content_hash (str): Hash do conteúdo vindo do manifesto dos arquivos brutos, ou None.
+
+    Retorno:
+    dict: Nome (source_file), tamanho (source_size), mtime (source_mtime_ns) e hash (source_hash) do arquivo.
+    """
+    stat = os.stat(file_path)
+    return {
+        "source_file": os.path.basename(file_path),
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_hash": content_hash,
+    }
+
+
+def segment_filename(source_file, output_format):
+    """
+    Nome do arquivo do segmento gerado a partir de um arquivo bruto, o mesmo nas três engines.
+
+    Parâmetros:
+    source_file (str): Nome do arquivo bruto (ex.: soujunior_content_203502_1.xls).
+    output_format (str): Formato de saída (csv ou parquet).
+
+    Retorno:
+    str: Nome do segmento (ex.: soujunior_content_203502_1.csv).
+    """
+    return f"{os.path.splitext(os.path.basename(source_file))[0]}.{output_format}"
+
+
+def segment_format(filename):
+    """
+    Formato de um arquivo de segmento, pela extensão.
+
+    Parâmetros:
+    filename (str): Nome do arquivo do segmento.
+
+    Retorno:
+    str: Extensão sem o ponto (csv ou parquet).
+    """
+    return os.path.splitext(filename)[1].lstrip(".")
+
+
+def check_columns(category, columns, expected_columns):
+    """
+    Confere se as colunas de uma nova extração são as mesmas do histórico da categoria.
+
+    Um segmento com outras colunas não poderia ser lido junto com os demais, então a
+    extração é recusada com ValueError em vez de ser gravada.
+
+    Parâmetros:
+    category (str): Nome da categoria.
+    columns (list): Colunas da nova extração.
+    expected_columns (list): Colunas do histórico (do manifesto ou do arquivo do método 1).
+    """
+    if set(columns) != set(expected_columns):
+        raise ValueError(
+            f"As colunas da nova extração de {category} não são as mesmas do histórico. "
+            f"Faltando: {sorted(set(expected_columns) - set(columns))}. "
+            f"Sobrando: {sorted(set(columns) - set(expected_columns))}."
+        )
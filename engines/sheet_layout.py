@@ -0,0 +1,53 @@
+# Planilhas de cada categoria de arquivo bruto, na ordem das abas, com as linhas de título
+# antes do cabeçalho (skiprows). É a definição usada pelas engines, pelas métricas de
+# ambiente (benchmark/environment_stats.py) e pelos dados sintéticos (benchmark/synthetic_data.py).
+SHEET_LAYOUT = {
+    "competitor": [{"sheet_name": "competitor", "skiprows": 1}],
+    "content": [
+        {"sheet_name": "content_metrics", "skiprows": 1},
+        {"sheet_name": "content_posts", "skiprows": 1},
+    ],
+    "followers": [
+        {"sheet_name": "followers_new", "skiprows": 0},
+        {"sheet_name": "followers_location", "skiprows": 0},
+        {"sheet_name": "followers_function", "skiprows": 0},
+        {"sheet_name": "followers_experience", "skiprows": 0},
+        {"sheet_name": "followers_industry", "skiprows": 0},
+        {"sheet_name": "followers_company_size", "skiprows": 0},
+    ],
+    "visitors": [
+        {"sheet_name": "visitors_metrics", "skiprows": 0},
+        {"sheet_name": "visitors_location", "skiprows": 0},
+        {"sheet_name": "visitors_function", "skiprows": 0},
+        {"sheet_name": "visitors_experience", "skiprows": 0},
+        {"sheet_name": "visitors_industry", "skiprows": 0},
+        {"sheet_name": "visitors_company_size", "skiprows": 0},
+    ],
+}
+
+# No Polars, as planilhas destas categorias são lidas com a linha de título como cabeçalho,
+# e o read_excel_file das engines promove a linha seguinte a nomes das colunas
+POLARS_TITLE_AS_HEADER = {"content"}
+
+
+def category_sheet_keys(category, library="pandas"):
+    """
+    Planilhas a ler de um arquivo bruto, no formato usado por read_excel_file.
+
+    Parâmetros:
+    category (str): Categoria do arquivo (competitor, content, followers, visitors).
+    library (str): Biblioteca que lê as planilhas (pandas ou polars). A posição começa em 0 no pandas e em 1 no Polars.
+
+    Retorno:
+    list: Lista de dicionários com o nome (sheet_name), a posição (sheet_pos) e as linhas a ignorar (skiprows) de cada planilha.
+    """
+    first_pos = 1 if library == "polars" else 0
+    title_as_header = library == "polars" and category in POLARS_TITLE_AS_HEADER
+    return [
+        {
+            "sheet_name": sheet["sheet_name"],
+            "sheet_pos": first_pos + i,
+            "skiprows": 0 if title_as_header else sheet["skiprows"],
+        }
+        for i, sheet in enumerate(SHEET_LAYOUT[category])
+    ]
@@ -1,11 +1,25 @@
 import shutil
 import os
-import time
-import pandas as pd
 from engines.method_1.etl_linkedin_duckdb import EtlLinkedinDuckDb
 from engines.method_1.etl_linkedin_pandas import EtlLinkedinPandas
 from engines.method_1.etl_linkedin_polars import EtlLinkedinPolars
+from engines.method_1.etl_linkedin_polars_lazy import EtlLinkedinPolarsLazy
 import gc
+from functools import partial
+
+from benchmark.environment_stats import raw_environment_stats
+from benchmark.isolation import run_harness, run_isolated
+from benchmark.memory import MemoryProbe
+from benchmark.profiling import StepProfiler
+from benchmark.resources import ResourceProbe
+from benchmark.runner import append_to_csv, run_benchmark
+from benchmark.timing import (
+    is_last_selected_step,
+    measure_step,
+    record_streaming_samples,
+    select_steps,
+    timer,
+)
 
 
 def clear_directory(directory):
@@ -20,80 +34,40 @@ def clear_directory(directory):
         shutil.rmtree(directory)
 
 
-def timer(func):
-    """
-    Função para medir o tempo de execução de uma função.
-
-    Parâmetros:
-    func (function): Função a ser medida.
-
-    Retorno:
-    function: Função com o tempo de execução medido.
-    """
-
-    def wrapper(*args, **kwargs):
-        """
-        Função que mede o tempo de execução de uma função.
-
-        Parâmetros:
-        *args: Lista de parâmetros passados para a função.
-        **kwargs: Dicionário de parâmetros passados para a função.
-
-        Retorno:
-        function: Função com o tempo de execução medido.
-        """
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        elapsed_time = time.time() - start_time
-        print(f"[{args[0].engine}] {func.__name__}: {elapsed_time:.2f} seconds")
-        args[0].engine_metrics[func.__name__] = elapsed_time.__round__(2)
-        return result
-
-    return wrapper
-
-
 def save_environment_metrics(
     environment,
     environment_dir,
     environment_data="data/linkedin/clean/m1/environments.csv",
+    raw_manifest=None,
 ):
     """
     Função para coletar os dados de ambiente.
 
+    As quantidades de tabelas, colunas e linhas são as que a extração com o pandas
+    produziria, mas são lidas dos metadados das planilhas, sem montar os DataFrames.
+
     Parâmetros:
-    raw_directory (str): Diretório de dados brutos.
+    environment (str): Nome do ambiente (ex.: 6y).
+    environment_dir (str): Diretório de dados brutos do ambiente.
+    environment_data (str): Arquivo CSV onde as métricas são acrescentadas.
+    raw_manifest (str): Arquivo JSON do manifesto dos arquivos brutos, compartilhado com as engines. Se None, a varredura fica só em memória.
 
     Retorno:
     dict: Dicionário contendo os dados de ambiente.
     """
     print("Collecting environment metrics...")
-    etl = EtlLinkedinPandas(environment_dir, "_")
-    files = etl.get_raw_files(environment_dir)
-    data = etl.extract_data()
-
-    num_files = len(files)
-    num_tables = len(data)
-    total_columns = 0
-    total_rows = 0
-
-    for dataframe in data:
-        total_columns += dataframe["df"].shape[1]
-        total_rows += dataframe["df"].shape[0]
+    files = EtlLinkedinPandas(
+        environment_dir, "_", raw_manifest=raw_manifest
+    ).get_raw_files(environment_dir)
 
+    # as dimensões vêm dos metadados das planilhas, sem extrair os dados do ambiente
     environment_metrics = {
         "environment": environment,
-        "num_files": num_files,
-        "num_tables": num_tables,
-        "total_columns": total_columns,
-        "total_rows": total_rows,
+        **raw_environment_stats(files),
     }
 
-    if os.path.exists(environment_data):
-        pd.DataFrame([environment_metrics]).to_csv(
-            environment_data, mode="a", index=False, header=False
-        )
-    else:
-        pd.DataFrame([environment_metrics]).to_csv(environment_data, index=False)
+    append_to_csv([environment_metrics], environment_data)
+    return environment_metrics
 
 
 class EtlLinkedin:
@@ -101,48 +75,130 @@ class EtlLinkedin:
     Classe para teste de processamento ETL (Extração, Transformação e Carga) de dados do LinkedIn.
     """
 
-    def __init__(self, raw_directory, clean_directory, engine, environment):
+    # engines disponíveis no método
+    ENGINES = ["duckdb", "polars", "polars_lazy", "pandas"]
+
+    # etapas do fluxo, na ordem de execução
+    STEPS = [
+        "extract_data",
+        "transform_data",
+        "load_to_clean",
+        "concatenate_monthly_data",
+        "export_monthly_data",
+        "concatenate_category_data",
+        "export_category_data",
+    ]
+
+    # diretórios lidos e gravados por etapa (atributos do harness), para as vazões em MB/s
+    STEP_DIRECTORIES = {
+        "extract_data": ("raw_directory", None),
+        "load_to_clean": (None, "clean_directory"),
+        "export_monthly_data": (None, "clean_directory"),
+        "export_category_data": (None, "clean_directory"),
+    }
+
+    def __init__(
+        self,
+        raw_directory,
+        clean_directory,
+        engine,
+        environment,
+        engine_options=None,
+        track_memory=False,
+        steps=None,
+        threads=None,
+        profile=None,
+        profile_directory=None,
+        streaming=False,
+    ):
         """
         Inicializa a classe EtlLinkedin com os diretórios de dados brutos e limpos e o motor de processamento.
 
         Parâmetros:
         raw_directory (str): Diretório contendo os dados brutos.
         clean_directory (str): Diretório onde os dados limpos serão armazenados.
-        engine (str): Motor de processamento (duckdb, pandas, polars).
+        engine (str): Motor de processamento (duckdb, pandas, polars, polars_lazy).
+        engine_options (dict): Opções repassadas ao construtor da engine (ex.: extraction_workers).
+        track_memory (bool): Se True, mede também o pico de RSS, o pico do tracemalloc e as alocações de cada etapa (deixa as etapas mais lentas).
+        steps (list): Etapas a medir. O fluxo para depois da última etapa escolhida; se None, todas as etapas são executadas e medidas.
+        threads (int): Quantidade de threads das engines multithread (DuckDB e Polars). Se None, cada engine usa o seu padrão.
+        profile (str): Se informado (cprofile ou sampling), grava o perfil de cada etapa medida (deixa as etapas mais lentas).
+        profile_directory (str): Diretório dos perfis. Se None, usa data/linkedin/clean/m1/profiles.
+        streaming (bool): Se True, o fluxo é executado mês a mês (ver steps_etl_streaming), limitando o pico de memória a um mês de dados mais os DataFrames concatenados por mês.
         """
         self.engine = engine
         self.raw_directory = raw_directory
         self.clean_directory = clean_directory
+        self.engine_options = engine_options or {}
+        self.selected_steps = select_steps(self.STEPS, steps)
+        self.threads = threads
         self.etl = self.get_etl_instance(engine)
         self.engine_metrics = {}
         self.engine_metrics["environment"] = environment
         self.engine_metrics["engine"] = engine
+        if threads:
+            self.engine_metrics["threads"] = threads
+        self.step_samples = {}
+        self.streaming = streaming
+        # tempos somados das etapas durante um fluxo em modo streaming
+        self.streaming_elapsed_ns = None
+        # a sonda de CPU e I/O fica por dentro, para não contar o custo da sonda de memória
+        self.step_probes = [MemoryProbe()] if track_memory else []
+        self.step_probes.append(ResourceProbe())
+        self.step_profiler = None
+        if profile:
+            prefix = f"{engine}_{environment}" + (f"_t{threads}" if threads else "")
+            self.step_profiler = StepProfiler(
+                profile, profile_directory or "data/linkedin/clean/m1/profiles", prefix
+            )
 
     def get_etl_instance(self, engine):
         """
-        Função para obter a instância do motor de processamento (duckdb, pandas, polars).
+        Função para obter a instância do motor de processamento (duckdb, pandas, polars, polars_lazy).
 
         Parâmetros:
-        engine (str): Motor de processamento (duckdb, pandas, polars).
+        engine (str): Motor de processamento (duckdb, pandas, polars, polars_lazy).
 
         Retorno:
-        EtlLinkedinDuckDb, EtlLinkedinPandas ou EtlLinkedinPolars: Instância do motor de processamento (duckdb, pandas, polars).
+        EtlLinkedinDuckDb, EtlLinkedinPandas, EtlLinkedinPolars ou EtlLinkedinPolarsLazy: Instância do motor de processamento.
         """
+        engine_options = dict(self.engine_options)
+        if self.threads and engine in ("duckdb", "polars", "polars_lazy"):
+            engine_options["threads"] = self.threads
+
         if engine == "duckdb":
-            return EtlLinkedinDuckDb(self.raw_directory, self.clean_directory)
+            return EtlLinkedinDuckDb(
+                self.raw_directory, self.clean_directory, **engine_options
+            )
         elif engine == "pandas":
-            return EtlLinkedinPandas(self.raw_directory, self.clean_directory)
+            return EtlLinkedinPandas(
+                self.raw_directory, self.clean_directory, **engine_options
+            )
         elif engine == "polars":
-            return EtlLinkedinPolars(self.raw_directory, self.clean_directory)
+            return EtlLinkedinPolars(
+                self.raw_directory, self.clean_directory, **engine_options
+            )
+        elif engine == "polars_lazy":
+            return EtlLinkedinPolarsLazy(
+                self.raw_directory, self.clean_directory, **engine_options
+            )
         else:
             raise ValueError("Invalid engine specified")
 
     @timer
-    def extract_data(self):
+    def extract_data(self, months=None):
         """
         Função para iniciar o processo de extração de dados da engine.
+
+        Parâmetros:
+        months (generator): No modo streaming, o gerador extract_data_by_month da engine. Só o próximo mês é extraído.
+
+        Retorno:
+        list: Dados extraídos, ou None quando os meses do gerador acabam.
         """
-        data = self.etl.extract_data()
+        data = self.etl.extract_data() if months is None else next(months, None)
+        if data is None:
+            return None
         if self.engine == "duckdb":
             return self.etl.convert_dataframes_to_duckdb(data)
         else:
@@ -211,59 +267,195 @@ class EtlLinkedin:
 
     def process_data(self):
         """
-        Função para iniciar fluxo de processamento da engine.
+        Função para iniciar fluxo de processamento da engine e salvar as métricas.
+        """
+        self.run_etl()
+        self.save_metrics_to_csv()
+
+    def run_etl(self):
+        """
+        Função para executar uma vez o fluxo de processamento da engine, medindo o tempo total.
         """
         clear_directory(self.clean_directory)
         print("Starting ETL process using", self.engine)
 
-        total_start_time = time.time()
-
-        self.steps_etl()
-
-        total_elapsed_time = time.time() - total_start_time
-        self.engine_metrics["total_etl_time"] = total_elapsed_time.__round__(2)
-        print(f"[{self.engine}] Total ETL time: {total_elapsed_time:.2f} seconds")
-
-        self.save_metrics_to_csv()
+        _, total_elapsed_ns = measure_step(self, "total_etl_time", self.steps_etl)
+        if total_elapsed_ns is not None:
+            print(f"[{self.engine}] Total ETL time: {total_elapsed_ns / 1e9:.4f} seconds")
 
     def steps_etl(self):
         """
         Função para iniciar fluxo de processamento da engine.
         """
+        if self.streaming:
+            return self.steps_etl_streaming()
+
         data = self.extract_data()
+        if self.is_last_step("extract_data"):
+            return
         data = self.transform_data(data)
+        if self.is_last_step("transform_data"):
+            return
         self.load_to_clean(data)
+        if self.is_last_step("load_to_clean"):
+            return
         monthly_data = self.concatenate_monthly_data(data)
+        if self.is_last_step("concatenate_monthly_data"):
+            return
         self.export_monthly_data(monthly_data)
+        if self.is_last_step("export_monthly_data"):
+            return
         category_data = self.concatenate_category_data(monthly_data)
+        if self.is_last_step("concatenate_category_data"):
+            return
         self.export_category_data(category_data)
 
-    def save_metrics_to_csv(self, metrics_file="data/linkedin/clean/m1/engines.csv"):
-        file_exists = os.path.isfile(metrics_file)
+    def steps_etl_streaming(self):
+        """
+        Função para iniciar o fluxo de processamento da engine mês a mês.
 
-        if file_exists:
-            pd.DataFrame(self.engine_metrics, index=[0]).to_csv(
-                metrics_file, mode="a", index=False, header=False
-            )
-        else:
-            pd.DataFrame(self.engine_metrics, index=[0]).to_csv(
-                metrics_file, index=False
-            )
+        Os arquivos de cada mês passam por extração, transformação, carga, concatenação mensal
+        e exportação mensal antes de o mês seguinte ser lido. Só os DataFrames (ou tabelas)
+        concatenados por mês ficam guardados, para a concatenação por categoria no fim, então o
+        pico de memória fica limitado a um mês de dados mais esses acumuladores. Os arquivos
+        gerados são os mesmos do fluxo completo. O tempo de cada etapa é a soma dos meses.
+        """
+        self.streaming_elapsed_ns = {}
+        monthly_data = {}
+        concatenate_categories = True
+        try:
+            months = self.etl.extract_data_by_month()
+            while True:
+                data = self.extract_data(months)
+                if data is None:
+                    break
+                concatenate_categories = self.stream_month(data, monthly_data)
+
+                # as tabelas por extração já foram copiadas para as tabelas mensais
+                if self.engine == "duckdb":
+                    self.etl.drop_tables(data)
+                del data
+
+            if not concatenate_categories:
+                return
+            category_data = self.concatenate_category_data(monthly_data)
+            if self.is_last_step("concatenate_category_data"):
+                return
+            self.export_category_data(category_data)
+        finally:
+            record_streaming_samples(self)
+            self.streaming_elapsed_ns = None
+
+    def stream_month(self, data, monthly_data):
+        """
+        Função para processar os dados extraídos de um mês no modo streaming.
+
+        Parâmetros:
+        data (list): Dados extraídos do mês.
+        monthly_data (dict): Acumulador dos dados concatenados por mês, que recebe os do mês.
+
+        Retorno:
+        bool: True se as etapas por categoria ainda precisam ser executadas, dado o filtro de etapas.
+        """
+        if self.is_last_step("extract_data"):
+            return False
+        data = self.transform_data(data)
+        if self.is_last_step("transform_data"):
+            return False
+        self.load_to_clean(data)
+        if self.is_last_step("load_to_clean"):
+            return False
+        month_data = self.concatenate_monthly_data(data)
+        if self.is_last_step("concatenate_monthly_data"):
+            return False
+        self.export_monthly_data(month_data)
+
+        # a concatenação por categoria só usa os DataFrames já concatenados do mês
+        for grouped_data in month_data.values():
+            grouped_data.pop("dfs", None)
+        monthly_data.update(month_data)
+        return not self.is_last_step("export_monthly_data")
+
+    def is_last_step(self, step):
+        """
+        Indica se a etapa é a última que precisa ser executada, dado o filtro de etapas.
+
+        Parâmetros:
+        step (str): Nome da etapa.
+
+        Retorno:
+        bool: True se nenhuma etapa escolhida vem depois desta.
+        """
+        return is_last_selected_step(self.STEPS, self.selected_steps, step)
+
+    def save_metrics_to_csv(self, metrics_file="data/linkedin/clean/m1/engines.csv"):
+        append_to_csv([self.engine_metrics], metrics_file)
 
 
 if __name__ == "__main__":
     dir_raw = "data/linkedin/raw"
     environments_tests = ["1y", "2y", "6y"]
     engines = ["duckdb", "polars", "pandas"]
+    engine_options = {
+        "extraction_workers": 1,
+        "stacked_transform": False,
+        "output_format": "csv",
+    }
+
+    # modo benchmark: aquecimento + repetições medidas, com amostras brutas e resumo estatístico
+    benchmark_mode = False
+    warmup = 1
+    repetitions = 5
+    # pico de RSS, pico do tracemalloc e alocações por etapa, gravados ao lado dos tempos
+    track_memory = False
+    # perfil de cada etapa (cprofile ou sampling), gravado em data/linkedin/clean/m1/profiles
+    profile = None
+    # fluxo mês a mês, com o pico de memória limitado a um mês de dados mais os acumuladores mensais
+    streaming = False
+    # cada célula (engine, ambiente) roda em um processo novo, para a ordem das engines não enviesar as métricas
+    isolate = False
 
     for environment in environments_tests:
         dir_environment = "_".join([dir_raw, environment])
 
-        save_environment_metrics(environment, dir_environment)
+        if isolate:
+            run_isolated(save_environment_metrics, environment, dir_environment)
+        else:
+            save_environment_metrics(environment, dir_environment)
 
         for engine in engines:
             dir_clean = f"data/linkedin/clean/m1/{engine}/{environment}"
-            etl = EtlLinkedin(dir_environment, dir_clean, engine, environment)
+            create_harness = partial(
+                EtlLinkedin,
+                dir_environment,
+                dir_clean,
+                engine,
+                environment,
+                engine_options,
+                track_memory,
+                profile=profile,
+                streaming=streaming,
+            )
+
+            if benchmark_mode:
+                run_benchmark(
+                    create_harness,
+                    {"method": "m1", "environment": environment, "engine": engine},
+                    warmup=warmup,
+                    repetitions=repetitions,
+                    output_directory="data/linkedin/clean/m1",
+                    isolate=isolate,
+                )
+                continue
+
+            if isolate:
+                result = run_isolated(run_harness, create_harness)
+                append_to_csv(
+                    [result["engine_metrics"]], "data/linkedin/clean/m1/engines.csv"
+                )
+                continue
+
+            etl = create_harness()
             etl.process_data()
             
             del etl
@@ -1,14 +1,27 @@
 import shutil
 import os
-import time
 from engines.method_2.etl_linkedin_duckdb_2 import EtlLinkedinDuckDb
 from engines.method_2.etl_linkedin_pandas_2 import EtlLinkedinPandas
 from engines.method_2.etl_linkedin_polars_2 import EtlLinkedinPolars
-import pandas as pd
 import gc
-
-
-def clear_directory(engine):
+import pyarrow.parquet as pq
+from functools import partial
+
+from benchmark.environment_stats import count_lines
+from benchmark.isolation import run_harness, run_isolated
+from benchmark.memory import MemoryProbe
+from benchmark.profiling import StepProfiler
+from benchmark.resources import ResourceProbe
+from benchmark.runner import append_to_csv, run_benchmark
+from benchmark.timing import (
+    is_last_selected_step,
+    measure_step,
+    select_steps,
+    timer,
+)
+
+
+def clear_directory(directory):
     """
     Função para limpar o diretório de dados limpos.
 
@@ -16,40 +29,8 @@ def clear_directory(engine):
     directory (str): Diretório de dados limpos.
     """
     print("Cleaning engine directory...")
-    if os.path.exists(f"data/linkedin/clean/m2/{engine}"):
-        shutil.rmtree(f"data/linkedin/clean/m2/{engine}")
-
-
-def timer(func):
-    """
-    Função para medir o tempo de execução de uma função.
-
-    Parâmetros:
-    func (function): Função a ser medida.
-
-    Retorno:
-    function: Função com o tempo de execução medido.
-    """
-
-    def wrapper(*args, **kwargs):
-        """
-        Função que mede o tempo de execução de uma função.
-
-        Parâmetros:
-        *args: Lista de parâmetros passados para a função.
-        **kwargs: Dicionário de parâmetros passados para a função.
-
-        Retorno:
-        function: Função com o tempo de execução medido.
-        """
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        elapsed_time = time.time() - start_time
-        print(f"[{args[0].engine}] {func.__name__}: {elapsed_time:.2f} seconds")
-        args[0].engine_metrics[func.__name__] = elapsed_time.__round__(2)
-        return result
-
-    return wrapper
+    if os.path.exists(directory):
+        shutil.rmtree(directory)
 
 
 def save_environment_metrics(
@@ -59,7 +40,9 @@ def save_environment_metrics(
     Função para coletar os dados de ambiente.
 
     Parâmetros:
-    raw_directory (str): Diretório de dados brutos.
+    env (str): Nome do ambiente (ex.: 6y).
+    env_clean_dir (str): Diretório com os arquivos concatenados do método 1 usados pelo ambiente.
+    environment_data (str): Arquivo CSV onde as métricas são acrescentadas.
 
     Retorno:
     dict: Dicionário contendo os dados de ambiente.
@@ -70,9 +53,14 @@ def save_environment_metrics(
     dataframe_size = 0
     num_lines = 0
     for file in files:
-        dataframe_size += os.path.getsize(env_clean_dir + "/" + file)
-        with open(env_clean_dir + "/" + file, "r", encoding="utf-8") as file:
-            num_lines += sum(1 for line in file)
+        file_path = os.path.join(env_clean_dir, file)
+        dataframe_size += os.path.getsize(file_path)
+        if file.endswith(".parquet"):
+            # linhas de dados mais o cabeçalho, como na contagem do CSV
+            num_lines += pq.ParquetFile(file_path).metadata.num_rows + 1
+            continue
+
+        num_lines += count_lines(file_path)
 
     environment_metrics = {
         "environment": env,
@@ -81,12 +69,8 @@ def save_environment_metrics(
         "num_lines": num_lines,
     }
 
-    if os.path.exists(environment_data):
-        pd.DataFrame([environment_metrics]).to_csv(
-            environment_data, mode="a", index=False, header=False
-        )
-    else:
-        pd.DataFrame([environment_metrics]).to_csv(environment_data, index=False)
+    append_to_csv([environment_metrics], environment_data)
+    return environment_metrics
 
 
 class EtlLinkedin:
@@ -94,12 +78,38 @@ class EtlLinkedin:
     Classe para teste de processamento ETL (Extração, Transformação e Carga) de dados do LinkedIn.
     """
 
+    # engines disponíveis no método
+    ENGINES = ["duckdb", "polars", "pandas"]
+
+    # etapas do fluxo, na ordem de execução
+    STEPS = [
+        "get_clean_concatenated_data",
+        "get_raw_unique_extraction_data",
+        "transform_data",
+        "concatenate_unique_extraction_data",
+        "export_dataframes",
+    ]
+
+    # diretórios lidos e gravados por etapa (atributos do harness), para as vazões em MB/s
+    STEP_DIRECTORIES = {
+        "get_clean_concatenated_data": ("clean_concatenated_directory", None),
+        "get_raw_unique_extraction_data": ("unique_extraction_directory", None),
+        "export_dataframes": (None, "export_directory"),
+    }
+
     def __init__(
         self,
         engine,
         environment,
         m1_directory="data/linkedin/clean/m1",
         unique_extraction_directory="data/linkedin/raw_unique_extraction",
+        engine_options=None,
+        track_memory=False,
+        steps=None,
+        threads=None,
+        export_directory=None,
+        profile=None,
+        profile_directory=None,
     ):
         """
         Inicializa a classe EtlLinkedin com os diretórios de dados brutos e limpos e o motor de processamento.
@@ -108,18 +118,40 @@ class EtlLinkedin:
         raw_directory (str): Diretório contendo os dados brutos.
         clean_directory (str): Diretório onde os dados limpos serão armazenados.
         engine (str): Motor de processamento (duckdb, pandas, polars).
+        engine_options (dict): Opções repassadas ao construtor da engine (ex.: output_format).
+        track_memory (bool): Se True, mede também o pico de RSS, o pico do tracemalloc e as alocações de cada etapa (deixa as etapas mais lentas).
+        steps (list): Etapas a medir. O fluxo para depois da última etapa escolhida; se None, todas as etapas são executadas e medidas.
+        threads (int): Quantidade de threads das engines multithread (DuckDB e Polars). Se None, cada engine usa o seu padrão.
+        export_directory (str): Diretório de exportação da engine. Se None, usa data/linkedin/clean/m2/<engine>.
+        profile (str): Se informado (cprofile ou sampling), grava o perfil de cada etapa medida (deixa as etapas mais lentas).
+        profile_directory (str): Diretório dos perfis. Se None, usa data/linkedin/clean/m2/profiles.
         """
         self.engine = engine
+        self.engine_options = engine_options or {}
         self.m1_directory = m1_directory
         self.clean_concatenated_directory = (
             f"{m1_directory}/{engine}/{environment}/concatenated_dataframes"
         )
-        self.export_directory = f"data/linkedin/clean/m2/{engine}"
+        self.export_directory = export_directory or f"data/linkedin/clean/m2/{engine}"
         self.unique_extraction_directory = unique_extraction_directory
+        self.selected_steps = select_steps(self.STEPS, steps)
+        self.threads = threads
         self.etl = self.get_etl_instance(engine)
         self.engine_metrics = {}
         self.engine_metrics["environment"] = environment
         self.engine_metrics["engine"] = engine
+        if threads:
+            self.engine_metrics["threads"] = threads
+        self.step_samples = {}
+        # a sonda de CPU e I/O fica por dentro, para não contar o custo da sonda de memória
+        self.step_probes = [MemoryProbe()] if track_memory else []
+        self.step_probes.append(ResourceProbe())
+        self.step_profiler = None
+        if profile:
+            prefix = f"{engine}_{environment}" + (f"_t{threads}" if threads else "")
+            self.step_profiler = StepProfiler(
+                profile, profile_directory or "data/linkedin/clean/m2/profiles", prefix
+            )
 
     def get_etl_instance(self, engine):
         """
@@ -131,23 +163,30 @@ class EtlLinkedin:
         Retorno:
         EtlLinkedinDuckDb, EtlLinkedinPandas ou EtlLinkedinPolars: Instância do motor de processamento (duckdb, pandas, polars).
         """
+        engine_options = dict(self.engine_options)
+        if self.threads and engine in ("duckdb", "polars"):
+            engine_options["threads"] = self.threads
+
         if engine == "duckdb":
             return EtlLinkedinDuckDb(
                 self.clean_concatenated_directory,
                 self.unique_extraction_directory,
                 self.export_directory,
+                **engine_options,
             )
         elif engine == "pandas":
             return EtlLinkedinPandas(
                 self.clean_concatenated_directory,
                 self.unique_extraction_directory,
                 self.export_directory,
+                **engine_options,
             )
         elif engine == "polars":
             return EtlLinkedinPolars(
                 self.clean_concatenated_directory,
                 self.unique_extraction_directory,
                 self.export_directory,
+                **engine_options,
             )
         else:
             raise ValueError("Invalid engine specified")
@@ -197,58 +236,126 @@ class EtlLinkedin:
 
     def process_data(self):
         """
-        Função para iniciar fluxo de processamento da engine.
+        Função para iniciar fluxo de processamento da engine e salvar as métricas.
         """
+        self.run_etl()
+        self.save_metrics_to_csv()
 
-        print("Starting ETL process using", self.engine)
-
-        clear_directory(self.engine)
-        total_start_time = time.time()
+    def run_etl(self):
+        """
+        Função para executar uma vez o fluxo de processamento da engine, medindo o tempo total.
 
-        self.steps_etl()
+        No modo incremental, o diretório de exportação guarda os segmentos das execuções
+        anteriores e não é limpo: quem roda a célula o limpa uma vez por ambiente.
+        """
 
-        total_elapsed_time = time.time() - total_start_time
-        self.engine_metrics["total_etl_time"] = total_elapsed_time.__round__(2)
-        print(f"[{self.engine}] Total ETL time: {total_elapsed_time:.2f} seconds")
+        print("Starting ETL process using", self.engine)
 
-        self.save_metrics_to_csv()
+        if not self.engine_options.get("incremental"):
+            clear_directory(self.export_directory)
+        _, total_elapsed_ns = measure_step(self, "total_etl_time", self.steps_etl)
+        if total_elapsed_ns is not None:
+            print(f"[{self.engine}] Total ETL time: {total_elapsed_ns / 1e9:.4f} seconds")
 
     def steps_etl(self):
         """
         Função para iniciar fluxo de processamento da engine.
         """
         clean_dataframes = self.get_clean_concatenated_data()
+        if self.is_last_step("get_clean_concatenated_data"):
+            return
         extraction_data = self.get_raw_unique_extraction_data()
+        if self.is_last_step("get_raw_unique_extraction_data"):
+            return
         extraction_data = self.transform_data(extraction_data)
+        if self.is_last_step("transform_data"):
+            return
 
         concatenated_data = self.concatenate_unique_extraction_data(
             clean_dataframes, extraction_data
         )
+        if self.is_last_step("concatenate_unique_extraction_data"):
+            return
         self.export_dataframes(concatenated_data)
 
-    def save_metrics_to_csv(self, metrics_file="data/linkedin/clean/m2/engines.csv"):
-        file_exists = os.path.isfile(metrics_file)
+    def is_last_step(self, step):
+        """
+        Indica se a etapa é a última que precisa ser executada, dado o filtro de etapas.
 
-        if file_exists:
-            pd.DataFrame(self.engine_metrics, index=[0]).to_csv(
-                metrics_file, mode="a", index=False, header=False
-            )
-        else:
-            pd.DataFrame(self.engine_metrics, index=[0]).to_csv(
-                metrics_file, index=False
-            )
+        Parâmetros:
+        step (str): Nome da etapa.
+
+        Retorno:
+        bool: True se nenhuma etapa escolhida vem depois desta.
+        """
+        return is_last_selected_step(self.STEPS, self.selected_steps, step)
+
+    def save_metrics_to_csv(self, metrics_file="data/linkedin/clean/m2/engines.csv"):
+        append_to_csv([self.engine_metrics], metrics_file)
 
 
 if __name__ == "__main__":
     environments = ["1y", "2y", "6y"]
     engines = ["polars", "pandas", "duckdb"]
+    # com incremental=True, o diretório de cada engine é limpo uma vez por ambiente: a primeira
+    # execução (o aquecimento, no modo benchmark) copia o histórico como segmento base
+    engine_options = {"output_format": "csv", "incremental": False}
+
+    # modo benchmark: aquecimento + repetições medidas, com amostras brutas e resumo estatístico
+    benchmark_mode = False
+    warmup = 1
+    repetitions = 5
+    # pico de RSS, pico do tracemalloc e alocações por etapa, gravados ao lado dos tempos
+    track_memory = False
+    # perfil de cada etapa (cprofile ou sampling), gravado em data/linkedin/clean/m2/profiles
+    profile = None
+    # cada célula (engine, ambiente) roda em um processo novo, para a ordem das engines não enviesar as métricas
+    isolate = False
 
     for environment in environments:
-        env_clean_dir = f"data\linkedin\clean\m1\{engines[0]}\{environment}\concatenated_dataframes"
+        env_clean_dir = os.path.join(
+            "data",
+            "linkedin",
+            "clean",
+            "m1",
+            engines[0],
+            environment,
+            "concatenated_dataframes",
+        )
         save_environment_metrics(env=environment, env_clean_dir=env_clean_dir)
         
         for engine in engines:
-            etl = EtlLinkedin(engine, environment)
+            if engine_options.get("incremental"):
+                clear_directory(f"data/linkedin/clean/m2/{engine}")
+
+            create_harness = partial(
+                EtlLinkedin,
+                engine,
+                environment,
+                engine_options=engine_options,
+                track_memory=track_memory,
+                profile=profile,
+            )
+
+            if benchmark_mode:
+                run_benchmark(
+                    create_harness,
+                    {"method": "m2", "environment": environment, "engine": engine},
+                    warmup=warmup,
+                    repetitions=repetitions,
+                    output_directory="data/linkedin/clean/m2",
+                    isolate=isolate,
+                )
+                continue
+
+            if isolate:
+                result = run_isolated(run_harness, create_harness)
+                append_to_csv(
+                    [result["engine_metrics"]], "data/linkedin/clean/m2/engines.csv"
+                )
+                continue
+
+            etl = create_harness()
             etl.process_data()
             
             del etl